@@ -1,5 +1,47 @@
 """Herramientas de análisis y enriquecimiento para inventarios de discos."""
 
-from . import ai, annotations, inventory  # noqa: F401
+from __future__ import annotations
 
-__all__ = ["ai", "annotations", "inventory"]
+import importlib
+
+
+def __getattr__(name: str) -> object:
+    """Importa cada submódulo la primera vez que se usa (PEP 562).
+
+    ``import discos_analisis`` no arrastra ``urllib``, ``sqlite3`` ni
+    ``asyncio``; cada comando solo paga por los módulos que usa.
+    """
+    if name in __all__:
+        module = importlib.import_module(f".{name}", __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
+__all__ = [
+    "ai",
+    "annotationdb",
+    "annotations",
+    "changes",
+    "classifier",
+    "folders",
+    "hashindex",
+    "hashing",
+    "inventory",
+    "leases",
+    "perceptual",
+    "pipeline",
+    "progress",
+    "query",
+    "reclaim",
+    "records",
+    "rules",
+    "scheduler",
+    "textindex",
+    "videoprint",
+    "walker",
+]
@@ -3,11 +3,24 @@
 from __future__ import annotations
 
 import json
+import re
 import sys
+import threading
 import time
-import urllib.error
-import urllib.request
-from typing import Dict, List
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .constants import DEFAULT_PREVIEW_TOKENS
+
+SYSTEM_PROMPT = "Eres un asistente experto en gestión documental. Responde siempre en JSON válido."
+
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+_SPACES = re.compile(r"[ \t\f\v]+")
+# Encabezados que se conservan al recortar: Markdown, secciones INI, líneas
+# terminadas en ':', títulos en mayúsculas y definiciones de código.
+_HEADER = re.compile(
+    r"(?:#{1,6}\s|\[[^\]]+\]$|[A-ZÁÉÍÓÚÑ][^a-záéíóúñ]{2,59}$|.{1,60}:$|(?:def|class|function|sub|module)\s|<h[1-6])"
+)
 
 
 class ApiError(RuntimeError):
@@ -18,19 +31,75 @@ class ApiError(RuntimeError):
         self.status = status
 
 
-def format_prompt(
-    metadata: Dict[str, str],
-    preview: str,
-    categories: List[str],
-    include_summary: bool,
-) -> str:
-    """Construye el prompt enviado al modelo de lenguaje."""
-    options = ", ".join(categories)
+class TokenBudgetExceeded(RuntimeError):
+    """La siguiente llamada superaría el presupuesto de tokens de la ejecución."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimación local de tokens: ~4 caracteres por palabra y uno por signo."""
+    return sum((len(piece) + 3) // 4 for piece in _TOKEN_PIECES.findall(text))
+
+
+def compact_preview(preview: str, max_tokens: int = DEFAULT_PREVIEW_TOKENS) -> str:
+    """Reduce el avance a ``max_tokens`` tokens estimados conservando la señal.
+
+    Colapsa los espacios, elimina líneas vacías consecutivas y líneas
+    repetidas. Si aún sobra texto, se queda con las primeras líneas hasta
+    tres cuartos del límite y completa el resto con los encabezados que
+    aparecen después del corte.
+    """
+    lines: List[Tuple[str, int]] = []
+    seen = set()
+    total = 0
+    blank = True
+    for raw in preview.splitlines():
+        line = _SPACES.sub(" ", raw).strip()
+        if not line:
+            if not blank:
+                lines.append(("", 0))
+            blank = True
+            continue
+        blank = False
+        if line in seen:
+            continue
+        seen.add(line)
+        tokens = estimate_tokens(line) + 1
+        lines.append((line, tokens))
+        total += tokens
+    if lines and not lines[-1][0]:
+        lines.pop()
+    if total <= max_tokens:
+        return "\n".join(line for line, _ in lines)
+    kept: List[str] = []
+    used = 0
+    head_limit = max_tokens * 3 // 4
+    position = 0
+    for position, (line, tokens) in enumerate(lines):
+        if used + tokens > head_limit:
+            # Una línea larga se corta en proporción a los tokens que quedan.
+            cut = (head_limit - used) * len(line) // tokens
+            if cut > 0:
+                kept.append(line[:cut])
+                used = head_limit
+            break
+        kept.append(line)
+        used += tokens
+    kept.append("[…]")
+    for line, tokens in lines[position:]:
+        if line and used + tokens <= max_tokens and _HEADER.match(line):
+            kept.append(line)
+            used += tokens
+    return "\n".join(kept)
+
+
+@lru_cache(maxsize=32)
+def prompt_prefix(categories: Tuple[str, ...], include_summary: bool) -> str:
+    """Instrucciones fijas del prompt; se construyen una vez por juego de categorías."""
     lines = [
         "Eres un asistente que clasifica archivos de un inventario.",
         "Analiza los metadatos del archivo y, si existe, el fragmento de contenido.",
         "Debes responder únicamente en JSON con las claves 'category' y 'summary'.",
-        "La clave 'category' debe ser una de: [" + options + "].",
+        "La clave 'category' debe ser una de: [" + ", ".join(categories) + "].",
     ]
     if include_summary:
         lines.append("La clave 'summary' debe contener una frase breve (máx. 2) en español.")
@@ -38,9 +107,26 @@ def format_prompt(
         lines.append("Si no hay que resumir, deja 'summary' como cadena vacía.")
     lines.append("")
     lines.append("Metadatos:")
+    return "\n".join(lines)
+
+
+def format_prompt(
+    metadata: Dict[str, str],
+    preview: str,
+    categories: Sequence[str],
+    include_summary: bool,
+    preview_tokens: Optional[int] = None,
+) -> str:
+    """Construye el prompt enviado al modelo de lenguaje.
+
+    Con ``preview_tokens`` el avance se compacta con ``compact_preview``.
+    """
+    lines = [prompt_prefix(tuple(categories), include_summary)]
     for key, value in metadata.items():
         if value:
             lines.append(f"- {key}: {value}")
+    if preview and preview_tokens is not None:
+        preview = compact_preview(preview, preview_tokens)
     if preview:
         lines.append("")
         lines.append("Contenido:")
@@ -48,10 +134,92 @@ def format_prompt(
     return "\n".join(lines)
 
 
+class TokenBudget:
+    """Tokens consumidos en la ejecución y límite opcional (0 = sin límite).
+
+    Es seguro entre hilos: las llamadas en curso reservan su estimación
+    hasta que se cobra el consumo real o se liberan por un fallo. Con
+    ``shared`` (``shared_budget()``, creado antes de lanzar los procesos) el
+    límite se comprueba contra lo gastado y reservado por todos los procesos
+    que lo comparten; los contadores propios siguen siendo del proceso.
+    """
+
+    def __init__(self, limit: int = 0, shared: Optional[Any] = None) -> None:
+        self.limit = limit
+        self.prompt = 0
+        self.completion = 0
+        self.calls = 0
+        self.reserved = 0
+        self.shared = shared
+        self._lock = threading.Lock()
+
+    @property
+    def spent(self) -> int:
+        return self.prompt + self.completion
+
+    def reserve(self, tokens: int) -> None:
+        """Aparta ``tokens`` para una llamada; lanza ``TokenBudgetExceeded`` si no caben."""
+        with self._lock:
+            if self.shared is None:
+                spent, reserved = self.spent, self.reserved
+                if self.limit and spent + reserved + tokens > self.limit:
+                    raise TokenBudgetExceeded(
+                        f"{spent} de {self.limit} tokens usados; la siguiente llamada necesita {tokens}"
+                    )
+            else:
+                with self.shared.get_lock():
+                    spent, reserved = self.shared[0], self.shared[1]
+                    if self.limit and spent + reserved + tokens > self.limit:
+                        raise TokenBudgetExceeded(
+                            f"{spent} de {self.limit} tokens usados entre todos los procesos; "
+                            f"la siguiente llamada necesita {tokens}"
+                        )
+                    self.shared[1] += tokens
+            self.reserved += tokens
+
+    def release(self, tokens: int) -> None:
+        with self._lock:
+            self.reserved -= tokens
+            if self.shared is not None:
+                with self.shared.get_lock():
+                    self.shared[1] -= tokens
+
+    def charge(self, prompt: int, completion: int) -> None:
+        with self._lock:
+            self.prompt += prompt
+            self.completion += completion
+            self.calls += 1
+            if self.shared is not None:
+                with self.shared.get_lock():
+                    self.shared[0] += prompt + completion
+
+    def summary(self) -> str:
+        limit = f" de {self.limit}" if self.limit else ""
+        return (
+            f"Tokens usados: {self.spent}{limit} en {self.calls} llamadas "
+            f"(entrada {self.prompt}, salida {self.completion})"
+        )
+
+
+def shared_budget() -> Any:
+    """Contadores ``(gastados, reservados)`` en memoria compartida para ``TokenBudget``."""
+    import multiprocessing
+
+    return multiprocessing.Array("q", 2)
+
+
 class OpenAIClient:
     """Cliente HTTP mínimo para consumir chat.completions sin SDK externo."""
 
-    def __init__(self, api_key: str, model: str, api_base: str, max_tokens: int) -> None:
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        api_base: str,
+        max_tokens: int,
+        preview_tokens: Optional[int] = DEFAULT_PREVIEW_TOKENS,
+        budget: Optional[TokenBudget] = None,
+    ) -> None:
         base = api_base.rstrip("/")
         if base.endswith("/v1"):
             endpoint = f"{base}/chat/completions"
@@ -61,6 +229,8 @@ class OpenAIClient:
         self.model = model
         self.api_key = api_key
         self.max_tokens = max_tokens
+        self.preview_tokens = preview_tokens
+        self.budget = budget if budget is not None else TokenBudget()
 
     def classify(
         self,
@@ -70,17 +240,18 @@ class OpenAIClient:
         include_summary: bool,
         temperature: float,
     ) -> Dict[str, str]:
-        prompt = format_prompt(metadata, preview, categories, include_summary)
+        # urllib.request arrastra http.client y email (~25 ms); solo se paga al llamar al API.
+        import urllib.error
+        import urllib.request
+
+        prompt = format_prompt(metadata, preview, categories, include_summary, self.preview_tokens)
+        prompt_tokens = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prompt)
+        reserved = prompt_tokens + self.max_tokens
+        self.budget.reserve(reserved)
         payload = {
             "model": self.model,
             "messages": [
-                {
-                    "role": "system",
-                    "content": (
-                        "Eres un asistente experto en gestión documental. "
-                        "Responde siempre en JSON válido."
-                    ),
-                },
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt},
             ],
             "temperature": temperature,
@@ -105,12 +276,19 @@ class OpenAIClient:
             raise ApiError(message or str(err), status=err.code) from err
         except urllib.error.URLError as err:
             raise ApiError(str(err)) from err
+        finally:
+            self.budget.release(reserved)
         payload = json.loads(body)
         choices = payload.get("choices")
         if not choices:
             raise ApiError("Respuesta sin 'choices' desde el API de OpenAI")
         message = choices[0].get("message", {})
         content = message.get("content", "{}").strip()
+        usage = payload.get("usage") or {}
+        self.budget.charge(
+            int(usage.get("prompt_tokens") or prompt_tokens),
+            int(usage.get("completion_tokens") or estimate_tokens(content)),
+        )
         data = json.loads(content)
         category = str(data.get("category") or "").strip()
         summary = str(data.get("summary") or "").strip()
@@ -154,4 +332,17 @@ def call_with_retries(
     raise ApiError("Reintentos agotados")
 
 
-__all__ = ["ApiError", "OpenAIClient", "call_with_retries", "format_prompt"]
+__all__ = [
+    "ApiError",
+    "DEFAULT_PREVIEW_TOKENS",
+    "OpenAIClient",
+    "SYSTEM_PROMPT",
+    "TokenBudget",
+    "TokenBudgetExceeded",
+    "call_with_retries",
+    "compact_preview",
+    "estimate_tokens",
+    "format_prompt",
+    "shared_budget",
+    "prompt_prefix",
+]
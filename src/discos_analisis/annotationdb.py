@@ -0,0 +1,151 @@
+"""Almacén SQLite opcional para anotaciones, compartible entre varios procesos de enriquecimiento."""
+
+from __future__ import annotations
+
+import json
+import pathlib
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .annotations import load_annotations
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS annotations (
+    key TEXT PRIMARY KEY,
+    sha TEXT NOT NULL DEFAULT '',
+    ruta TEXT NOT NULL DEFAULT '',
+    nombre TEXT NOT NULL DEFAULT '',
+    resumen TEXT NOT NULL DEFAULT '',
+    payload TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS annotations_sha ON annotations (sha);
+"""
+
+_UPSERT = """
+INSERT INTO annotations (key, sha, ruta, nombre, resumen, payload) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    sha = excluded.sha,
+    ruta = excluded.ruta,
+    nombre = excluded.nombre,
+    resumen = excluded.resumen,
+    payload = excluded.payload
+"""
+
+# Diferencia de conjuntos: candidatos sin anotación (o sin resumen si se pide).
+_PENDING = """
+SELECT c.pos FROM temp.candidates AS c
+LEFT JOIN annotations AS a ON a.key = c.key
+WHERE a.key IS NULL OR (? AND a.resumen = '')
+ORDER BY c.pos
+"""
+
+# Filas por lote de ``executemany``; acota la memoria en importaciones grandes.
+BATCH_SIZE = 5000
+
+
+def _row(key: str, item: Dict[str, object]) -> Tuple[str, str, str, str, str, str]:
+    summary = str(item.get("resumen") or item.get("summary") or "").strip()
+    return (
+        key,
+        str(item.get("sha") or item.get("hash") or "").strip(),
+        str(item.get("ruta") or ""),
+        str(item.get("nombre") or ""),
+        summary,
+        json.dumps(item, ensure_ascii=False),
+    )
+
+
+class AnnotationStore:
+    """Anotaciones indexadas por ``annotation_key`` en una base SQLite.
+
+    La base usa WAL, así que varios ``discos-enrich`` pueden leer y escribir
+    a la vez; cada escritura es una transacción corta de ``executemany``.
+    Implementa ``get`` como un diccionario para poder sustituir al índice en
+    memoria de ``load_annotations``.
+    """
+
+    def __init__(self, path: pathlib.Path, timeout: float = 30.0) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), timeout=timeout, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "AnnotationStore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return int(self._conn.execute("SELECT COUNT(*) FROM annotations").fetchone()[0])
+
+    def get(self, key: Optional[str], default: Optional[Dict[str, object]] = None) -> Optional[Dict[str, object]]:
+        if not key:
+            return default
+        found = self._conn.execute("SELECT payload FROM annotations WHERE key = ?", (key,)).fetchone()
+        return json.loads(found[0]) if found else default
+
+    def by_sha(self, sha: str) -> List[Dict[str, object]]:
+        rows = self._conn.execute("SELECT payload FROM annotations WHERE sha = ?", (sha.strip(),))
+        return [json.loads(payload) for (payload,) in rows]
+
+    def upsert_many(self, records: Iterable[Tuple[str, Dict[str, object]]]) -> int:
+        """Inserta o reemplaza ``(clave, anotación)`` en lotes de ``executemany``."""
+        total = 0
+        batch: List[Tuple[str, str, str, str, str, str]] = []
+        for key, item in records:
+            batch.append(_row(key, item))
+            if len(batch) >= BATCH_SIZE:
+                total += self._write(batch)
+                batch = []
+        if batch:
+            total += self._write(batch)
+        return total
+
+    def _write(self, batch: List[Tuple[str, str, str, str, str, str]]) -> int:
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(_UPSERT, batch)
+        return len(batch)
+
+    def pending(self, keys: Sequence[Optional[str]], require_summary: bool = False) -> List[int]:
+        """Posiciones de ``keys`` que aún necesitan clasificación.
+
+        Las claves se cargan en una tabla temporal y se resuelven con un
+        único ``LEFT JOIN`` contra la tabla de anotaciones. Las posiciones
+        sin clave se devuelven siempre.
+        """
+        conn = self._conn
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS candidates (pos INTEGER PRIMARY KEY, key TEXT NOT NULL)")
+        conn.execute("DELETE FROM temp.candidates")
+        missing = [pos for pos, key in enumerate(keys) if not key]
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT INTO temp.candidates (pos, key) VALUES (?, ?)",
+                ((pos, key) for pos, key in enumerate(keys) if key),
+            )
+        found = [pos for (pos,) in conn.execute(_PENDING, (1 if require_summary else 0,))]
+        return sorted(found + missing) if missing else found
+
+    def iter_items(self) -> Iterator[Dict[str, object]]:
+        rows = self._conn.execute("SELECT payload FROM annotations ORDER BY sha, ruta, nombre")
+        for (payload,) in rows:
+            yield json.loads(payload)
+
+    def import_json(self, path: pathlib.Path) -> int:
+        """Carga un ``inventory_ai_annotations.json`` existente."""
+        _, index = load_annotations(path)
+        return self.upsert_many(index.items())
+
+    def export_payload(self) -> Dict[str, object]:
+        """Documento equivalente al JSON de anotaciones, ordenado como ``discos-enrich``."""
+        return {"items": list(self.iter_items())}
+
+
+__all__ = ["AnnotationStore", "BATCH_SIZE"]
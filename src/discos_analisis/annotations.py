@@ -4,25 +4,33 @@ from __future__ import annotations
 
 import json
 import pathlib
-from typing import Dict, Optional, Tuple
+from typing import Dict, Optional, Tuple, Union
 
-from .inventory import combine_path
+from .inventory import ResolvedRow, combine_path
 
 
 AnnotationIndex = Dict[str, Dict[str, object]]
 
 
-def annotation_key(item: Dict[str, object]) -> Optional[str]:
-    """Genera una clave estable para identificar una anotación."""
-    sha = str(item.get("sha") or item.get("hash") or "").strip()
+def annotation_key(item: Union[Dict[str, object], ResolvedRow]) -> Optional[str]:
+    """Genera una clave estable para identificar una anotación.
+
+    Con una ``ResolvedRow`` se reutilizan su hash y su ruta ya compuesta;
+    las filas de inventario no llevan ``id`` propio.
+    """
+    if isinstance(item, ResolvedRow):
+        sha, identifier, ruta, nombre, full = item.sha, "", item.directory, item.name, item.full_path
+    else:
+        sha = str(item.get("sha") or item.get("hash") or "").strip()
+        identifier = str(item.get("id") or "").strip()
+        ruta = str(item.get("ruta") or item.get("path") or "").strip()
+        nombre = str(item.get("nombre") or item.get("name") or "").strip()
+        full = ""
     if sha:
         return f"sha:{sha}"
-    identifier = str(item.get("id") or "").strip()
     if identifier:
         return identifier
-    ruta = str(item.get("ruta") or item.get("path") or "").strip()
-    nombre = str(item.get("nombre") or item.get("name") or "").strip()
-    full = combine_path(ruta, nombre)
+    full = full or combine_path(ruta, nombre)
     if full:
         return f"path:{full.lower()}"
     if ruta:
@@ -0,0 +1,311 @@
+"""Detección de cambios en unidades comparando con una instantánea del árbol de carpetas."""
+
+from __future__ import annotations
+
+import csv
+import datetime as dt
+import gzip
+import json
+import os
+import pathlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .hashindex import MediaRecord, normalize_index_path
+from .walker import ParallelWalker
+
+SNAPSHOT_VERSION = 1
+CHANGE_FIELDS = ["Change", "Path", "OldPath", "Hash", "Bytes", "LastWrite"]
+
+# Estado de un archivo: [tamaño, mtime_ns, sha, inode/ID de archivo].
+FileState = List[object]
+
+
+@dataclass
+class DirState:
+    """Estado de una carpeta en la instantánea."""
+
+    mtime_ns: int
+    subdirs: List[str] = field(default_factory=list)
+    files: Dict[str, FileState] = field(default_factory=dict)
+
+    def to_json(self) -> Dict[str, object]:
+        return {"m": self.mtime_ns, "d": self.subdirs, "f": self.files}
+
+    @classmethod
+    def from_json(cls, payload: Dict[str, object]) -> "DirState":
+        return cls(int(payload.get("m") or 0), list(payload.get("d") or []), dict(payload.get("f") or {}))
+
+
+@dataclass
+class Change:
+    """Registro del log de cambios."""
+
+    kind: str
+    path: str
+    size: int
+    mtime_ns: int
+    sha: str = ""
+    old_path: str = ""
+
+    def to_row(self) -> List[object]:
+        stamp = dt.datetime.fromtimestamp(self.mtime_ns / 1e9).strftime("%Y-%m-%d %H:%M:%S") if self.mtime_ns else ""
+        return [self.kind, self.path, self.old_path, self.sha, self.size, stamp]
+
+
+class TreeSnapshot:
+    """Carpetas de una raíz con su mtime, subcarpetas y archivos."""
+
+    def __init__(self, root: str, dirs: Optional[Dict[str, DirState]] = None, created: str = "") -> None:
+        self.root = root
+        self.dirs: Dict[str, DirState] = dirs or {}
+        self.created = created or dt.datetime.now().isoformat(timespec="seconds")
+
+    def save(self, path: pathlib.Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        payload = {
+            "version": SNAPSHOT_VERSION,
+            "root": self.root,
+            "created": self.created,
+            "dirs": {name: state.to_json() for name, state in self.dirs.items()},
+        }
+        with gzip.open(tmp, "wt", encoding="utf-8") as handle:
+            json.dump(payload, handle, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "TreeSnapshot":
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            payload = json.load(handle)
+        if payload.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Versión de instantánea no soportada en {path}")
+        dirs = {name: DirState.from_json(state) for name, state in (payload.get("dirs") or {}).items()}
+        return cls(payload.get("root") or "", dirs, payload.get("created") or "")
+
+    def iter_files(self) -> Iterator[Tuple[str, FileState]]:
+        for directory, state in self.dirs.items():
+            for name, info in state.files.items():
+                yield os.path.join(directory, name), info
+
+    def seed_hashes(self, entries: Iterable[MediaRecord]) -> int:
+        """Rellena hashes desconocidos desde un índice (p. ej. index_by_hash.csv)."""
+        known = {normalize_index_path(entry.path): entry for entry in entries if entry.sha}
+        filled = 0
+        for path, info in self.iter_files():
+            if info[2]:
+                continue
+            entry = known.get(normalize_index_path(path))
+            if entry is not None and entry.size == info[0]:
+                info[2] = entry.sha
+                filled += 1
+        return filled
+
+
+def _file_state(stat: os.stat_result, sha: str = "") -> FileState:
+    return [stat.st_size, stat.st_mtime_ns, sha, stat.st_ino]
+
+
+def _read_dir(walker: ParallelWalker, directory: str) -> Tuple[List[str], Dict[str, os.stat_result]]:
+    """Subcarpetas y archivos de ``directory``; lanza ``OSError`` si no se puede listar."""
+    subdirs, files = walker.scan(directory, strict=True)
+    return (
+        sorted(os.path.basename(path) for path in subdirs),
+        {os.path.basename(path): stat for path, stat in files},
+    )
+
+
+def build_snapshot(root: str, walker: Optional[ParallelWalker] = None) -> TreeSnapshot:
+    """Recorre ``root`` completo y crea la instantánea de referencia."""
+    walker = walker or ParallelWalker(workers=1)
+    snapshot = TreeSnapshot(root)
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+            subdirs, files = _read_dir(walker, directory)
+        except OSError:
+            continue
+        states = {name: _file_state(stat) for name, stat in files.items()}
+        snapshot.dirs[directory] = DirState(mtime_ns, subdirs, states)
+        stack.extend(os.path.join(directory, name) for name in subdirs)
+    return snapshot
+
+
+@dataclass
+class DiffStats:
+    directories: int = 0
+    rescanned: int = 0
+    hashed: int = 0
+    unreadable: int = 0
+
+
+def diff_tree(
+    previous: TreeSnapshot,
+    walker: Optional[ParallelWalker] = None,
+    check_files: bool = False,
+    hasher: Optional[Callable[[str], str]] = None,
+    hash_new: bool = False,
+    stats: Optional[DiffStats] = None,
+) -> Tuple[List[Change], TreeSnapshot]:
+    """Compara la unidad con ``previous`` y devuelve (cambios, nueva instantánea).
+
+    Solo se relistan las carpetas cuyo mtime cambió; del resto se reutiliza
+    la lista de la instantánea y únicamente se consulta el mtime de sus
+    subcarpetas, porque un cambio en una carpeta no altera el mtime de su
+    padre. Editar un archivo sin crear ni borrar entradas no cambia el
+    mtime de su carpeta: ``check_files`` vuelve a consultar esos archivos.
+    Una carpeta que cambió pero no se puede listar (p. ej. bloqueada por un
+    momento) conserva su estado anterior sin notificar nada, y su mtime
+    viejo hace que se vuelva a listar en la siguiente comparación.
+
+    Un archivo borrado y otro añadido con el mismo hash (o, donde ``scandir``
+    da el inode, con el mismo inode, tamaño y mtime) se notifican como un
+    único ``moved``. En Windows el ``stat`` de ``scandir`` trae ``st_ino``
+    a 0, así que allí solo empareja el hash. Para poder compararlos se
+    hashean los añadidos cuyo tamaño coincide con algún borrado; con
+    ``hash_new`` se hashean todos los añadidos y modificados.
+    """
+    walker = walker or ParallelWalker(workers=1)
+    stats = stats or DiffStats()
+    current = TreeSnapshot(previous.root)
+    added: List[Tuple[str, FileState]] = []
+    removed: List[Tuple[str, FileState]] = []
+    changes: List[Change] = []
+
+    stack = [previous.root]
+    while stack:
+        directory = stack.pop()
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            continue
+        stats.directories += 1
+        old = previous.dirs.get(directory)
+        if old is not None and old.mtime_ns == mtime_ns:
+            state = DirState(mtime_ns, list(old.subdirs), {name: list(info) for name, info in old.files.items()})
+            if check_files:
+                for name, info in list(state.files.items()):
+                    path = os.path.join(directory, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        removed.append((path, info))
+                        del state.files[name]
+                        continue
+                    if stat.st_size != info[0] or stat.st_mtime_ns != info[1]:
+                        state.files[name] = _file_state(stat)
+                        changes.append(Change("modified", path, stat.st_size, stat.st_mtime_ns))
+        else:
+            try:
+                subdirs, files = _read_dir(walker, directory)
+            except OSError:
+                stats.unreadable += 1
+                if old is not None:
+                    current.dirs[directory] = DirState(
+                        old.mtime_ns, list(old.subdirs), {name: list(info) for name, info in old.files.items()}
+                    )
+                    stack.extend(os.path.join(directory, name) for name in old.subdirs)
+                continue
+            stats.rescanned += 1
+            state = DirState(mtime_ns, subdirs)
+            before = old.files if old is not None else {}
+            for name, stat in files.items():
+                path = os.path.join(directory, name)
+                info = before.get(name)
+                if info is None:
+                    state.files[name] = _file_state(stat)
+                    added.append((path, state.files[name]))
+                elif stat.st_size != info[0] or stat.st_mtime_ns != info[1]:
+                    state.files[name] = _file_state(stat)
+                    changes.append(Change("modified", path, stat.st_size, stat.st_mtime_ns))
+                else:
+                    state.files[name] = list(info)
+            for name, info in before.items():
+                if name not in files:
+                    removed.append((os.path.join(directory, name), info))
+            if old is not None:
+                # Subcarpetas que desaparecieron: todo su contenido se da por borrado.
+                gone = [os.path.join(directory, name) for name in old.subdirs if name not in subdirs]
+                while gone:
+                    missing = gone.pop()
+                    lost = previous.dirs.get(missing)
+                    if lost is None:
+                        continue
+                    removed.extend((os.path.join(missing, name), info) for name, info in lost.files.items())
+                    gone.extend(os.path.join(missing, name) for name in lost.subdirs)
+        current.dirs[directory] = state
+        stack.extend(os.path.join(directory, name) for name in state.subdirs)
+
+    def hash_of(path: str, info: FileState) -> str:
+        if not info[2] and hasher is not None:
+            try:
+                info[2] = hasher(path)
+                stats.hashed += 1
+            except OSError:
+                pass
+        return str(info[2] or "")
+
+    removed_sizes = {info[0] for _, info in removed}
+    by_hash: Dict[str, List[Tuple[str, FileState]]] = defaultdict(list)
+    # Un renombrado conserva inode, tamaño y mtime; exigir los tres evita
+    # confundirlo con un archivo nuevo que reutiliza un inode liberado. Sin
+    # inode (0, en Windows) no se indexa y el emparejamiento va por hash.
+    by_inode: Dict[Tuple[int, int, int], List[Tuple[str, FileState]]] = defaultdict(list)
+    for path, info in removed:
+        if info[2]:
+            by_hash[str(info[2])].append((path, info))
+        if info[3]:
+            by_inode[(int(info[3]), int(info[0]), int(info[1]))].append((path, info))
+    matched = set()
+    for path, info in added:
+        source = None
+        candidates = by_inode.get((int(info[3]), int(info[0]), int(info[1]))) if info[3] else None
+        if candidates:
+            source = candidates.pop()
+            if source[1][2]:
+                info[2] = source[1][2]
+        elif hash_new or info[0] in removed_sizes:
+            sha = hash_of(path, info)
+            if sha and by_hash.get(sha):
+                source = by_hash[sha].pop()
+        if source is not None and id(source[1]) not in matched:
+            matched.add(id(source[1]))
+            changes.append(Change("moved", path, int(info[0]), int(info[1]), str(info[2] or ""), source[0]))
+        else:
+            changes.append(Change("added", path, int(info[0]), int(info[1]), str(info[2] or "")))
+    for path, info in removed:
+        if id(info) not in matched:
+            changes.append(Change("removed", path, int(info[0]), int(info[1]), str(info[2] or "")))
+    if hash_new:
+        for change in changes:
+            if change.kind == "modified":
+                directory, name = os.path.split(change.path)
+                change.sha = hash_of(change.path, current.dirs[directory].files[name])
+    changes.sort(key=lambda change: (change.path.lower(), change.kind))
+    return changes, current
+
+
+def write_changes(changes: Iterable[Change], target: pathlib.Path) -> int:
+    count = 0
+    with target.open("w", encoding="utf-8-sig", newline="") as handle:
+        writer = csv.writer(handle, quoting=csv.QUOTE_ALL)
+        writer.writerow(CHANGE_FIELDS)
+        for change in changes:
+            writer.writerow(change.to_row())
+            count += 1
+    return count
+
+
+__all__ = [
+    "CHANGE_FIELDS",
+    "Change",
+    "DiffStats",
+    "DirState",
+    "TreeSnapshot",
+    "build_snapshot",
+    "diff_tree",
+    "write_changes",
+]
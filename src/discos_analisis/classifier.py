@@ -0,0 +1,323 @@
+"""Clasificadores intercambiables: modelo remoto, modelo local TF-IDF y cascada entre ambos.
+
+El modelo local es una regresión logística multinomial sobre TF-IDF de
+nombre, carpetas, extensión y avance del archivo, entrenada con las
+etiquetas que ya existen en ``inventory_ai_annotations.json``. Solo usa la
+biblioteca estándar: los pesos se guardan por término (un vector por
+categoría), así que puntuar una fila cuesta ``términos × categorías``
+sumas y un lote de miles de filas se resuelve en milisegundos.
+"""
+
+from __future__ import annotations
+
+import abc
+import gzip
+import json
+import math
+import pathlib
+import random
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .ai import OpenAIClient, call_with_retries
+from .constants import RULE_MODEL_PREFIX
+from .textindex import tokenize
+
+MODEL_VERSION = 1
+LOCAL_MODEL_NAME = "local:tfidf"
+# Solo el comienzo del avance aporta señal; acota el coste por fila.
+PREVIEW_CHARS = 2000
+MAX_PREVIEW_TERMS = 200
+DEFAULT_EPOCHS = 8
+DEFAULT_LEARNING_RATE = 0.5
+
+# (metadatos, avance) tal como los prepara ``discos-enrich``.
+Request = Tuple[Dict[str, str], str]
+
+
+@dataclass(slots=True)
+class Prediction:
+    """Resultado de clasificar una fila."""
+
+    category: str
+    summary: str = ""
+    confidence: float = 1.0
+    model: str = ""
+
+
+class Classifier(abc.ABC):
+    """Interfaz común: clasifica lotes de ``(metadatos, avance)``."""
+
+    name = ""
+
+    @abc.abstractmethod
+    def classify_batch(self, requests: Sequence[Request]) -> List[Prediction]:
+        """Una predicción por petición, en el mismo orden."""
+
+    def summary(self) -> str:
+        """Resumen de uso para el informe final (vacío si no hay nada que contar)."""
+        return ""
+
+
+class RemoteClassifier(Classifier):
+    """Modelo de chat remoto, una llamada por fila con reintentos."""
+
+    def __init__(
+        self,
+        client: OpenAIClient,
+        categories: List[str],
+        include_summary: bool,
+        retries: int,
+        retry_wait: float,
+        verbose: bool,
+        delay: float,
+    ) -> None:
+        self.client = client
+        self.categories = categories
+        self.include_summary = include_summary
+        self.retries = retries
+        self.retry_wait = retry_wait
+        self.verbose = verbose
+        self.delay = delay
+        self.name = client.model
+
+    def classify_batch(self, requests: Sequence[Request]) -> List[Prediction]:
+        predictions = []
+        for metadata, preview in requests:
+            result = call_with_retries(
+                self.client,
+                metadata,
+                preview,
+                self.categories,
+                self.include_summary,
+                self.retries,
+                self.retry_wait,
+                self.verbose,
+                self.delay,
+            )
+            predictions.append(Prediction(result.get("category", ""), result.get("summary", ""), 1.0, self.name))
+        return predictions
+
+
+def extract_terms(metadata: Dict[str, str], preview: str) -> Counter:
+    """Términos con prefijo de origen: ``e:`` extensión, ``n:`` nombre, ``d:`` carpetas, ``p:`` avance."""
+    terms: Counter = Counter()
+    extension = (metadata.get("extension") or "").lower()
+    if extension:
+        terms["e:" + extension] += 1
+    name = metadata.get("nombre") or ""
+    stem = name.rsplit(".", 1)[0] if "." in name else name
+    for token in tokenize(stem):
+        terms["n:" + token] += 1
+    ruta = metadata.get("ruta") or ""
+    for token in tokenize(ruta[2:] if ruta[1:2] == ":" else ruta):
+        terms["d:" + token] += 1
+    if preview:
+        for token in tokenize(preview[:PREVIEW_CHARS])[:MAX_PREVIEW_TERMS]:
+            terms["p:" + token] += 1
+    return terms
+
+
+def _softmax(scores: List[float]) -> List[float]:
+    top = max(scores)
+    exps = [math.exp(value - top) for value in scores]
+    total = sum(exps)
+    return [value / total for value in exps]
+
+
+class LocalClassifier(Classifier):
+    """Regresión logística multinomial sobre TF-IDF, sin dependencias externas."""
+
+    name = LOCAL_MODEL_NAME
+
+    def __init__(
+        self,
+        categories: List[str],
+        idf: Dict[str, float],
+        weights: Dict[str, List[float]],
+        bias: List[float],
+    ) -> None:
+        self.categories = categories
+        self.idf = idf
+        self.weights = weights
+        self.bias = bias
+
+    def vectorize(self, metadata: Dict[str, str], preview: str) -> List[Tuple[str, float]]:
+        """TF-IDF normalizado (L2) con los términos del vocabulario de entrenamiento."""
+        return self.vectorize_terms(extract_terms(metadata, preview))
+
+    def vectorize_terms(self, terms: Counter) -> List[Tuple[str, float]]:
+        idf = self.idf
+        vector = [(term, (1.0 + math.log(count)) * idf[term]) for term, count in terms.items() if term in idf]
+        norm = math.sqrt(sum(value * value for _, value in vector)) or 1.0
+        return [(term, value / norm) for term, value in vector]
+
+    def _scores(self, vector: List[Tuple[str, float]]) -> List[float]:
+        scores = list(self.bias)
+        indices = range(len(scores))
+        weights = self.weights
+        for term, value in vector:
+            row = weights.get(term)
+            if row is not None:
+                for index in indices:
+                    scores[index] += row[index] * value
+        return scores
+
+    def classify_batch(self, requests: Sequence[Request]) -> List[Prediction]:
+        predictions = []
+        for metadata, preview in requests:
+            probs = _softmax(self._scores(self.vectorize(metadata, preview)))
+            best = max(range(len(probs)), key=probs.__getitem__)
+            predictions.append(Prediction(self.categories[best], "", probs[best], self.name))
+        return predictions
+
+    @classmethod
+    def train(
+        cls,
+        samples: Iterable[Tuple[Dict[str, str], str, str]],
+        categories: Sequence[str],
+        epochs: int = DEFAULT_EPOCHS,
+        learning_rate: float = DEFAULT_LEARNING_RATE,
+        seed: int = 0,
+    ) -> "LocalClassifier":
+        """Entrena con ``(metadatos, avance, categoría)`` por descenso de gradiente estocástico."""
+        labels = list(categories)
+        position = {category: index for index, category in enumerate(labels)}
+        documents: List[Tuple[Counter, int]] = []
+        for metadata, preview, label in samples:
+            if label in position:
+                documents.append((extract_terms(metadata, preview), position[label]))
+        if not documents:
+            raise ValueError("No hay anotaciones con categorías conocidas para entrenar")
+        frequency: Counter = Counter()
+        for terms, _ in documents:
+            frequency.update(terms.keys())
+        total = len(documents)
+        idf = {term: math.log((1 + total) / (1 + count)) + 1.0 for term, count in frequency.items()}
+        model = cls(labels, idf, {}, [0.0] * len(labels))
+        vectors = [(model.vectorize_terms(terms), label) for terms, label in documents]
+        indices = range(len(labels))
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(vectors)
+            rate = learning_rate / (1.0 + epoch)
+            for vector, label in vectors:
+                gradient = _softmax(model._scores(vector))
+                gradient[label] -= 1.0
+                for term, value in vector:
+                    row = model.weights.get(term)
+                    if row is None:
+                        row = model.weights[term] = [0.0] * len(labels)
+                    step = rate * value
+                    for index in indices:
+                        row[index] -= step * gradient[index]
+                for index in indices:
+                    model.bias[index] -= rate * gradient[index]
+        return model
+
+    def save(self, path: pathlib.Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "version": MODEL_VERSION,
+            "categories": self.categories,
+            "idf": self.idf,
+            "weights": {term: [round(value, 6) for value in row] for term, row in self.weights.items()},
+            "bias": self.bias,
+        }
+        tmp = path.with_name(path.name + ".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as handle:
+            json.dump(payload, handle, ensure_ascii=False, separators=(",", ":"))
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "LocalClassifier":
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            payload = json.load(handle)
+        if payload.get("version") != MODEL_VERSION:
+            raise ValueError(f"Versión de modelo local no soportada en {path}")
+        return cls(payload["categories"], payload["idf"], payload["weights"], payload["bias"])
+
+
+class CascadeClassifier(Classifier):
+    """Clasifica en local y escala al modelo remoto las filas con poca confianza.
+
+    Si se pide resumen, todo va al remoto: el modelo local no resume.
+    """
+
+    def __init__(
+        self,
+        local: LocalClassifier,
+        remote: Optional[Classifier],
+        threshold: float,
+        need_summary: bool = False,
+    ) -> None:
+        self.local = local
+        self.remote = remote
+        self.threshold = threshold
+        self.need_summary = need_summary
+        self.stats: Counter = Counter()
+        self.name = f"{local.name}+{remote.name if remote else '-'}"
+
+    def classify_batch(self, requests: Sequence[Request]) -> List[Prediction]:
+        predictions = self.local.classify_batch(requests)
+        escalate = [
+            index
+            for index, prediction in enumerate(predictions)
+            if self.need_summary or prediction.confidence < self.threshold
+        ]
+        self.stats["local"] += len(predictions) - len(escalate)
+        if escalate and self.remote is not None:
+            for index, prediction in zip(escalate, self.remote.classify_batch([requests[i] for i in escalate])):
+                predictions[index] = prediction
+            self.stats["remote"] += len(escalate)
+        else:
+            self.stats["local"] += len(escalate)
+        return predictions
+
+    def summary(self) -> str:
+        total = self.stats["local"] + self.stats["remote"]
+        if not total:
+            return ""
+        return (
+            f"Cascada: {self.stats['local']} de {total} filas resueltas en local, "
+            f"{self.stats['remote']} escaladas a {self.remote.name if self.remote else 'ningún modelo remoto'}"
+        )
+
+
+def training_samples(
+    items: Iterable[Dict[str, object]],
+    preview_for: Optional[Callable[[Dict[str, object]], str]] = None,
+) -> Iterator[Tuple[Dict[str, str], str, str]]:
+    """Ejemplos de entrenamiento desde anotaciones (``ruta``, ``nombre``, ``categoria``).
+
+    Solo se aprende de etiquetas del modelo remoto o puestas a mano: las de
+    una regla o del propio modelo local lo realimentarían con sus aciertos y
+    sus errores.
+    """
+    for item in items:
+        model = str(item.get("model") or "")
+        if model.startswith(RULE_MODEL_PREFIX) or model == LOCAL_MODEL_NAME:
+            continue
+        label = str(item.get("categoria") or "").strip().lower()
+        name = str(item.get("nombre") or "")
+        if not label or not name:
+            continue
+        metadata = {
+            "nombre": name,
+            "ruta": str(item.get("ruta") or ""),
+            "extension": "." + name.rsplit(".", 1)[-1].lower() if "." in name else "",
+        }
+        yield metadata, preview_for(item) if preview_for else "", label
+
+
+__all__ = [
+    "CascadeClassifier",
+    "Classifier",
+    "LOCAL_MODEL_NAME",
+    "LocalClassifier",
+    "Prediction",
+    "RemoteClassifier",
+    "extract_terms",
+    "training_samples",
+]
@@ -1,5 +1,19 @@
 """Comandos de línea de órdenes para discos_analisis."""
 
-from .enrich import main  # noqa: F401
+from __future__ import annotations
+
+import importlib
+
+
+def __getattr__(name: str) -> object:
+    """``main`` de ``discos-enrich`` bajo demanda: importar un comando no carga los demás (PEP 562)."""
+    if name == "main":
+        return importlib.import_module(".enrich", __name__).main
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
+
 
 __all__ = ["main"]
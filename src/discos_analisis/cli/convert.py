@@ -0,0 +1,48 @@
+"""CLI para convertir inventarios entre formatos sin cargarlos en memoria."""
+
+from __future__ import annotations
+
+import argparse
+import pathlib
+import sys
+import time
+from typing import Sequence
+
+from ..records import FORMATS, convert
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    """Parsea los argumentos de línea de comandos de la conversión."""
+    parser = argparse.ArgumentParser(
+        description=(
+            "Convierte entre index_by_hash.csv, inventory_by_folder.csv, listado_archivos.csv, "
+            "data/inventory.json y el inventory.json.gz del GUI, fila a fila."
+        )
+    )
+    parser.add_argument("source", help="Inventario de origen.")
+    parser.add_argument("target", help="Archivo de destino.")
+    parser.add_argument("--from", dest="source_format", choices=FORMATS, help="Formato de origen (autodetectado).")
+    parser.add_argument("--to", dest="target_format", choices=FORMATS, help="Formato de destino (por extensión).")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Punto de entrada del comando `convert`."""
+    args = parse_args(argv)
+    source = pathlib.Path(args.source)
+    if not source.exists():
+        raise SystemExit(f"No se encontró el inventario: {source}")
+    started = time.perf_counter()
+    try:
+        count = convert(source, pathlib.Path(args.target), args.source_format, args.target_format)
+    except ValueError as exc:
+        raise SystemExit(f"No se pudo convertir {source}: {exc}") from exc
+    print(f"{count} registros escritos en {args.target} ({time.perf_counter() - started:.1f}s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(130)
@@ -0,0 +1,116 @@
+"""CLI para detectar cambios en las unidades respecto a la última instantánea."""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import pathlib
+import sys
+import time
+from collections import Counter
+from typing import List, Sequence
+
+from ..changes import Change, DiffStats, TreeSnapshot, build_snapshot, diff_tree, write_changes
+from ..hashindex import iter_index
+from ..hashing import hash_file
+from ..walker import ParallelWalker
+
+DEFAULT_SNAPSHOT_DIR = "data/snapshots"
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    """Parsea los argumentos de línea de comandos de la detección de cambios."""
+    parser = argparse.ArgumentParser(
+        description=(
+            "Compara unidades con su instantánea anterior relistando solo las carpetas "
+            "cuyo mtime cambió y genera un log de añadidos/borrados/modificados/movidos."
+        )
+    )
+    parser.add_argument("drives", nargs="*", default=["H", "I", "J"], help="Unidades a comparar (por defecto H I J).")
+    parser.add_argument("--snapshot-dir", default=DEFAULT_SNAPSHOT_DIR, help="Carpeta de instantáneas.")
+    parser.add_argument(
+        "--index",
+        default="index_by_hash.csv",
+        help="Índice del que tomar hashes al crear una instantánea nueva (si existe).",
+    )
+    parser.add_argument("--output", help="CSV de cambios (por defecto <snapshot-dir>/changes_<fecha>.csv).")
+    parser.add_argument(
+        "--check-files",
+        action="store_true",
+        help="Comprueba también los archivos de carpetas sin cambios (ediciones en el sitio).",
+    )
+    parser.add_argument("--hash-new", action="store_true", help="Hashea todos los archivos añadidos y modificados.")
+    parser.add_argument("--dry-run", action="store_true", help="No actualiza las instantáneas.")
+    parser.add_argument("--exclude", nargs="*", default=[], help="Patrones glob a ignorar.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Punto de entrada del comando `diff`."""
+    args = parse_args(argv)
+    snapshot_dir = pathlib.Path(args.snapshot_dir)
+    walker = ParallelWalker(
+        workers=1,
+        exclude=args.exclude,
+        on_error=lambda path, exc: print(f"[WARN] No se pudo acceder a {path}: {exc}", file=sys.stderr),
+    )
+    index_path = pathlib.Path(args.index)
+    all_changes: List[Change] = []
+    for drive in args.drives:
+        letter = drive.rstrip(":\\").upper()
+        root = f"{letter}:\\"
+        if not pathlib.Path(root).exists():
+            print(f"[WARN] Unidad {root} no encontrada, se omite", file=sys.stderr)
+            continue
+        snapshot_path = snapshot_dir / f"tree_{letter}.json.gz"
+        started = time.perf_counter()
+        if not snapshot_path.exists():
+            snapshot = build_snapshot(root, walker)
+            seeded = snapshot.seed_hashes(iter_index(index_path)) if index_path.exists() else 0
+            if not args.dry_run:
+                snapshot.save(snapshot_path)
+            print(
+                f"[{letter}] Instantánea inicial: {len(snapshot.dirs)} carpetas, {seeded} hashes del índice "
+                f"({time.perf_counter() - started:.1f}s)",
+                file=sys.stderr,
+            )
+            continue
+        stats = DiffStats()
+        changes, current = diff_tree(
+            TreeSnapshot.load(snapshot_path),
+            walker,
+            check_files=args.check_files,
+            hasher=hash_file,
+            hash_new=args.hash_new,
+            stats=stats,
+        )
+        if not args.dry_run:
+            current.save(snapshot_path)
+        kinds = Counter(change.kind for change in changes)
+        summary = ", ".join(f"{kind}={count}" for kind, count in sorted(kinds.items())) or "sin cambios"
+        print(
+            f"[{letter}] {summary}; {stats.rescanned}/{stats.directories} carpetas relistadas, "
+            f"{stats.hashed} hasheados ({time.perf_counter() - started:.1f}s)",
+            file=sys.stderr,
+        )
+        if stats.unreadable:
+            print(
+                f"[{letter}] {stats.unreadable} carpetas no se pudieron listar; se conserva su estado anterior",
+                file=sys.stderr,
+            )
+        all_changes.extend(changes)
+
+    if all_changes:
+        stamp = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = pathlib.Path(args.output) if args.output else snapshot_dir / f"changes_{stamp}.csv"
+        output.parent.mkdir(parents=True, exist_ok=True)
+        write_changes(all_changes, output)
+        print(f"{len(all_changes)} cambios en {output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(130)
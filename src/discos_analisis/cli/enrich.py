@@ -6,12 +6,14 @@ import argparse
 import datetime as dt
 import os
 import pathlib
+import re
 import sys
 import time
-from typing import Dict, Iterable, Sequence
+from collections import ChainMap
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Mapping, Sequence, Tuple
 
 from .. import constants
-from ..ai import OpenAIClient, call_with_retries
 from ..annotations import (
     AnnotationIndex,
     annotation_key,
@@ -20,13 +22,24 @@ from ..annotations import (
     save_annotations,
 )
 from ..inventory import (
+    ResolvedRow,
     build_full_path,
-    detect_extension,
     load_inventory,
     normalize_extensions,
     read_text_preview,
+    resolve_row,
     truncate_text,
 )
+from ..leases import DEFAULT_TTL, Heartbeat, Lease, LeaseLost, LeaseManager, merge_shards, shard_of
+from ..progress import Progress
+from ..rules import RuleEngine, load_rules
+
+if TYPE_CHECKING:
+    # Cliente HTTP, clasificadores y SQLite se importan al usarse: ``--help``,
+    # ``--merge`` o un dry-run no pagan su carga.
+    from ..ai import OpenAIClient, TokenBudget
+    from ..annotationdb import AnnotationStore
+    from ..classifier import Classifier, Prediction
 
 
 def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
@@ -51,6 +64,14 @@ def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
             " el inventario."
         ),
     )
+    parser.add_argument(
+        "--store",
+        default=None,
+        help=(
+            "Base SQLite de anotaciones compartible entre procesos. Si se indica, "
+            "el JSON solo se escribe cuando se pasa --output explícitamente."
+        ),
+    )
     parser.add_argument(
         "--model",
         default=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
@@ -96,14 +117,18 @@ def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
         default=None,
         help=(
             "Extensiones legibles separadas por coma (incluye el punto). Si se "
-            "proporciona, reemplaza al conjunto por defecto."
+            "proporciona, reemplaza al conjunto por defecto. Los archivos que "
+            "cumplen una regla se clasifican aunque su extensión no esté."
         ),
     )
     parser.add_argument(
         "--limit",
         type=int,
         default=None,
-        help="Límite de nuevos archivos a procesar en esta ejecución.",
+        help=(
+            "Límite de nuevos archivos a procesar en esta ejecución. Con --shards "
+            "cuenta el total de todos los tramos; con --workers, el de cada proceso."
+        ),
     )
     parser.add_argument(
         "--force",
@@ -134,16 +159,131 @@ def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
         default=320,
         help="Límite aproximado de tokens de salida para el modelo.",
     )
+    parser.add_argument(
+        "--preview-tokens",
+        type=int,
+        default=constants.DEFAULT_PREVIEW_TOKENS,
+        help=(
+            "Tokens estimados máximos del avance enviado al modelo; se eliminan "
+            "líneas repetidas y espacios y se conservan los encabezados."
+        ),
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=0,
+        help=(
+            "Tokens totales (entrada y salida) permitidos en la ejecución; 0 sin límite. "
+            "Con --workers lo comparten todos los procesos."
+        ),
+    )
+    parser.add_argument(
+        "--readers",
+        type=int,
+        default=4,
+        help="Hilos que comprueban y leen archivos en paralelo.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Llamadas simultáneas al clasificador (lotes en paralelo con el modelo local).",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=constants.DEFAULT_QUEUE_SIZE,
+        help="Capacidad de cada cola entre etapas; acota la memoria y frena a las etapas rápidas.",
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
         help="No escribe archivo ni llama al API; solo muestra qué se procesaría.",
     )
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        help="Muestra una línea de estado con ritmo y ETA en lugar de una línea por archivo.",
+    )
+    parser.add_argument(
+        "--status-file",
+        default=None,
+        help="Archivo JSON con el progreso, actualizado cada segundo para otros procesos.",
+    )
     parser.add_argument(
         "--verbose",
         action="store_true",
         help="Muestra información adicional durante el procesamiento.",
     )
+    parser.add_argument(
+        "--classifier",
+        choices=("remote", "local", "cascade"),
+        default="remote",
+        help=(
+            "remote: siempre el modelo remoto; local: solo el modelo TF-IDF local; "
+            "cascade: local y escala al remoto lo que no supere --min-confidence."
+        ),
+    )
+    parser.add_argument(
+        "--local-model",
+        default=None,
+        help="Modelo local entrenado (por defecto local_classifier.json.gz junto a la salida).",
+    )
+    parser.add_argument(
+        "--min-confidence",
+        type=float,
+        default=0.8,
+        help="Probabilidad mínima del modelo local para no escalar la fila (modo cascade).",
+    )
+    parser.add_argument(
+        "--train-local",
+        action="store_true",
+        help="Entrena el modelo local con las anotaciones existentes y termina.",
+    )
+    parser.add_argument(
+        "--rules",
+        default=None,
+        help=(
+            "Archivo JSON con reglas de preclasificación (extensiones, globs, regex) "
+            "que se evalúan antes que las predefinidas."
+        ),
+    )
+    parser.add_argument(
+        "--no-rules",
+        action="store_true",
+        help="Desactiva las reglas predefinidas (las de --rules se siguen aplicando).",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=0,
+        help=(
+            "Reparte el inventario en N tramos por hash reclamados con archivos de "
+            "concesión; cada tramo genera su propio archivo de anotaciones."
+        ),
+    )
+    parser.add_argument(
+        "--lease-dir",
+        default=None,
+        help="Carpeta compartida de concesiones y tramos (por defecto <salida>.shards).",
+    )
+    parser.add_argument(
+        "--lease-ttl",
+        type=float,
+        default=DEFAULT_TTL,
+        help="Segundos sin renovar tras los que otra ejecución puede recuperar un tramo.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Procesos locales que reclaman tramos a la vez (con --shards).",
+    )
+    parser.add_argument(
+        "--merge",
+        action="store_true",
+        help="Une los tramos terminados en el archivo de anotaciones y termina.",
+    )
     return parser.parse_args(argv)
 
 
@@ -160,16 +300,24 @@ def _load_extensions(raw: str | None) -> set[str]:
     return {token.lower() for token in normalized}
 
 
-def _ensure_client(args: argparse.Namespace, api_key: str | None) -> OpenAIClient | None:
+def _ensure_client(args: argparse.Namespace, api_key: str | None, budget: TokenBudget) -> OpenAIClient | None:
     if args.dry_run:
         return None
     assert api_key is not None  # se valida antes de llamar
-    return OpenAIClient(api_key, args.model, args.api_base, args.max_tokens)
+    from ..ai import OpenAIClient
+
+    return OpenAIClient(api_key, args.model, args.api_base, args.max_tokens, args.preview_tokens, budget)
+
+
+# Anotaciones acumuladas antes de cada escritura en la base SQLite.
+STORE_FLUSH = 25
+# Filas puntuadas a la vez por el modelo local.
+LOCAL_BATCH = 256
 
 
 def _should_skip_existing(
     key: str | None,
-    annotations: AnnotationIndex,
+    annotations: Mapping[str, Dict[str, object]] | AnnotationStore,
     force: bool,
     require_summary: bool,
     verbose: bool,
@@ -192,141 +340,544 @@ def _should_skip_existing(
     return True
 
 
-def _record_metadata(row: Dict[str, object]) -> Dict[str, str]:
+def _record_metadata(view: ResolvedRow) -> Dict[str, str]:
+    row = view.row
     return {
-        "nombre": str(row.get("nombre") or row.get("name") or ""),
-        "ruta": str(row.get("ruta") or row.get("dir") or row.get("path") or ""),
-        "extension": str(row.get("extension") or row.get("ext") or ""),
+        "nombre": view.name,
+        "ruta": view.directory,
+        "extension": view.extension,
         "tamano": str(row.get("tamano") or row.get("size") or row.get("length") or ""),
     }
 
 
-def main(argv: Sequence[str] | None = None) -> int:
-    """Punto de entrada del comando `enrich`."""
-    args = parse_args(argv)
+def _report(
+    updated: int,
+    skipped: int,
+    start_time: float,
+    rules: RuleEngine | None = None,
+    budget: TokenBudget | None = None,
+    classifier: Classifier | None = None,
+) -> None:
+    elapsed = time.time() - start_time
+    print(
+        f"Listo. Actualizados {updated} registros, omitidos {skipped}. "
+        f"Duración: {elapsed:.1f}s",
+        file=sys.stderr,
+    )
+    if rules is not None and rules.saved:
+        print(rules.summary(), file=sys.stderr)
+    if budget is not None and budget.calls:
+        print(budget.summary(), file=sys.stderr)
+    usage = classifier.summary() if classifier is not None else ""
+    if usage:
+        print(usage, file=sys.stderr)
+
+
+def _output_path(args: argparse.Namespace) -> pathlib.Path:
+    if args.output:
+        return pathlib.Path(args.output)
+    return pathlib.Path(args.inventory).parent / "inventory_ai_annotations.json"
+
+
+def _lease_dir(args: argparse.Namespace) -> pathlib.Path:
+    if args.lease_dir:
+        return pathlib.Path(args.lease_dir)
+    output_path = _output_path(args)
+    return output_path.with_name(output_path.stem + ".shards")
+
+
+def _local_model_path(args: argparse.Namespace) -> pathlib.Path:
+    if args.local_model:
+        return pathlib.Path(args.local_model)
+    return _output_path(args).with_name("local_classifier.json.gz")
+
+
+def _train_local(args: argparse.Namespace, categories: List[str]) -> int:
+    from ..classifier import LocalClassifier, training_samples
+
+    _, index = load_annotations(_output_path(args))
+
+    def preview_for(item: Dict[str, object]) -> str:
+        path = build_full_path(item)
+        try:
+            return truncate_text(read_text_preview(path, args.max_bytes), args.max_chars)
+        except OSError:
+            return ""
+
+    started = time.time()
+    try:
+        model = LocalClassifier.train(training_samples(index.values(), preview_for), categories)
+    except ValueError as exc:
+        raise SystemExit(str(exc)) from exc
+    target = _local_model_path(args)
+    model.save(target)
+    print(
+        f"Modelo local con {len(model.idf)} términos entrenado con {len(index)} anotaciones "
+        f"en {time.time() - started:.1f}s: {target}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def _build_classifier(
+    args: argparse.Namespace, categories: List[str], client: OpenAIClient | None
+) -> Classifier | None:
+    from ..classifier import CascadeClassifier, LocalClassifier, RemoteClassifier
+
+    remote = None
+    if client is not None:
+        remote = RemoteClassifier(
+            client, categories, args.summary, args.retries, args.retry_wait, args.verbose, args.delay
+        )
+    if args.classifier == "remote":
+        return remote
+    model_path = _local_model_path(args)
+    if not model_path.exists():
+        raise SystemExit(f"No existe el modelo local {model_path}; entrénalo con --train-local")
+    local = LocalClassifier.load(model_path)
+    if args.classifier == "local":
+        return local
+    return CascadeClassifier(local, remote, args.min_confidence, args.summary)
+
+
+def _build_rules(args: argparse.Namespace, categories: List[str]) -> RuleEngine:
+    rules_path = pathlib.Path(args.rules) if args.rules else None
+    if rules_path is not None and not rules_path.exists():
+        raise SystemExit(f"No se encontró el archivo de reglas: {rules_path}")
+    try:
+        return RuleEngine(load_rules(rules_path, use_defaults=not args.no_rules), categories)
+    except (ValueError, re.error) as exc:
+        raise SystemExit(f"Reglas no válidas en {rules_path}: {exc}") from exc
+
+
+def _setup(
+    args: argparse.Namespace, budget: TokenBudget
+) -> Tuple[List[ResolvedRow], int, List[str], Classifier | None, RuleEngine]:
+    """Valida la configuración, carga el inventario y filtra por extensión.
+
+    Sin ``--summary`` también pasan las filas que cumple alguna regla: no se
+    leen ni van al modelo, así que su extensión no importa.
+    """
     inventory_path = pathlib.Path(args.inventory)
     if not inventory_path.exists():
         raise SystemExit(f"No se encontró el inventario: {inventory_path}")
-    output_path = (
-        pathlib.Path(args.output)
-        if args.output
-        else inventory_path.parent / "inventory_ai_annotations.json"
-    )
-    annotations_payload, annotations_index = load_annotations(output_path)
     extensions = _load_extensions(args.extensions)
     categories = _resolve_categories(args.categories)
     if not categories:
         raise SystemExit("Debes definir al menos una categoría")
+    rules = _build_rules(args, categories)
     api_key = args.api_key or os.getenv("OPENAI_API_KEY")
-    if not api_key and not args.dry_run:
+    needs_remote = args.classifier != "local" and not args.dry_run
+    if not api_key and needs_remote:
         raise SystemExit("OPENAI_API_KEY no está definido y no es un dry-run")
-    inventory = load_inventory(inventory_path)
-    client = _ensure_client(args, api_key)
-    updated = 0
-    skipped = 0
-    start_time = time.time()
-    for row in inventory:
-        extension = detect_extension(row)
-        if extension and extension.lower() not in extensions:
-            skipped += 1
-            continue
-        full_path = build_full_path(row)
+    views = [resolve_row(row) for row in load_inventory(inventory_path)]
+    candidates = [
+        view
+        for view in views
+        if not view.extension
+        or view.extension in extensions
+        or (not args.summary and rules.covers(view.full_path or view.name))
+    ]
+    client = _ensure_client(args, api_key, budget) if needs_remote else None
+    classifier = None if args.dry_run else _build_classifier(args, categories, client)
+    return candidates, len(views) - len(candidates), categories, classifier, rules
+
+
+Emit = Callable[[str, Dict[str, object]], None]
+
+
+@dataclass(slots=True)
+class _Job:
+    """Fila en tránsito por la tubería de ``_classify_rows``."""
+
+    view: ResolvedRow
+    full_path: pathlib.Path
+    lookup: str | None = None
+    metadata: Dict[str, str] = field(default_factory=dict)
+    preview: str = ""
+    prediction: Prediction | None = None
+    rule: str = ""
+
+
+def _classify_rows(
+    candidates: Sequence[ResolvedRow],
+    args: argparse.Namespace,
+    classifier: Classifier | None,
+    categories: List[str],
+    annotations: Mapping[str, Dict[str, object]] | AnnotationStore,
+    emit: Emit,
+    rules: RuleEngine | None = None,
+    progress: Progress | None = None,
+) -> Tuple[int, int, bool]:
+    """Clasifica las filas pendientes con una tubería asíncrona y entrega cada anotación a ``emit``.
+
+    Etapas: ``filtro`` (existencia en disco) → ``dedup`` (anotaciones ya
+    existentes, claves repetidas, ``--limit`` y reglas) → ``avance``
+    (lectura del archivo) → ``clasificacion`` → salida. Las etapas de disco
+    y de modelo usan hilos (``--readers`` y ``--concurrency``); ``dedup`` y
+    la salida corren en el hilo principal, así que ``annotations`` y
+    ``emit`` no necesitan ser seguros entre hilos. Sin ``--summary``, las
+    filas que cumplen una regla no se leen ni pasan por el modelo. Con el
+    modelo remoto cada lote es una fila; con el local se agrupan hasta
+    ``LOCAL_BATCH``. Devuelve ``(actualizados, omitidos, completo)``;
+    ``completo`` es falso si se detuvo por ``--limit`` o por agotar
+    ``--token-budget``.
+    """
+    from ..ai import TokenBudgetExceeded
+    from ..classifier import Prediction
+    from ..pipeline import Pipeline, Stage  # asyncio solo cuando hay filas que procesar
+
+    state = {"updated": 0, "skipped": 0, "admitted": 0, "complete": True, "exhausted": False}
+    seen: set[str] = set()
+
+    def halt(message: str, always: bool = False) -> None:
+        if state["complete"] and (always or args.verbose):
+            print(message, file=sys.stderr)
+        state["complete"] = False
+        pipeline.stop()
+
+    def done(count: int = 1) -> None:
+        if progress is not None:
+            progress.add(count)
+
+    def check_exists(view: ResolvedRow) -> _Job | None:
+        full_path = build_full_path(view)
         if not args.dry_run and not full_path.exists():
             if args.verbose:
                 print(f"[omitido] No existe {full_path}", file=sys.stderr)
-            skipped += 1
-            continue
-        metadata = _record_metadata(row)
-        metadata["extension"] = extension or metadata.get("extension", "")
-        preview = ""
-        if extension:
-            try:
-                preview = read_text_preview(full_path, args.max_bytes)
-            except FileNotFoundError:
-                if args.verbose:
-                    print(f"[omitido] No se pudo abrir {full_path}", file=sys.stderr)
-                skipped += 1
-                continue
-            except PermissionError:
-                if args.verbose:
-                    print(f"[omitido] Sin permisos para {full_path}", file=sys.stderr)
-                skipped += 1
-                continue
-        preview = truncate_text(preview, args.max_chars)
-        lookup = annotation_key(
-            {
-                "sha": row.get("sha"),
-                "ruta": metadata["ruta"],
-                "nombre": metadata["nombre"],
-            }
-        )
-        if _should_skip_existing(lookup, annotations_index, args.force, args.summary, args.verbose):
-            skipped += 1
-            continue
-        if args.limit is not None and updated >= args.limit:
+            done()
+            return None
+        return _Job(view, full_path)
+
+    def dedup(job: _Job) -> _Job | None:
+        if not state["complete"]:
+            return None
+        lookup = annotation_key(job.view)
+        if lookup in seen or _should_skip_existing(lookup, annotations, args.force, args.summary, args.verbose):
+            state["skipped"] += 1
+            done()
+            return None
+        if args.limit is not None and state["admitted"] >= args.limit:
+            halt("Límite alcanzado, deteniendo procesamiento")
+            return None
+        if lookup:
+            seen.add(lookup)
+        state["admitted"] += 1
+        job.lookup = lookup
+        job.metadata = _record_metadata(job.view)
+        # Con --summary hace falta el modelo igualmente: las reglas no resumen.
+        rule = rules.match(job.view.full_path or job.view.name) if rules is not None and not args.summary else None
+        if rule is not None:
+            job.prediction = Prediction(rule.category, "", 1.0, constants.RULE_MODEL_PREFIX + rule.name)
+            job.rule = rule.name
+        return job
+
+    def read_preview(job: _Job) -> _Job | None:
+        if job.prediction is not None or not job.view.extension:
+            return job
+        try:
+            preview = read_text_preview(job.full_path, args.max_bytes)
+        except FileNotFoundError:
+            if args.verbose:
+                print(f"[omitido] No se pudo abrir {job.full_path}", file=sys.stderr)
+            done()
+            return None
+        except PermissionError:
             if args.verbose:
-                print("Límite alcanzado, deteniendo procesamiento", file=sys.stderr)
+                print(f"[omitido] Sin permisos para {job.full_path}", file=sys.stderr)
+            done()
+            return None
+        job.preview = truncate_text(preview, args.max_chars)
+        return job
+
+    def classify(jobs: List[_Job]) -> List[_Job | None]:
+        pending = [job for job in jobs if job.prediction is None]
+        if pending and not args.dry_run:
+            assert classifier is not None
+            if state["exhausted"]:
+                return [job if job.prediction is not None else None for job in jobs]
+            try:
+                predictions = classifier.classify_batch([(job.metadata, job.preview) for job in pending])
+            except TokenBudgetExceeded as exc:
+                state["exhausted"] = True
+                halt(f"Presupuesto de tokens agotado, deteniendo procesamiento: {exc}", always=True)
+                return [job if job.prediction is not None else None for job in jobs]
+            for job, prediction in zip(pending, predictions):
+                job.prediction = prediction
+        return jobs
+
+    def sink(job: _Job) -> None:
+        if job.prediction is None:
+            if not args.progress:
+                print(f"[dry-run] Clasificaría {job.metadata['nombre']} ({job.full_path})")
+        elif args.dry_run:
+            if not args.progress:
+                print(f"[dry-run] Regla {job.rule} → {job.prediction.category}: {job.metadata['nombre']}")
+        else:
+            key, record = _annotation(job.view, job.metadata, job.lookup, job.prediction, args, categories)
+            if job.rule:
+                record["regla"] = job.rule
+            emit(key, record)
+        state["updated"] += 1
+        done()
+
+    readers = max(1, args.readers)
+    pipeline = Pipeline(
+        candidates,
+        [
+            Stage("filtro", check_exists, readers, args.queue_size),
+            Stage("dedup", dedup, 1, args.queue_size, blocking=False),
+            Stage("avance", read_preview, readers, args.queue_size),
+            Stage(
+                "clasificacion",
+                classify,
+                max(1, args.concurrency),
+                args.queue_size,
+                batch_size=1 if args.classifier == "remote" else LOCAL_BATCH,
+            ),
+        ],
+        sink,
+    )
+    metrics = pipeline.run_sync()
+    if args.verbose:
+        for stage in metrics:
+            print(stage.line(), file=sys.stderr)
+    # Las etapas de disco descartan filas que no existen o no se pueden leer.
+    skipped = state["skipped"] + metrics[1].dropped + metrics[3].dropped
+    return state["updated"], skipped, bool(state["complete"])
+
+
+def _annotation(
+    view: ResolvedRow,
+    metadata: Dict[str, str],
+    lookup: str | None,
+    prediction: Prediction,
+    args: argparse.Namespace,
+    categories: List[str],
+) -> Tuple[str, Dict[str, object]]:
+    """Construye la anotación de una fila, la muestra y devuelve ``(clave, anotación)``."""
+    category = normalize_category(prediction.category, categories)
+    summary = prediction.summary.strip()
+    record: Dict[str, object] = {
+        "id": lookup or None,
+        "sha": str(view.row.get("sha") or ""),
+        "ruta": metadata["ruta"],
+        "nombre": metadata["nombre"],
+        "categoria": category,
+        "resumen": summary if args.summary else "",
+        "model": prediction.model or args.model,
+        "generated_at": dt.datetime.utcnow().isoformat() + "Z",
+    }
+    if prediction.confidence < 1.0:
+        record["confianza"] = round(prediction.confidence, 3)
+    store_key = lookup or annotation_key(record)
+    if not store_key:
+        fallback = f"row:{metadata['ruta']}::{metadata['nombre']}"
+        store_key = fallback.lower()
+    record["id"] = store_key
+    if args.progress:
+        return store_key, record
+    display = metadata["nombre"] or metadata["ruta"] or record["sha"] or "(sin nombre)"
+    source = "regla" if record["model"].startswith(constants.RULE_MODEL_PREFIX) else "IA"
+    if args.summary and summary:
+        print(f"[{source}] {display} → {category} :: {summary}")
+    else:
+        print(f"[{source}] {display} → {category}")
+    return store_key, record
+
+
+def _progress(args: argparse.Namespace, label: str, total: int) -> Progress | None:
+    if not args.progress and not args.status_file:
+        return None
+    status_path = pathlib.Path(args.status_file) if args.status_file else None
+    return Progress(label, total, stream=sys.stderr if args.progress else None, status_path=status_path)
+
+
+def _shard_key(view: ResolvedRow) -> str:
+    return annotation_key(view) or f"row:{view.directory}::{view.name}".lower()
+
+
+def _save_shard(lease: Lease, index: AnnotationIndex, model: str) -> None:
+    items = sorted(index.values(), key=lambda item: str(item.get("id") or ""))
+    payload = {"generated_at": dt.datetime.utcnow().isoformat() + "Z", "model": model, "items": items}
+    save_annotations(lease.output_path, payload)
+
+
+def _run_sharded(args: argparse.Namespace, shared_tokens: object = None) -> int:
+    """Reclama tramos libres o caducados y los procesa hasta que no quede ninguno.
+
+    Un hilo renueva la concesión mientras se procesa el tramo; ``--limit``
+    se reparte entre todos los tramos de la ejecución. ``shared_tokens``
+    (de ``shared_budget``) hace que ``--token-budget`` cuente lo gastado por
+    todos los procesos de ``--workers``.
+    """
+    from ..ai import TokenBudget
+
+    start_time = time.time()
+    budget = TokenBudget(args.token_budget, shared_tokens)
+    candidates, skipped, categories, classifier, rules = _setup(args, budget)
+    _, base_index = load_annotations(_output_path(args))
+    manager = LeaseManager(_lease_dir(args), args.shards, args.lease_ttl)
+    updated = 0
+    limit = args.limit
+    while True:
+        if limit is not None and updated >= limit:
             break
-        if args.dry_run:
-            print(f"[dry-run] Clasificaría {metadata['nombre']} ({full_path})")
-            updated += 1
+        lease = manager.claim()
+        if lease is None:
+            break
+        rows = [view for view in candidates if shard_of(_shard_key(view), args.shards) == lease.shard]
+        _, shard_index = load_annotations(lease.output_path)
+        print(f"[{lease.name}] {len(rows)} filas ({manager.owner})", file=sys.stderr)
+        unsaved = written = 0
+        saved = time.time()
+        heartbeat = Heartbeat(lease)
+
+        def emit(key: str, record: Dict[str, object]) -> None:
+            nonlocal unsaved, written, saved
+            heartbeat.check()
+            shard_index[key] = record
+            unsaved += 1
+            written += 1
+            if unsaved >= STORE_FLUSH or time.time() - saved > args.lease_ttl / 3:
+                _save_shard(lease, shard_index, args.model)
+                unsaved = 0
+                saved = time.time()
+
+        shard_args = argparse.Namespace(**vars(args))
+        shard_args.limit = None if limit is None else limit - updated
+        progress = _progress(args, lease.name, len(rows))
+        try:
+            with heartbeat:
+                done, omitted, complete = _classify_rows(
+                    rows, shard_args, classifier, categories, ChainMap(shard_index, base_index), emit, rules, progress
+                )
+        except LeaseLost as exc:
+            # Lo ya clasificado se conserva: la unión final deduplica por clave.
+            print(f"[{lease.name}] {exc}; se abandona el tramo", file=sys.stderr)
+            updated += written
+            if not args.dry_run:
+                _save_shard(lease, shard_index, args.model)
             continue
-        assert client is not None
-        result = call_with_retries(
-            client,
-            metadata,
-            preview,
-            categories,
-            args.summary,
-            args.retries,
-            args.retry_wait,
-            args.verbose,
-            args.delay,
+        finally:
+            if progress is not None:
+                progress.close()
+        updated += done
+        skipped += omitted
+        if args.dry_run:
+            lease.release(done=False)
+            break
+        _save_shard(lease, shard_index, args.model)
+        lease.release(done=complete)
+        if not complete:
+            break
+    _report(updated, skipped, start_time, rules, budget, classifier)
+    return 0
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Punto de entrada del comando `enrich`."""
+    args = parse_args(argv)
+    output_path = _output_path(args)
+    if args.train_local:
+        categories = _resolve_categories(args.categories)
+        if not categories:
+            raise SystemExit("Debes definir al menos una categoría")
+        return _train_local(args, categories)
+    if args.merge:
+        total = merge_shards(_lease_dir(args), output_path, args.model)
+        print(f"{total} anotaciones unidas en {output_path}", file=sys.stderr)
+        if args.shards:
+            for row in LeaseManager(_lease_dir(args), args.shards, args.lease_ttl).status():
+                if row["state"] != "terminado":
+                    print(f"[pendiente] {row['shard']}: {row['state']} {row.get('owner') or ''}", file=sys.stderr)
+        return 0
+    if args.shards:
+        if args.store:
+            raise SystemExit("--store y --shards no se pueden combinar")
+        if args.workers <= 1:
+            return _run_sharded(args)
+        import multiprocessing  # solo con --workers; ahorra su importación al resto de invocaciones
+
+        from ..ai import shared_budget
+
+        shared_tokens = shared_budget() if args.token_budget else None
+        workers = [
+            multiprocessing.Process(target=_run_sharded, args=(args, shared_tokens)) for _ in range(args.workers)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return max(worker.exitcode or 0 for worker in workers)
+
+    from ..ai import TokenBudget
+
+    start_time = time.time()
+    budget = TokenBudget(args.token_budget)
+    candidates, skipped, categories, classifier, rules = _setup(args, budget)
+    store: AnnotationStore | None = None
+    if args.store:
+        from ..annotationdb import AnnotationStore
+
+        store = AnnotationStore(pathlib.Path(args.store))
+    annotations_index: AnnotationIndex | AnnotationStore
+    if store is not None:
+        if not len(store) and output_path.exists():
+            imported = store.import_json(output_path)
+            print(f"Importadas {imported} anotaciones de {output_path} en {store.path}", file=sys.stderr)
+        annotations_payload: Dict[str, object] = {"items": []}
+        annotations_index = store
+    else:
+        annotations_payload, annotations_index = load_annotations(output_path)
+    if store is not None and not args.force:
+        # Una sola consulta de diferencia en vez de una búsqueda por fila.
+        keep = store.pending([annotation_key(view) for view in candidates], args.summary)
+        skipped += len(candidates) - len(keep)
+        candidates = [candidates[pos] for pos in keep]
+    unsaved: List[Tuple[str, Dict[str, object]]] = []
+
+    def emit(key: str, record: Dict[str, object]) -> None:
+        if store is None:
+            annotations_index[key] = record
+            return
+        unsaved.append((key, record))
+        if len(unsaved) >= STORE_FLUSH:
+            store.upsert_many(unsaved)
+            unsaved.clear()
+
+    progress = _progress(args, "discos-enrich", len(candidates))
+    try:
+        updated, omitted, _ = _classify_rows(
+            candidates, args, classifier, categories, annotations_index, emit, rules, progress
         )
-        category = normalize_category(result.get("category", ""), categories)
-        summary = result.get("summary", "").strip()
-        record = {
-            "id": lookup or None,
-            "sha": str(row.get("sha") or ""),
-            "ruta": metadata["ruta"],
-            "nombre": metadata["nombre"],
-            "categoria": category,
-            "resumen": summary if args.summary else "",
-            "model": args.model,
-            "generated_at": dt.datetime.utcnow().isoformat() + "Z",
-        }
-        annotations_payload.setdefault("items", [])
-        store_key = lookup or annotation_key(record)
-        if not store_key:
-            fallback = f"row:{metadata['ruta']}::{metadata['nombre']}"
-            store_key = fallback.lower()
-        record["id"] = store_key
-        annotations_index[store_key] = record
-        updated += 1
-        display = metadata["nombre"] or metadata["ruta"] or record["sha"] or "(sin nombre)"
-        if args.summary and summary:
-            print(f"[IA] {display} → {category} :: {summary}")
-        else:
-            print(f"[IA] {display} → {category}")
+    finally:
+        if progress is not None:
+            progress.close()
+    skipped += omitted
+    if store is not None:
+        store.upsert_many(unsaved)
+        if args.output and not args.dry_run:
+            annotations_payload = store.export_payload()
+        store.close()
     if args.dry_run:
+        if rules.saved:
+            print(rules.summary(), file=sys.stderr)
         return 0
-    annotations_payload["generated_at"] = dt.datetime.utcnow().isoformat() + "Z"
-    annotations_payload["model"] = args.model
-    annotations_payload["items"] = sorted(
-        annotations_index.values(),
-        key=lambda item: (
-            str(item.get("sha") or ""),
-            str(item.get("ruta") or ""),
-            str(item.get("nombre") or ""),
-        ),
-    )
-    save_annotations(output_path, annotations_payload)
-    elapsed = time.time() - start_time
-    print(
-        f"Listo. Actualizados {updated} registros, omitidos {skipped}. "
-        f"Duración: {elapsed:.1f}s",
-        file=sys.stderr,
-    )
+    if store is None:
+        annotations_payload["items"] = sorted(
+            annotations_index.values(),
+            key=lambda item: (
+                str(item.get("sha") or ""),
+                str(item.get("ruta") or ""),
+                str(item.get("nombre") or ""),
+            ),
+        )
+    if store is None or args.output:
+        annotations_payload["generated_at"] = dt.datetime.utcnow().isoformat() + "Z"
+        annotations_payload["model"] = args.model
+        save_annotations(output_path, annotations_payload)
+    _report(updated, skipped, start_time, rules, budget, classifier)
     return 0
 
 
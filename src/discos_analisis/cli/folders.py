@@ -0,0 +1,94 @@
+"""CLI para agregar el índice por carpetas y consultar el árbol guardado."""
+
+from __future__ import annotations
+
+import argparse
+import pathlib
+import sys
+import time
+from typing import Sequence
+
+from ..folders import FolderNode, FolderTree, write_drive_summary, write_folder_csv, write_folder_index
+from ..hashindex import iter_index
+
+DEFAULT_TREE = "data/folder_tree.json.gz"
+SORT_KEYS = {
+    "bytes": lambda node: node.tree_bytes,
+    "dup": lambda node: node.tree_dup_bytes,
+    "files": lambda node: node.tree_files,
+    "name": lambda node: node.name.lower(),
+}
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    """Parsea los argumentos de línea de comandos de la agregación por carpetas."""
+    parser = argparse.ArgumentParser(
+        description="Totales por carpeta y subárbol (archivos, bytes, duplicados, fechas)."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Lee el índice una vez y genera los informes.")
+    build.add_argument(
+        "source",
+        nargs="?",
+        default="index_by_hash.csv",
+        help="CSV de índice (por defecto index_by_hash.csv).",
+    )
+    build.add_argument("--out-dir", default=".", help="Carpeta de los informes.")
+    build.add_argument("--tree", default=DEFAULT_TREE, help="Árbol agregado a guardar.")
+
+    show = commands.add_parser("show", help="Muestra una carpeta y sus subcarpetas sin releer el índice.")
+    show.add_argument("folder", nargs="?", default="", help="Carpeta, p. ej. H:\\FOTOS (vacío = unidades).")
+    show.add_argument("--tree", default=DEFAULT_TREE, help="Árbol agregado guardado con 'build'.")
+    show.add_argument("--sort", choices=sorted(SORT_KEYS), default="bytes", help="Orden de las subcarpetas.")
+    show.add_argument("--limit", type=int, default=30, help="Máximo de subcarpetas a listar.")
+    return parser.parse_args(argv)
+
+
+def _describe(label: str, node: FolderNode) -> str:
+    gb = node.tree_bytes / (1024 ** 3)
+    dup_gb = node.tree_dup_bytes / (1024 ** 3)
+    span = f"{node.tree_oldest[:10]} .. {node.tree_newest[:10]}" if node.tree_newest else "-"
+    return f"{label}  {node.tree_files} archivos  {gb:.2f} GB  dup {dup_gb:.2f} GB  {span}"
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Punto de entrada del comando `folders`."""
+    args = parse_args(argv)
+    start_time = time.perf_counter()
+    if args.command == "build":
+        source = pathlib.Path(args.source)
+        if not source.exists():
+            raise SystemExit(f"No se encontró el índice: {source}")
+        tree = FolderTree().extend(iter_index(source))
+        out_dir = pathlib.Path(args.out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        write_folder_index(tree, out_dir / "inventory_folder_index.txt")
+        write_folder_csv(tree, out_dir / "inventory_by_folder.csv")
+        write_drive_summary(tree, out_dir / "resumen_por_disco_index_by_hash.csv")
+        tree.save(pathlib.Path(args.tree))
+        for node in tree.root.sorted_children():
+            print(_describe(node.name, node), file=sys.stderr)
+        elapsed = time.perf_counter() - start_time
+        print(f"Informes en {out_dir} y árbol en {args.tree} ({elapsed:.1f}s)", file=sys.stderr)
+        return 0
+
+    tree_path = pathlib.Path(args.tree)
+    if not tree_path.exists():
+        raise SystemExit(f"No existe el árbol {tree_path}; ejecútalo antes con 'build'")
+    tree = FolderTree.load(tree_path)
+    node = tree.node_for(args.folder, create=False)
+    if node is None:
+        raise SystemExit(f"La carpeta {args.folder} no está en el índice")
+    print(_describe(args.folder or "(todas)", node))
+    children = sorted(node.children.values(), key=SORT_KEYS[args.sort], reverse=args.sort != "name")
+    for child in children[: args.limit]:
+        print("  " + _describe(child.name, child))
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(130)
@@ -0,0 +1,129 @@
+"""CLI para planificar y ejecutar la recuperación de espacio de duplicados."""
+
+from __future__ import annotations
+
+import argparse
+import pathlib
+import sys
+import time
+from typing import Sequence
+
+from ..hashindex import iter_index
+from ..reclaim import (
+    ACTIONS,
+    DEFAULT_AVOID,
+    DEFAULT_DRIVE_ORDER,
+    DEFAULT_PREFER_FOLDERS,
+    DEFAULT_QUARANTINE,
+    ReclaimReport,
+    RetentionPolicy,
+    apply_plan,
+    group_by_hash,
+    plan_reclaim,
+    read_plan,
+    write_plan,
+)
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    """Parsea los argumentos de línea de comandos del planificador."""
+    parser = argparse.ArgumentParser(
+        description="Calcula el espacio recuperable por unidad y carpeta y genera un plan mover/borrar."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    plan = commands.add_parser("plan", help="Genera el plan desde dupes_confirmed.csv o index_by_hash.csv.")
+    plan.add_argument(
+        "source",
+        nargs="?",
+        default="dupes_confirmed.csv",
+        help="CSV con grupos por hash (por defecto dupes_confirmed.csv).",
+    )
+    plan.add_argument("--output", default="reclaim_plan.csv", help="Plan CSV a generar.")
+    plan.add_argument(
+        "--drive-order",
+        default=",".join(DEFAULT_DRIVE_ORDER),
+        help="Unidades por orden de preferencia para conservar (p. ej. H,I,J).",
+    )
+    plan.add_argument(
+        "--prefer",
+        action="append",
+        help=f"Carpeta preferida para conservar; repetible (por defecto {', '.join(DEFAULT_PREFER_FOLDERS)}).",
+    )
+    plan.add_argument(
+        "--avoid",
+        action="append",
+        help=f"Patrón de carpeta a no conservar; repetible (por defecto {', '.join(DEFAULT_AVOID)}).",
+    )
+    plan.add_argument("--action", choices=ACTIONS, default="move", help="Qué hacer con las copias sobrantes.")
+    plan.add_argument(
+        "--quarantine",
+        default=DEFAULT_QUARANTINE,
+        help="Carpeta de destino en cada unidad cuando la acción es move.",
+    )
+    plan.add_argument("--top", type=int, default=20, help="Número de grupos y carpetas a listar.")
+
+    apply = commands.add_parser("apply", help="Ejecuta un plan generado con 'plan'.")
+    apply.add_argument("plan", help="Plan CSV.")
+    apply.add_argument("--log", help="CSV de resultados (por defecto <plan>_log.csv).")
+    apply.add_argument("--dry-run", action="store_true", help="Solo comprueba, no mueve ni borra.")
+    apply.add_argument(
+        "--verify",
+        action="store_true",
+        help="Recalcula el hash de la copia conservada antes de borrar (lento, lee el archivo entero).",
+    )
+    return parser.parse_args(argv)
+
+
+def _gb(value: int) -> str:
+    return f"{value / (1024 ** 3):.2f} GB"
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Punto de entrada del comando `reclaim`."""
+    args = parse_args(argv)
+    start_time = time.perf_counter()
+    if args.command == "apply":
+        plan_path = pathlib.Path(args.plan)
+        if not plan_path.exists():
+            raise SystemExit(f"No se encontró el plan: {plan_path}")
+        log_path = pathlib.Path(args.log) if args.log else plan_path.with_name(f"{plan_path.stem}_log.csv")
+        results = apply_plan(read_plan(plan_path), log_path, dry_run=args.dry_run, verify=args.verify)
+        freed = results.pop("bytes", 0)
+        summary = ", ".join(f"{name}={count}" for name, count in sorted(results.items()))
+        print(f"{summary}; liberados {_gb(freed)}. Registro en {log_path}", file=sys.stderr)
+        return 0 if not results.get("error") else 1
+
+    source = pathlib.Path(args.source)
+    if not source.exists():
+        raise SystemExit(f"No se encontró el índice: {source}")
+    policy = RetentionPolicy(
+        drive_order=tuple(part.strip() for part in args.drive_order.split(",") if part.strip()),
+        prefer_folders=tuple(args.prefer) if args.prefer is not None else DEFAULT_PREFER_FOLDERS,
+        avoid=tuple(args.avoid) if args.avoid is not None else DEFAULT_AVOID,
+        action=args.action,
+        quarantine=args.quarantine,
+    )
+    report = ReclaimReport()
+    output = pathlib.Path(args.output)
+    steps = write_plan(plan_reclaim(group_by_hash(iter_index(source)), policy, report, args.top), output)
+
+    print(f"Grupos: {report.groups}  copias sobrantes: {report.copies}  recuperable: {_gb(report.reclaimable)}")
+    print("Por unidad:")
+    for drive, size in sorted(report.by_drive.items()):
+        print(f"  {drive or '-'}:  {_gb(size)}")
+    print(f"Carpetas con más espacio recuperable (top {args.top}):")
+    for folder, size in report.top_folders(args.top):
+        print(f"  {_gb(size):>12}  {folder}")
+    print(f"Grupos más grandes (top {args.top}):")
+    for freed, sha, count in report.largest_groups():
+        print(f"  {_gb(freed):>12}  {count} copias  {sha}")
+    print(f"Plan con {steps} pasos en {output} ({time.perf_counter() - start_time:.1f}s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(130)
@@ -0,0 +1,97 @@
+"""CLI para construir y consultar el índice de nombres de archivo."""
+
+from __future__ import annotations
+
+import argparse
+import pathlib
+import sys
+import time
+from typing import Sequence
+
+from ..hashindex import iter_index
+from ..textindex import MODES, TextIndex
+
+DEFAULT_INDEX = "data/name_index.bin"
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    """Parsea los argumentos de línea de comandos del buscador."""
+    parser = argparse.ArgumentParser(
+        description="Índice invertido de nombres y carpetas (sin acentos ni mayúsculas)."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Construye el índice desde CSV de índice.")
+    build.add_argument(
+        "sources",
+        nargs="*",
+        default=["index_by_hash.csv"],
+        help="CSV de índice (por defecto index_by_hash.csv).",
+    )
+    build.add_argument("--output", default=DEFAULT_INDEX, help="Archivo de índice a generar.")
+
+    query = commands.add_parser("query", help="Busca rutas por palabras.")
+    query.add_argument("text", help="Texto a buscar; todas las palabras deben aparecer.")
+    query.add_argument("--index", default=DEFAULT_INDEX, help="Archivo de índice.")
+    query.add_argument("--mode", choices=MODES, default="prefix", help="Tipo de coincidencia.")
+    query.add_argument("--limit", type=int, default=50, help="Máximo de rutas a mostrar.")
+
+    export = commands.add_parser("export", help="Exporta fragmentos JSON para el visor estático.")
+    export.add_argument("--index", default=DEFAULT_INDEX, help="Archivo de índice.")
+    export.add_argument(
+        "--target",
+        default="docs/data/search",
+        help="Carpeta de salida de los fragmentos.",
+    )
+    export.add_argument(
+        "--docs-per-shard",
+        type=int,
+        default=50000,
+        help="Rutas por fragmento de documentos.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Punto de entrada del comando `search`."""
+    args = parse_args(argv)
+    start_time = time.perf_counter()
+    if args.command == "build":
+        sources = [pathlib.Path(item) for item in args.sources]
+        missing = [str(path) for path in sources if not path.exists()]
+        if missing:
+            raise SystemExit(f"No se encontró el índice: {', '.join(missing)}")
+        index = TextIndex.build(entry.path for source in sources for entry in iter_index(source))
+        output = pathlib.Path(args.output)
+        index.save(output)
+        for line in index.iter_stats():
+            print(line, file=sys.stderr)
+        print(f"Índice guardado en {output} ({time.perf_counter() - start_time:.1f}s)", file=sys.stderr)
+        return 0
+
+    index_path = pathlib.Path(args.index)
+    if not index_path.exists():
+        raise SystemExit(f"No existe el índice {index_path}; ejecútalo antes con 'build'")
+    index = TextIndex.load(index_path)
+    if args.command == "export":
+        written = index.export_shards(pathlib.Path(args.target), args.docs_per_shard)
+        print(f"Exportados {written} archivos en {args.target}", file=sys.stderr)
+        return 0
+
+    loaded = time.perf_counter()
+    results = index.search(args.text, args.mode, args.limit)
+    elapsed = (time.perf_counter() - loaded) * 1000
+    for path in results:
+        print(path)
+    print(
+        f"{len(results)} resultado(s) en {elapsed:.1f} ms (carga {(loaded - start_time) * 1000:.0f} ms)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(130)
@@ -0,0 +1,200 @@
+"""Servicio HTTP de consultas sobre los índices del inventario."""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import pathlib
+import sys
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence
+
+from ..hashindex import iter_index
+from ..query import DEFAULT_PAGE_SIZE, InventoryIndex
+
+# Por debajo de este tamaño comprimir cuesta más de lo que ahorra.
+GZIP_MIN_BYTES = 1024
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    """Parsea los argumentos de línea de comandos del servicio."""
+    parser = argparse.ArgumentParser(
+        description=(
+            "Carga index_by_hash.csv / inventory_by_folder.csv en memoria y "
+            "sirve consultas JSON paginadas."
+        )
+    )
+    parser.add_argument(
+        "sources",
+        nargs="*",
+        default=["index_by_hash.csv"],
+        help="CSV de índice a cargar (por defecto index_by_hash.csv).",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Interfaz de escucha.")
+    parser.add_argument("--port", type=int, default=8765, help="Puerto HTTP.")
+    parser.add_argument(
+        "--cors",
+        default="*",
+        help="Valor de Access-Control-Allow-Origin (vacío para desactivar).",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Registra cada petición en stderr.",
+    )
+    return parser.parse_args(argv)
+
+
+def load_index(sources: Sequence[pathlib.Path]) -> InventoryIndex:
+    """Lee los CSV una sola vez y construye el índice en memoria."""
+    fingerprint = hashlib.sha1()
+    entries = []
+    for source in sources:
+        stat = source.stat()
+        fingerprint.update(f"{source.resolve()}|{stat.st_size}|{stat.st_mtime_ns}".encode("utf-8"))
+        entries.extend(iter_index(source))
+    return InventoryIndex(entries, version=fingerprint.hexdigest())
+
+
+def _first(params: Dict[str, List[str]], name: str) -> Optional[str]:
+    values = params.get(name)
+    if not values:
+        return None
+    value = values[0].strip()
+    return value or None
+
+
+def _int(params: Dict[str, List[str]], name: str, default: Optional[int] = None) -> Optional[int]:
+    value = _first(params, name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"El parámetro '{name}' debe ser entero") from None
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """Rutas: ``/api/files``, ``/api/hash/<sha>`` y ``/api/stats``."""
+
+    index: InventoryIndex
+    cors = "*"
+    verbose = False
+    server_version = "discos-serve/0.1"
+
+    def log_message(self, format: str, *args) -> None:  # firma heredada de BaseHTTPRequestHandler
+        if self.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self) -> None:  # nombre impuesto por http.server
+        url = urllib.parse.urlsplit(self.path)
+        params = urllib.parse.parse_qs(url.query)
+        # La respuesta depende solo de la versión de los datos y de la URL.
+        seed = f"{self.index.version}|{url.path}|{url.query}".encode("utf-8")
+        etag = 'W/"' + hashlib.sha1(seed).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, b"", etag)
+            return
+        try:
+            payload = self._route(url.path, params)
+        except ValueError as error:
+            self._send_json(400, {"error": str(error)})
+            return
+        if payload is None:
+            self._send_json(404, {"error": f"Ruta desconocida: {url.path}"})
+            return
+        self._send_json(200, payload, etag)
+
+    def _route(self, path: str, params: Dict[str, List[str]]) -> Optional[Dict[str, object]]:
+        if path == "/api/stats":
+            return self.index.stats()
+        if path.startswith("/api/hash/"):
+            sha = path.rsplit("/", 1)[-1]
+            return self.index.query(sha=sha, limit=_int(params, "limit", DEFAULT_PAGE_SIZE)).to_dict()
+        if path == "/api/files":
+            started = time.perf_counter()
+            result = self.index.query(
+                sha=_first(params, "hash"),
+                prefix=_first(params, "prefix"),
+                extension=_first(params, "ext"),
+                category=_first(params, "category"),
+                drive=_first(params, "drive"),
+                min_size=_int(params, "min_size"),
+                max_size=_int(params, "max_size"),
+                since=_first(params, "since"),
+                until=_first(params, "until"),
+                offset=_int(params, "offset", 0) or 0,
+                limit=_int(params, "limit", DEFAULT_PAGE_SIZE) or 0,
+            )
+            payload = result.to_dict()
+            payload["elapsedMs"] = round((time.perf_counter() - started) * 1000, 3)
+            return payload
+        return None
+
+    def _send_json(self, status: int, payload: Dict[str, object], etag: Optional[str] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self._send(status, body, etag, "application/json; charset=utf-8")
+
+    def _send(self, status: int, body: bytes, etag: Optional[str], content_type: str = "") -> None:
+        encoding = ""
+        if len(body) >= GZIP_MIN_BYTES and "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            body = gzip.compress(body, compresslevel=5)
+            encoding = "gzip"
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if self.cors:
+            self.send_header("Access-Control-Allow-Origin", self.cors)
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+
+def build_server(index: InventoryIndex, host: str, port: int, cors: str = "*", verbose: bool = False):
+    """Crea el servidor HTTP enlazado al índice ya cargado."""
+    handler = type(
+        "BoundQueryHandler",
+        (QueryHandler,),
+        {"index": index, "cors": cors, "verbose": verbose},
+    )
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Punto de entrada del comando `serve`."""
+    args = parse_args(argv)
+    sources = [pathlib.Path(item) for item in args.sources]
+    missing = [str(path) for path in sources if not path.exists()]
+    if missing:
+        raise SystemExit(f"No se encontró el índice: {', '.join(missing)}")
+    start_time = time.time()
+    index = load_index(sources)
+    print(
+        f"Cargadas {len(index)} filas en {time.time() - start_time:.1f}s. "
+        f"Escuchando en http://{args.host}:{args.port}/api/files",
+        file=sys.stderr,
+    )
+    server = build_server(index, args.host, args.port, args.cors, args.verbose)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(130)
@@ -0,0 +1,123 @@
+"""CLI para detectar fotos y vídeos casi duplicados que el SHA-256 no empareja."""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import pathlib
+import sys
+import time
+from typing import Sequence
+
+from ..hashindex import iter_index
+from ..perceptual import (
+    ALGORITHMS,
+    DEFAULT_DISTANCE,
+    FingerprintCache,
+    compute_hashes,
+    expand_groups,
+    near_duplicate_groups,
+    perceptual_candidates,
+)
+from ..videoprint import DEFAULT_SIMILARITY, compute_prints, video_candidates, video_groups
+
+DEFAULT_CACHE = "data/fingerprint_cache.json.gz"
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    """Parsea los argumentos de línea de comandos de la búsqueda de casi-duplicados."""
+    parser = argparse.ArgumentParser(
+        description=(
+            "Agrupa fotos visualmente iguales (hash perceptual) o vídeos remultiplexados "
+            "(huella por muestreo de bytes)."
+        )
+    )
+    parser.add_argument(
+        "source",
+        nargs="?",
+        default="index_by_hash.csv",
+        help="CSV de índice (por defecto index_by_hash.csv).",
+    )
+    parser.add_argument("--media", choices=("foto", "video"), default="foto", help="Tipo de archivo a comparar.")
+    parser.add_argument(
+        "--output",
+        help="CSV de grupos a generar (por defecto near_duplicates_photos.csv o near_duplicates_videos.csv).",
+    )
+    parser.add_argument("--algo", choices=ALGORITHMS, default="dhash", help="Hash perceptual a usar.")
+    parser.add_argument(
+        "--distance",
+        type=int,
+        default=DEFAULT_DISTANCE,
+        help="Distancia de Hamming máxima (de 64 bits) para considerar dos fotos iguales.",
+    )
+    parser.add_argument(
+        "--similarity",
+        type=float,
+        default=DEFAULT_SIMILARITY,
+        help="Similitud mínima (0-1) entre huellas de vídeo.",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Procesos (fotos) o lectores (vídeos) simultáneos.")
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help="Caché de huellas por hash de contenido.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Punto de entrada del comando `similar`."""
+    args = parse_args(argv)
+    source = pathlib.Path(args.source)
+    if not source.exists():
+        raise SystemExit(f"No se encontró el índice: {source}")
+    start_time = time.perf_counter()
+    entries = list(iter_index(source))
+    cache = FingerprintCache(pathlib.Path(args.cache))
+    errors = []
+
+    def on_error(path: str, message: str) -> None:
+        errors.append(path)
+        print(f"[WARN] {path}: {message}", file=sys.stderr)
+
+    try:
+        if args.media == "video":
+            candidates = video_candidates(entries)
+            prints = compute_prints(candidates, cache, args.workers or 4, on_error=on_error)
+        else:
+            candidates = perceptual_candidates(entries)
+            hashes = compute_hashes(candidates, cache, args.algo, args.workers, on_error)
+    except RuntimeError as exc:
+        raise SystemExit(str(exc)) from None
+    finally:
+        cache.save()
+    hashed = time.perf_counter()
+    if args.media == "video":
+        groups = video_groups(prints, args.similarity)
+        found, score = len(prints), "Similarity"
+    else:
+        groups = near_duplicate_groups(hashes, args.distance)
+        found, score = len(hashes), "Distance"
+
+    output = pathlib.Path(args.output or f"near_duplicates_{'videos' if args.media == 'video' else 'photos'}.csv")
+    rows = 0
+    with output.open("w", encoding="utf-8-sig", newline="") as handle:
+        writer = csv.writer(handle, quoting=csv.QUOTE_ALL)
+        writer.writerow(["Group", score, "Hash", "Path", "Bytes", "LastWrite"])
+        # Primero lo más parecido: menor distancia en fotos, mayor similitud en vídeos.
+        sign = 1 if score == "Distance" else -1
+        for number, value, entry in sorted(
+            expand_groups(groups, entries), key=lambda item: (item[0], sign * item[1], item[2].path.lower())
+        ):
+            writer.writerow([number, value, entry.sha, entry.path, entry.size, entry.modified.replace("T", " ")])
+            rows += 1
+    print(
+        f"Archivos únicos: {len(candidates)}  con huella: {found}  errores: {len(errors)}  "
+        f"hashes {hashed - start_time:.1f}s, agrupado {time.perf_counter() - hashed:.1f}s",
+        file=sys.stderr,
+    )
+    print(f"{len(groups)} grupos de casi-duplicados ({rows} filas) en {output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(130)
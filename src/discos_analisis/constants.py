@@ -50,4 +50,95 @@ DEFAULT_CATEGORIES = [
     "otro",
 ]
 
-__all__ = ["DEFAULT_EXTENSIONS", "DEFAULT_CATEGORIES"]
+# Tipos multimedia usados por los índices por hash (mismos conjuntos que
+# tools/generate_duplicates_table.py).
+VIDEO_EXT = {
+    ".mp4",
+    ".m2ts",
+    ".avi",
+    ".mov",
+    ".mpg",
+    ".mpeg",
+    ".mts",
+    ".wmv",
+    ".m4v",
+    ".mkv",
+    ".flv",
+    ".ts",
+    ".webm",
+}
+
+PHOTO_EXT = {
+    ".jpg",
+    ".jpeg",
+    ".png",
+    ".gif",
+    ".heic",
+    ".tif",
+    ".tiff",
+    ".bmp",
+    ".raw",
+    ".nef",
+    ".cr2",
+    ".cr3",
+    ".arw",
+    ".psd",
+    ".svg",
+    ".webp",
+    ".ai",
+}
+
+AUDIO_EXT = {
+    ".mp3",
+    ".wav",
+    ".flac",
+    ".aac",
+    ".m4a",
+    ".ogg",
+    ".wma",
+    ".aiff",
+    ".aif",
+    ".mid",
+    ".midi",
+}
+
+DOC_EXT = {
+    ".pdf",
+    ".doc",
+    ".docx",
+    ".xls",
+    ".xlsx",
+    ".ppt",
+    ".pptx",
+    ".txt",
+    ".csv",
+    ".rtf",
+    ".odt",
+    ".ods",
+    ".odp",
+    ".md",
+    ".html",
+}
+
+# Capacidad por defecto de cada cola entre etapas de ``pipeline``; aquí para
+# que los comandos la usen en sus argumentos sin importar ``asyncio``.
+DEFAULT_QUEUE_SIZE = 64
+
+# Tokens que se reservan para el avance si no se indica otro límite (~1800
+# caracteres); aquí para que ``discos-enrich`` no importe ``ai`` al arrancar.
+DEFAULT_PREVIEW_TOKENS = 450
+
+# Prefijo del campo ``model`` en las anotaciones resueltas por una regla.
+RULE_MODEL_PREFIX = "regla:"
+
+__all__ = [
+    "DEFAULT_EXTENSIONS",
+    "DEFAULT_PREVIEW_TOKENS",
+    "DEFAULT_QUEUE_SIZE",
+    "DEFAULT_CATEGORIES",
+    "RULE_MODEL_PREFIX",
+    "VIDEO_EXT",
+    "PHOTO_EXT",
+    "AUDIO_EXT",
+    "DOC_EXT",
+]
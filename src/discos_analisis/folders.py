@@ -0,0 +1,264 @@
+"""Agregación por carpetas en una sola pasada sobre el índice por hash."""
+
+from __future__ import annotations
+
+import csv
+import datetime as dt
+import gzip
+import json
+import pathlib
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .hashindex import MediaRecord, spanish_decimal, spanish_int
+
+
+def split_directory(directory: str) -> List[str]:
+    """Divide ``H:\\FOTOS\\2003`` en ``["H:", "FOTOS", "2003"]``."""
+    return [part for part in directory.replace("/", "\\").split("\\") if part]
+
+
+class FolderNode:
+    """Nodo del árbol de prefijos: totales propios y del subárbol completo."""
+
+    __slots__ = (
+        "name",
+        "children",
+        "entries",
+        "files",
+        "bytes",
+        "dup_bytes",
+        "newest",
+        "oldest",
+        "tree_files",
+        "tree_bytes",
+        "tree_dup_bytes",
+        "tree_newest",
+        "tree_oldest",
+    )
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.children: Dict[str, FolderNode] = {}
+        self.entries: List[MediaRecord] = []
+        self.files = 0
+        self.bytes = 0
+        self.dup_bytes = 0
+        self.newest = ""
+        self.oldest = ""
+        self.tree_files = 0
+        self.tree_bytes = 0
+        self.tree_dup_bytes = 0
+        self.tree_newest = ""
+        self.tree_oldest = ""
+
+    def child(self, name: str) -> "FolderNode":
+        key = name.lower()
+        node = self.children.get(key)
+        if node is None:
+            node = FolderNode(name)
+            self.children[key] = node
+        return node
+
+    def add(self, entry: MediaRecord) -> None:
+        self.entries.append(entry)
+        self.files += 1
+        self.bytes += entry.size
+        modified = entry.modified
+        if modified:
+            if modified > self.newest:
+                self.newest = modified
+            if not self.oldest or modified < self.oldest:
+                self.oldest = modified
+
+    def rollup(self) -> None:
+        """Calcula los totales recursivos en post-orden (sin recursión de Python)."""
+        stack: List[Tuple[FolderNode, bool]] = [(self, False)]
+        while stack:
+            node, visited = stack.pop()
+            if not visited:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children.values())
+                continue
+            node.tree_files = node.files
+            node.tree_bytes = node.bytes
+            node.tree_dup_bytes = node.dup_bytes
+            node.tree_newest = node.newest
+            node.tree_oldest = node.oldest
+            for child in node.children.values():
+                node.tree_files += child.tree_files
+                node.tree_bytes += child.tree_bytes
+                node.tree_dup_bytes += child.tree_dup_bytes
+                if child.tree_newest > node.tree_newest:
+                    node.tree_newest = child.tree_newest
+                if child.tree_oldest and (not node.tree_oldest or child.tree_oldest < node.tree_oldest):
+                    node.tree_oldest = child.tree_oldest
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "name": self.name,
+            "files": self.files,
+            "bytes": self.bytes,
+            "dupBytes": self.dup_bytes,
+            "newest": self.newest,
+            "oldest": self.oldest,
+            "treeFiles": self.tree_files,
+            "treeBytes": self.tree_bytes,
+            "treeDupBytes": self.tree_dup_bytes,
+            "treeNewest": self.tree_newest,
+            "treeOldest": self.tree_oldest,
+            "children": [child.to_dict() for child in self.sorted_children()],
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, object]) -> "FolderNode":
+        node = cls(str(payload.get("name") or ""))
+        node.files = int(payload.get("files") or 0)
+        node.bytes = int(payload.get("bytes") or 0)
+        node.dup_bytes = int(payload.get("dupBytes") or 0)
+        node.newest = str(payload.get("newest") or "")
+        node.oldest = str(payload.get("oldest") or "")
+        node.tree_files = int(payload.get("treeFiles") or 0)
+        node.tree_bytes = int(payload.get("treeBytes") or 0)
+        node.tree_dup_bytes = int(payload.get("treeDupBytes") or 0)
+        node.tree_newest = str(payload.get("treeNewest") or "")
+        node.tree_oldest = str(payload.get("treeOldest") or "")
+        for child in payload.get("children") or []:
+            loaded = cls.from_dict(child)
+            node.children[loaded.name.lower()] = loaded
+        return node
+
+    def sorted_children(self) -> List["FolderNode"]:
+        return [self.children[key] for key in sorted(self.children)]
+
+
+class FolderTree:
+    """Árbol de carpetas alimentado fila a fila desde el índice por hash.
+
+    Los bytes duplicados se resuelven en la misma pasada: la primera copia
+    de cada hash queda apuntada y, al aparecer la segunda, se suma también
+    su tamaño retroactivamente. Así ``dup_bytes`` cuenta todas las copias
+    de archivos que existen más de una vez, sin depender del orden.
+    """
+
+    def __init__(self) -> None:
+        self.root = FolderNode("")
+        self._first_copy: Dict[str, Optional[Tuple[FolderNode, int]]] = {}
+
+    def node_for(self, directory: str, create: bool = True) -> Optional[FolderNode]:
+        node = self.root
+        for part in split_directory(directory):
+            if create:
+                node = node.child(part)
+            else:
+                found = node.children.get(part.lower())
+                if found is None:
+                    return None
+                node = found
+        return node
+
+    def add(self, entry: MediaRecord) -> None:
+        node = self.node_for(entry.directory)
+        assert node is not None
+        node.add(entry)
+        if not entry.verified:
+            return
+        if entry.sha not in self._first_copy:
+            self._first_copy[entry.sha] = (node, entry.size)
+            return
+        first = self._first_copy[entry.sha]
+        if first is not None:
+            first_node, first_size = first
+            first_node.dup_bytes += first_size
+            self._first_copy[entry.sha] = None
+        node.dup_bytes += entry.size
+
+    def extend(self, entries: Iterable[MediaRecord]) -> "FolderTree":
+        for entry in entries:
+            self.add(entry)
+        self.root.rollup()
+        return self
+
+    def walk(self) -> Iterator[Tuple[str, FolderNode]]:
+        """Carpetas en orden alfabético de ruta, como ``Sort-Object Name``."""
+        stack: List[Tuple[str, FolderNode]] = [
+            (child.name, child) for child in reversed(self.root.sorted_children())
+        ]
+        while stack:
+            path, node = stack.pop()
+            yield (path + "\\" if path.endswith(":") else path), node
+            for child in reversed(node.sorted_children()):
+                stack.append((f"{path}\\{child.name}", child))
+
+    def save(self, path: pathlib.Path) -> None:
+        """Persiste solo los agregados (sin filas) para consultas de detalle."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, "wt", encoding="utf-8") as handle:
+            json.dump({"version": 1, "root": self.root.to_dict()}, handle, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "FolderTree":
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            payload = json.load(handle)
+        tree = cls()
+        tree.root = FolderNode.from_dict(payload.get("root") or {})
+        return tree
+
+
+def write_folder_index(tree: FolderTree, target: pathlib.Path, generated: Optional[dt.datetime] = None) -> None:
+    """Escribe ``inventory_folder_index.txt`` (archivos por carpeta, más recientes primero)."""
+    stamp = (generated or dt.datetime.now()).strftime("%d/%m/%Y %H:%M")
+    with target.open("w", encoding="utf-8-sig", newline="\n") as handle:
+        handle.write(f"INDICE POR CARPETA  generado {stamp}\n\n")
+        for display, node in tree.walk():
+            if not node.entries:
+                continue
+            handle.write(f"### {display}\n")
+            for entry in sorted(node.entries, key=lambda item: item.modified, reverse=True):
+                when = entry.modified[:16].replace("T", " ")
+                handle.write(f"{when}  {spanish_int(entry.size):>10}  {entry.name}\n")
+            handle.write("\n")
+
+
+def write_folder_csv(tree: FolderTree, target: pathlib.Path) -> None:
+    """Escribe ``inventory_by_folder.csv`` con las columnas sha/tipo/.../fecha."""
+    with target.open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle, quoting=csv.QUOTE_ALL)
+        writer.writerow(["sha", "tipo", "extension", "nombre", "ruta", "unidad", "drive", "tamano", "fecha"])
+        for display, node in tree.walk():
+            for entry in node.entries:
+                unit = f"{entry.drive}:" if entry.drive else ""
+                writer.writerow([
+                    entry.sha if entry.verified else "",
+                    entry.category,
+                    entry.extension.lstrip("."),
+                    entry.name,
+                    display,
+                    unit,
+                    unit,
+                    entry.size,
+                    entry.modified + "Z" if entry.modified else "",
+                ])
+
+
+def write_drive_summary(tree: FolderTree, target: pathlib.Path) -> None:
+    """Escribe ``resumen_por_disco_index_by_hash.csv`` desde los nodos raíz."""
+    with target.open("w", encoding="utf-8-sig", newline="") as handle:
+        writer = csv.writer(handle, quoting=csv.QUOTE_ALL)
+        writer.writerow(["Drive", "Files", "Bytes", "GB"])
+        for node in tree.root.sorted_children():
+            writer.writerow([
+                node.name.rstrip(":"),
+                node.tree_files,
+                node.tree_bytes,
+                spanish_decimal(node.tree_bytes / (1024 ** 3)),
+            ])
+
+
+__all__ = [
+    "FolderNode",
+    "FolderTree",
+    "split_directory",
+    "write_drive_summary",
+    "write_folder_csv",
+    "write_folder_index",
+]
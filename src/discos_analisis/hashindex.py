@@ -0,0 +1,283 @@
+"""Modelo de registro de archivo y lectura en streaming de los índices CSV por hash y por carpeta.
+
+``MediaRecord`` es el único modelo de archivo del paquete: lo producen estos
+lectores y los de ``records`` (conversión entre formatos), y lo consumen
+consultas, árbol de carpetas y recuperación de espacio.
+"""
+
+from __future__ import annotations
+
+import csv
+import pathlib
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .constants import AUDIO_EXT, DOC_EXT, PHOTO_EXT, VIDEO_EXT
+
+# Valores de la columna ``HashKind`` de ``tools/reindex_hij.py``: solo un hash
+# completo confirma un duplicado; una huella muestreada no.
+HASH_FULL = "full"
+HASH_SAMPLED = "sampled"
+
+
+@dataclass(slots=True)
+class MediaRecord:
+    """Archivo de inventario con ruta completa estilo Windows y fecha ISO sin zona.
+
+    Extensión, unidad y categoría se deducen de la ruta si no se indican.
+    """
+
+    path: str
+    size: int = 0
+    modified: str = ""
+    sha: str = ""
+    algo: str = "sha256"
+    extension: str = ""
+    drive: str = ""
+    category: str = ""
+    hash_kind: str = HASH_FULL
+    file_id: str = ""
+    hashed_at: float = 0.0
+
+    def __post_init__(self) -> None:
+        if not self.extension:
+            name = self.name
+            self.extension = "." + name.rsplit(".", 1)[-1].lower() if "." in name else ""
+        if not self.drive and self.path[1:2] == ":":
+            self.drive = self.path[0].upper()
+        if not self.category:
+            self.category = media_category(self.extension)
+
+    @property
+    def verified(self) -> bool:
+        """Si ``sha`` es un hash completo que puede confirmar duplicados."""
+        return bool(self.sha) and self.hash_kind == HASH_FULL
+
+    @property
+    def name(self) -> str:
+        return self.path.rsplit("\\", 1)[-1]
+
+    @property
+    def directory(self) -> str:
+        head, sep, _ = self.path.rpartition("\\")
+        return head + sep if head.endswith(":") else head
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "sha": self.sha,
+            "path": self.path,
+            "name": self.name,
+            "drive": self.drive,
+            "extension": self.extension,
+            "size": self.size,
+            "modified": self.modified,
+            "category": self.category,
+            "hashKind": self.hash_kind,
+        }
+
+
+# Nombre histórico de las filas de índice; es el mismo modelo.
+IndexEntry = MediaRecord
+
+
+def media_category(extension: str) -> str:
+    """Clasifica una extensión en video/foto/audio/documento/otro."""
+    ext = extension.lower()
+    if ext in VIDEO_EXT:
+        return "video"
+    if ext in PHOTO_EXT:
+        return "foto"
+    if ext in AUDIO_EXT:
+        return "audio"
+    if ext in DOC_EXT:
+        return "documento"
+    return "otro"
+
+
+def normalize_index_path(path: str) -> str:
+    """Clave de comparación para rutas: barras invertidas y minúsculas."""
+    return path.replace("/", "\\").lower()
+
+
+def parse_timestamp(raw: str) -> str:
+    """Convierte las fechas de los índices a ISO ``YYYY-MM-DDTHH:MM:SS``.
+
+    Admite ``dd/mm/YYYY HH:MM:SS`` (index_by_hash.csv), ``YYYY-MM-DD HH:MM:SS``
+    (dupes_confirmed.csv) e ISO con ``Z`` (inventory_by_folder.csv). Se usa
+    troceado de cadenas en lugar de ``strptime`` porque es la ruta caliente
+    de la carga. Las fechas ISO resultantes ordenan como cadenas.
+    """
+    raw = raw.strip()
+    if len(raw) < 10:
+        return ""
+    if raw[2] == "/" and raw[5] == "/":
+        date = f"{raw[6:10]}-{raw[3:5]}-{raw[0:2]}"
+        clock = raw[11:19].strip()
+    else:
+        date = raw[0:10]
+        clock = raw[11:19].rstrip("Z").strip()
+    if len(clock) == 7:
+        clock = "0" + clock
+    return f"{date}T{clock or '00:00:00'}"
+
+
+def spanish_int(value: int) -> str:
+    """Entero con punto de millares, como en los informes de ``tools/reindex_hij.py``."""
+    return f"{value:,}".replace(",", ".")
+
+
+def spanish_decimal(value: float, decimals: int = 2) -> str:
+    """Decimal con punto de millares y coma decimal (``1.234,56``)."""
+    formatted = f"{value:,.{decimals}f}"
+    return formatted.replace(",", "@").replace(".", ",").replace("@", ".")
+
+
+def format_mb(length: int) -> str:
+    """Columna ``MB`` de ``index_by_hash.csv``: coma decimal, sin ceros sobrantes y "0" bajo 1 MB."""
+    mb_value = length / (1024 * 1024)
+    if mb_value < 1:
+        return "0"
+    formatted = f"{mb_value:.2f}".replace(".", ",")
+    if formatted.endswith(",00"):
+        return formatted[:-3]
+    return formatted[:-1] if formatted.endswith("0") else formatted
+
+
+def parse_int(raw: str) -> int:
+    """Entero de una celda; admite ``"1,234"`` y ``"12.0"`` y devuelve 0 si no es un número."""
+    try:
+        return int(raw)
+    except ValueError:
+        pass
+    try:
+        return int(float(raw.replace('"', "").replace(",", "")))
+    except ValueError:
+        return 0
+
+
+def normalize_extension(raw: str) -> str:
+    """Extensión en minúsculas con punto; ``(sin)`` (sin extensión) y vacío dan ``""``."""
+    raw = raw.strip().lower().lstrip(".")
+    return "." + raw if raw and raw != "(sin)" else ""
+
+
+def header_columns(header: List[str]) -> Dict[str, int]:
+    """Posición de cada columna por nombre en minúsculas, sin BOM ni espacios."""
+    return {name.lstrip("\ufeff").strip().lower(): pos for pos, name in enumerate(header)}
+
+
+def _cell(row: List[str], pos: Optional[int]) -> str:
+    if pos is None or pos >= len(row):
+        return ""
+    return row[pos].strip()
+
+
+RowParser = Callable[[List[str]], Optional[MediaRecord]]
+
+
+def hash_row_parser(columns: Dict[str, int]) -> RowParser:
+    """Parser de filas de ``index_by_hash.csv`` / ``dupes_confirmed.csv`` con las posiciones resueltas.
+
+    Una unidad vacía se deduce de la ruta en ``MediaRecord``.
+    """
+    sha_pos = columns.get("hash", columns.get("sha256"))
+    path_pos = columns["path"]
+    drive_pos = columns.get("drive")
+    ext_pos = columns.get("extension")
+    size_pos = columns.get("length", columns.get("bytes"))
+    date_pos = columns.get("lastwrite")
+    kind_pos = columns.get("hashkind")
+    id_pos = columns.get("fileid")
+
+    def parse(row: List[str]) -> Optional[MediaRecord]:
+        path = _cell(row, path_pos)
+        if not path:
+            return None
+        return MediaRecord(
+            path=path,
+            size=parse_int(_cell(row, size_pos)),
+            modified=parse_timestamp(_cell(row, date_pos)),
+            sha=_cell(row, sha_pos).upper(),
+            extension=normalize_extension(_cell(row, ext_pos)),
+            drive=_cell(row, drive_pos).rstrip(":").upper(),
+            hash_kind=_cell(row, kind_pos).lower() or HASH_FULL,
+            file_id=_cell(row, id_pos),
+        )
+
+    return parse
+
+
+def folder_row_parser(columns: Dict[str, int]) -> RowParser:
+    """Parser de filas de ``inventory_by_folder.csv`` con las posiciones resueltas."""
+    sha_pos = columns.get("sha")
+    name_pos = columns["nombre"]
+    dir_pos = columns.get("ruta")
+    drive_pos = columns.get("drive", columns.get("unidad"))
+    ext_pos = columns.get("extension")
+    size_pos = columns.get("tamano")
+    date_pos = columns.get("fecha")
+    type_pos = columns.get("tipo")
+
+    def parse(row: List[str]) -> Optional[MediaRecord]:
+        name = _cell(row, name_pos)
+        if not name:
+            return None
+        directory = _cell(row, dir_pos)
+        if directory and not directory.endswith("\\"):
+            directory += "\\"
+        return MediaRecord(
+            path=directory + name,
+            size=parse_int(_cell(row, size_pos)),
+            modified=parse_timestamp(_cell(row, date_pos)),
+            sha=_cell(row, sha_pos).upper(),
+            extension=normalize_extension(_cell(row, ext_pos)),
+            drive=_cell(row, drive_pos).rstrip(":").upper(),
+            category=_cell(row, type_pos).lower(),
+        )
+
+    return parse
+
+
+def iter_index(path: pathlib.Path) -> Iterator[MediaRecord]:
+    """Recorre un CSV de índice produciendo ``MediaRecord`` sin cargarlo entero.
+
+    El formato (columnas ``Hash/Path`` o ``sha/nombre/ruta``) y la posición de
+    cada columna se resuelven una vez por archivo a partir de la cabecera.
+    """
+    with path.open("r", encoding="utf-8-sig", newline="") as handle:
+        reader = csv.reader(handle)
+        header = next(reader, None)
+        if not header:
+            return
+        columns = header_columns(header)
+        if "path" in columns:
+            parse = hash_row_parser(columns)
+        elif "nombre" in columns:
+            parse = folder_row_parser(columns)
+        else:
+            raise ValueError(f"{path} no parece un índice por hash ni por carpeta")
+        for row in reader:
+            entry = parse(row)
+            if entry is not None:
+                yield entry
+
+
+__all__ = [
+    "HASH_FULL",
+    "HASH_SAMPLED",
+    "IndexEntry",
+    "MediaRecord",
+    "RowParser",
+    "folder_row_parser",
+    "format_mb",
+    "hash_row_parser",
+    "header_columns",
+    "iter_index",
+    "media_category",
+    "normalize_extension",
+    "normalize_index_path",
+    "parse_int",
+    "parse_timestamp",
+    "spanish_decimal",
+    "spanish_int",
+]
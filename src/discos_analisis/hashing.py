@@ -0,0 +1,97 @@
+"""Hash de archivos completos por lectura en búfer o, a petición, por ``mmap``."""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import time
+
+READ_BUFFER_SSD = 1024 * 1024
+READ_BUFFER_HDD = 4 * 1024 * 1024
+# Por debajo de este tamaño abrir un mapeo cuesta más que leer.
+MMAP_MIN_SIZE = 16 * 1024 * 1024
+# Trozo que se pasa al hasher desde el mapeo; no implica copia.
+MMAP_CHUNK = 8 * 1024 * 1024
+# Un archivo modificado hace menos de esto puede estar escribiéndose aún.
+MMAP_QUIET_SECONDS = 60.0
+
+_FADVISE = hasattr(os, "posix_fadvise")
+
+
+def buffer_for(rotational: bool) -> int:
+    """Búfer de lectura por clase de dispositivo: más grande en HDD para leer en secuencia."""
+    return READ_BUFFER_HDD if rotational else READ_BUFFER_SSD
+
+
+def _advise(fd: int, advice_name: str) -> None:
+    if not _FADVISE:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, getattr(os, advice_name))
+    except (OSError, AttributeError):
+        pass
+
+
+def _hash_mmap(fd: int, size: int, digest) -> None:
+    with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+        if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        view = memoryview(mapped)
+        try:
+            for start in range(0, size, MMAP_CHUNK):
+                digest.update(view[start:start + MMAP_CHUNK])
+        finally:
+            view.release()
+
+
+def _hash_read(handle, buffer_size: int, digest) -> None:
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    while True:
+        count = handle.readinto(buffer)
+        if not count:
+            break
+        digest.update(view[:count])
+
+
+def hash_file(
+    path: str,
+    algorithm: str = "sha256",
+    buffer_size: int = READ_BUFFER_SSD,
+    use_mmap: bool = False,
+) -> str:
+    """Devuelve el hash hexadecimal en mayúsculas del archivo completo.
+
+    Se lee con ``readinto`` sobre un único búfer reutilizado. Con
+    ``use_mmap`` los archivos de al menos ``MMAP_MIN_SIZE`` se mapean en
+    memoria y se pasan al hasher como ``memoryview`` sin copiar. El mapeo
+    solo es seguro si nadie trunca el archivo mientras tanto: en POSIX leer
+    páginas que ya no existen provoca SIGBUS, que Python no puede capturar.
+    Por eso es opcional y no se usa con archivos modificados en los últimos
+    ``MMAP_QUIET_SECONDS`` segundos. Si el mapeo falla (p. ej. en unidades
+    de red) se repite por lectura. En Linux se avisa al kernel de que el
+    acceso es secuencial y, al terminar, de que esas páginas ya no hacen
+    falta, para que hashear una unidad entera no vacíe la caché de páginas.
+    """
+    with open(path, "rb", buffering=0) as handle:
+        fd = handle.fileno()
+        stat = os.fstat(fd)
+        size = stat.st_size
+        _advise(fd, "POSIX_FADV_SEQUENTIAL")
+        try:
+            if use_mmap and size >= MMAP_MIN_SIZE and time.time() - stat.st_mtime >= MMAP_QUIET_SECONDS:
+                digest = hashlib.new(algorithm)
+                try:
+                    _hash_mmap(fd, size, digest)
+                    return digest.hexdigest().upper()
+                except (OSError, ValueError, BufferError):
+                    handle.seek(0)
+            digest = hashlib.new(algorithm)
+            _hash_read(handle, buffer_size, digest)
+            return digest.hexdigest().upper()
+        finally:
+            _advise(fd, "POSIX_FADV_DONTNEED")
+
+
+__all__ = ["MMAP_MIN_SIZE", "MMAP_QUIET_SECONDS", "READ_BUFFER_HDD", "READ_BUFFER_SSD", "buffer_for", "hash_file"]
@@ -4,10 +4,15 @@ from __future__ import annotations
 
 import json
 import pathlib
-from typing import Dict, Iterable, List, Optional
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 from .constants import DEFAULT_EXTENSIONS
 
+# Carpetas distintas a recordar; en un inventario se repiten muchísimo.
+DIRECTORY_CACHE_SIZE = 65536
+
 
 def load_inventory(path: pathlib.Path) -> List[Dict[str, object]]:
     """Carga un inventario en forma de lista de diccionarios."""
@@ -37,40 +42,114 @@ def normalize_extensions(raw: Optional[str]) -> Iterable[str]:
     return values or DEFAULT_EXTENSIONS
 
 
+def _pure_directory(directory: str) -> pathlib.PurePath:
+    if directory.endswith(":"):
+        directory = directory + "\\"
+    if directory.startswith("\\\\") or ":" in directory[:3]:
+        return pathlib.PureWindowsPath(directory)
+    return pathlib.PurePath(directory)
+
+
+@lru_cache(maxsize=DIRECTORY_CACHE_SIZE)
+def normalize_directory(directory: str) -> Tuple[str, str]:
+    """Normaliza una carpeta una sola vez y devuelve ``(prefijo, separador)``.
+
+    El prefijo es la carpeta normalizada tal como queda delante de un nombre
+    simple al unirlos (``H:\\x\\``, ``/a/`` o vacío para ``.``), así que
+    la unión es una concatenación. Las carpetas con unidad (``H:``) o UNC se
+    tratan como rutas Windows aunque se ejecute en Linux; el resto sigue las
+    reglas de la plataforma.
+    """
+    path = _pure_directory(directory)
+    return str(path / "_")[:-1], "\\" if isinstance(path, pathlib.PureWindowsPath) else "/"
+
+
+def _plain_name(name: str, sep: str) -> bool:
+    """Si ``name`` es un nombre relativo simple, que se une sin normalizar."""
+    if name == "." or "/" in name:
+        return False
+    return sep == "/" or ("\\" not in name and ":" not in name)
+
+
 def combine_path(directory: str, name: str) -> str:
-    """Compone una ruta combinando directorio y nombre de archivo."""
+    """Compone una ruta combinando directorio y nombre de archivo.
+
+    Equivale a unir con ``PureWindowsPath``/``PurePath``. La carpeta se
+    normaliza con caché y, si el nombre es simple (el caso normal), la unión
+    es de cadenas; los nombres con separadores, raíz o unidad (``./a``,
+    ``/b``, ``C:\\y``) se unen con ``pathlib``.
+    """
     directory = (directory or "").strip()
     name = (name or "").strip()
     if not directory:
         return name
     if not name:
         return directory
-    if directory.endswith(":"):
-        directory = directory + "\\"
-    if directory.startswith("\\\\") or ":" in directory[:3]:
-        return str(pathlib.PureWindowsPath(directory) / name)
-    return str(pathlib.PurePath(directory) / name)
+    prefix, sep = normalize_directory(directory)
+    if _plain_name(name, sep):
+        return prefix + name
+    return str(_pure_directory(directory) / name)
 
 
-def detect_extension(row: Dict[str, object]) -> str:
-    """Intenta deducir la extensión del archivo a partir del inventario."""
+def _suffix(name: str) -> str:
+    dot = name.rfind(".")
+    if dot <= 0 or dot == len(name) - 1:
+        return ""
+    return name[dot:].lower()
+
+
+@dataclass(slots=True)
+class ResolvedRow:
+    """Campos de una fila de inventario resueltos una sola vez.
+
+    ``detect_extension``, ``build_full_path`` y ``annotation_key`` aceptan
+    esta vista en lugar de la fila para no repetir la búsqueda de claves ni
+    la composición de rutas.
+    """
+
+    row: Dict[str, object]
+    directory: str
+    name: str
+    full_path: str
+    extension: str
+    sha: str
+
+
+def resolve_row(row: Dict[str, object]) -> ResolvedRow:
+    """Resuelve carpeta, nombre, ruta completa, extensión y hash de una fila."""
+    directory = str(row.get("ruta") or row.get("dir") or row.get("path") or "").strip()
+    name = str(row.get("nombre") or row.get("name") or "").strip()
     raw = row.get("extension") or row.get("ext")
     if isinstance(raw, str) and raw.strip():
-        return "." + raw.strip().lstrip(".").lower()
-    name = row.get("nombre") or row.get("name")
-    if isinstance(name, str) and "." in name:
-        return pathlib.Path(name).suffix.lower()
-    return ""
+        extension = "." + raw.strip().lstrip(".").lower()
+    else:
+        extension = _suffix(name)
+    return ResolvedRow(
+        row=row,
+        directory=directory,
+        name=name,
+        full_path=combine_path(directory, name),
+        extension=extension,
+        sha=str(row.get("sha") or "").strip(),
+    )
+
+
+Row = Union[Dict[str, object], ResolvedRow]
+
+
+def _view(row: Row) -> ResolvedRow:
+    return row if isinstance(row, ResolvedRow) else resolve_row(row)
+
+
+def detect_extension(row: Row) -> str:
+    """Intenta deducir la extensión del archivo a partir del inventario."""
+    return _view(row).extension
 
 
-def build_full_path(row: Dict[str, object]) -> pathlib.Path:
+def build_full_path(row: Row) -> pathlib.Path:
     """Devuelve la ruta absoluta del archivo combinando carpeta y nombre."""
-    ruta = str(row.get("ruta") or row.get("dir") or row.get("path") or "").strip()
-    nombre = str(row.get("nombre") or row.get("name") or "").strip()
-    full = combine_path(ruta, nombre)
-    if not full:
-        return pathlib.Path(nombre)
-    return pathlib.Path(full)
+    view = _view(row)
+    return pathlib.Path(view.full_path or view.name)
 
 
 def read_text_preview(path: pathlib.Path, max_bytes: int) -> str:
@@ -95,7 +174,10 @@ def truncate_text(text: str, limit: int) -> str:
 __all__ = [
     "load_inventory",
     "normalize_extensions",
+    "ResolvedRow",
     "combine_path",
+    "normalize_directory",
+    "resolve_row",
     "detect_extension",
     "build_full_path",
     "read_text_preview",
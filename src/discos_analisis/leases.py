@@ -0,0 +1,335 @@
+"""Reparto del inventario en tramos del espacio de hashes mediante archivos de concesión.
+
+Cada tramo (``shard``) se reclama creando ``shard_XXXofNNN.lease`` con
+``O_EXCL`` en una carpeta compartida, de modo que varios procesos (o varias
+máquinas que ven la misma carpeta) se reparten el trabajo sin coordinador.
+La concesión caduca a los ``ttl`` segundos si no se renueva; otro trabajador
+puede entonces recuperarla, así que el tramo de un proceso caído se retoma.
+Al terminar un tramo se deja ``shard_XXXofNNN.done``.
+
+La caducidad es la fecha de modificación del archivo más el ``ttl`` que
+guarda: renovar solo actualiza esa fecha (``os.utime``), así que una
+concesión viva nunca desaparece y un ``O_EXCL`` ajeno no puede colarse.
+Recuperar una caducada y liberar se hacen con ``shard_XXXofNNN.lease.lock``
+tomado (también con ``O_EXCL``): bajo él se vuelve a leer la concesión y se
+sustituye con ``os.replace``. El dueño comprueba tras cada renovación que
+el archivo sigue siendo suyo, de modo que si otro la recuperó justo antes
+se entera en ese latido.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import pathlib
+import random
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+from .annotations import load_annotations, save_annotations
+
+DEFAULT_TTL = 900.0
+SHARD_OUTPUT = "annotations_{name}.json"
+
+
+class LeaseLost(RuntimeError):
+    """Otro trabajador recuperó la concesión (la nuestra caducó)."""
+
+
+def shard_of(key: str, shards: int) -> int:
+    """Tramo de ``key`` dentro de ``shards`` rangos iguales del espacio de hashes.
+
+    Las claves ``sha:<hex>`` usan los primeros 32 bits del propio hash, así
+    que cada tramo es un rango contiguo de SHA-256; el resto de claves se
+    reparte con un blake2b de la clave.
+    """
+    if key.startswith("sha:") and len(key) >= 12:
+        try:
+            return int(key[4:12], 16) * shards >> 32
+        except ValueError:
+            pass
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "big") * shards >> 32
+
+
+def _read_lease(path: pathlib.Path, ttl: float) -> Optional[Dict[str, object]]:
+    """Contenido de una concesión con ``expires`` calculado de su mtime.
+
+    Si aún se está escribiendo (JSON incompleto) no tiene dueño y caduca
+    con el ``ttl`` por defecto.
+    """
+    try:
+        raw = path.read_text(encoding="utf-8")
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+    try:
+        payload = json.loads(raw)
+    except ValueError:
+        payload = None
+    if not isinstance(payload, dict):
+        return {"owner": "", "expires": mtime + ttl}
+    payload["expires"] = mtime + float(payload.get("ttl") or ttl)
+    return payload
+
+
+def _expired(current: Dict[str, object]) -> bool:
+    return float(current.get("expires") or 0) <= time.time()
+
+
+def _write_exclusive(path: pathlib.Path, text: str) -> bool:
+    """Crea ``path`` con ``text`` solo si no existe."""
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w", encoding="utf-8") as handle:
+        handle.write(text)
+    return True
+
+
+def _replace(path: pathlib.Path, text: str) -> None:
+    """Sustituye ``path`` de una vez: el archivo existe en todo momento."""
+    tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+@contextlib.contextmanager
+def _guard(path: pathlib.Path, ttl: float, attempts: int = 1) -> Iterator[bool]:
+    """Cerrojo ``<concesión>.lock`` para recuperar o liberar; indica si se obtuvo.
+
+    Se sostiene milisegundos; uno más viejo que ``ttl`` es de un proceso
+    caído y se borra para que el siguiente intento lo obtenga.
+    """
+    lock = path.with_name(f"{path.name}.lock")
+    held = False
+    for attempt in range(attempts):
+        held = _write_exclusive(lock, str(os.getpid()))
+        if held:
+            break
+        try:
+            if time.time() - lock.stat().st_mtime > ttl:
+                lock.unlink(missing_ok=True)
+        except OSError:
+            pass
+        if attempt + 1 < attempts:
+            time.sleep(0.05)
+    try:
+        yield held
+    finally:
+        if held:
+            lock.unlink(missing_ok=True)
+
+
+@dataclass
+class Lease:
+    """Concesión de un tramo a un trabajador."""
+
+    directory: pathlib.Path
+    shard: int
+    shards: int
+    owner: str
+    ttl: float
+
+    @property
+    def name(self) -> str:
+        return f"shard_{self.shard:03d}of{self.shards:03d}"
+
+    @property
+    def path(self) -> pathlib.Path:
+        return self.directory / f"{self.name}.lease"
+
+    @property
+    def done_path(self) -> pathlib.Path:
+        return self.directory / f"{self.name}.done"
+
+    @property
+    def output_path(self) -> pathlib.Path:
+        return self.directory / SHARD_OUTPUT.format(name=self.name)
+
+    def _payload(self) -> str:
+        return json.dumps({"owner": self.owner, "shard": self.shard, "shards": self.shards, "ttl": self.ttl})
+
+    def _mine(self) -> bool:
+        current = _read_lease(self.path, self.ttl)
+        return current is not None and current.get("owner") == self.owner
+
+    def renew(self) -> None:
+        """Amplía la caducidad; lanza ``LeaseLost`` si la concesión ya es de otro.
+
+        El archivo no se toca salvo su mtime. La segunda lectura detecta una
+        recuperación que haya sustituido el archivo entre la primera y
+        ``utime`` (en ese caso ``utime`` solo alargó la concesión ajena).
+        """
+        if not self._mine():
+            raise LeaseLost(f"Concesión perdida: {self.name}")
+        try:
+            os.utime(self.path)
+        except FileNotFoundError:
+            raise LeaseLost(f"Concesión perdida: {self.name}") from None
+        if not self._mine():
+            raise LeaseLost(f"Concesión perdida: {self.name}")
+
+    def release(self, done: bool) -> None:
+        """Libera la concesión; con ``done`` el tramo no se volverá a reclamar."""
+        if done:
+            self.done_path.write_text(self.owner, encoding="utf-8")
+        with _guard(self.path, self.ttl, attempts=20) as held:
+            if held and self._mine():
+                self.path.unlink(missing_ok=True)
+        # Sin cerrojo la concesión se deja caducar.
+
+
+class Heartbeat:
+    """Renueva una concesión desde un hilo cada ``interval`` segundos (por defecto ``ttl / 3``).
+
+    La renovación no depende de que el trabajo avance: un tramo cuya
+    clasificación tarda no pierde la concesión. Si se pierde, ``check``
+    relanza ``LeaseLost`` en el hilo que procesa el tramo.
+    """
+
+    def __init__(self, lease: Lease, interval: Optional[float] = None) -> None:
+        self.lease = lease
+        self.interval = interval if interval is not None else lease.ttl / 3
+        self.lost: Optional[LeaseLost] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{lease.name}", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.lease.renew()
+            except LeaseLost as exc:
+                self.lost = exc
+                return
+            except OSError:
+                continue  # carpeta compartida no disponible; se reintenta en el siguiente latido
+
+    def check(self) -> None:
+        if self.lost is not None:
+            raise self.lost
+
+    def __enter__(self) -> "Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class LeaseManager:
+    """Reclama tramos libres o caducados de una carpeta compartida."""
+
+    def __init__(self, directory: pathlib.Path, shards: int, ttl: float = DEFAULT_TTL, owner: str = "") -> None:
+        if shards < 1:
+            raise ValueError("El número de tramos debe ser positivo")
+        self.directory = directory
+        self.shards = shards
+        self.ttl = ttl
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        directory.mkdir(parents=True, exist_ok=True)
+
+    def _lease(self, shard: int) -> Lease:
+        return Lease(self.directory, shard, self.shards, self.owner, self.ttl)
+
+    def _create(self, lease: Lease) -> bool:
+        return _write_exclusive(lease.path, lease._payload())
+
+    def _reclaim(self, lease: Lease) -> bool:
+        current = _read_lease(lease.path, self.ttl)
+        if current is None:
+            return self._create(lease)
+        if not _expired(current):
+            return False
+        with _guard(lease.path, self.ttl) as held:
+            if not held:
+                return False  # otro trabajador la está recuperando
+            # Bajo el cerrojo solo el dueño puede tocarla (renovando): si
+            # sigue caducada al releerla, nadie la renovó a tiempo.
+            current = _read_lease(lease.path, self.ttl)
+            if current is None:
+                return self._create(lease)
+            if not _expired(current):
+                return False
+            try:
+                _replace(lease.path, lease._payload())
+            except OSError:
+                return False
+            return True
+
+    def claim(self) -> Optional[Lease]:
+        """Primer tramo sin terminar que se pueda reclamar, empezando en un punto aleatorio."""
+        start = random.randrange(self.shards)
+        for offset in range(self.shards):
+            lease = self._lease((start + offset) % self.shards)
+            if lease.done_path.exists():
+                continue
+            if not (self._create(lease) or self._reclaim(lease)):
+                continue
+            # Otro trabajador pudo terminar el tramo entre la comprobación y la reclamación.
+            if lease.done_path.exists():
+                lease.release(done=False)
+                continue
+            return lease
+        return None
+
+    def status(self) -> List[Dict[str, object]]:
+        rows: List[Dict[str, object]] = []
+        now = time.time()
+        for shard in range(self.shards):
+            lease = self._lease(shard)
+            if lease.done_path.exists():
+                rows.append({"shard": lease.name, "state": "terminado"})
+                continue
+            current = _read_lease(lease.path, self.ttl)
+            if current is None:
+                rows.append({"shard": lease.name, "state": "libre"})
+            elif float(current.get("expires") or 0) <= now:
+                rows.append({"shard": lease.name, "state": "caducado", "owner": current.get("owner")})
+            else:
+                rows.append({"shard": lease.name, "state": "en curso", "owner": current.get("owner")})
+        return rows
+
+
+def merge_shards(directory: pathlib.Path, output: pathlib.Path, model: str = "") -> int:
+    """Une las anotaciones de cada tramo con ``output`` y lo reescribe ordenado."""
+    payload, index = load_annotations(output)
+    for shard_file in sorted(directory.glob(SHARD_OUTPUT.format(name="shard_*"))):
+        _, shard_index = load_annotations(shard_file)
+        index.update(shard_index)
+    payload["items"] = sorted(
+        index.values(),
+        key=lambda item: (
+            str(item.get("sha") or ""),
+            str(item.get("ruta") or ""),
+            str(item.get("nombre") or ""),
+        ),
+    )
+    payload["generated_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    if model:
+        payload["model"] = model
+    save_annotations(output, payload)
+    return len(index)
+
+
+__all__ = [
+    "DEFAULT_TTL",
+    "Heartbeat",
+    "Lease",
+    "LeaseLost",
+    "LeaseManager",
+    "merge_shards",
+    "shard_of",
+]
@@ -0,0 +1,323 @@
+"""Hashes perceptuales de fotos y búsqueda de casi-duplicados por distancia de Hamming.
+
+La decodificación de imágenes usa Pillow, que es opcional: solo se importa
+al calcular hashes, así que la caché, el índice de vecinos y el agrupado
+funcionan sin él.
+"""
+
+from __future__ import annotations
+
+import gzip
+import itertools
+import json
+import math
+import os
+import pathlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .hashindex import MediaRecord
+
+ALGORITHMS = ("dhash", "phash")
+DEFAULT_DISTANCE = 6
+# Subconjunto de PHOTO_EXT que Pillow decodifica sin complementos.
+DECODABLE_EXT = frozenset({".jpg", ".jpeg", ".png", ".gif", ".tif", ".tiff", ".bmp", ".webp"})
+
+
+def require_pillow():
+    """Devuelve ``PIL.Image`` o falla con un mensaje claro si Pillow no está instalado."""
+    try:
+        from PIL import Image
+    except ImportError as exc:  # pragma: no cover - depende del entorno
+        raise RuntimeError("Pillow no está instalado; ejecuta 'pip install Pillow'") from exc
+    return Image
+
+
+def _open_gray(path: str, size: Tuple[int, int]):
+    Image = require_pillow()  # nombre del módulo de Pillow
+    with Image.open(path) as image:
+        # draft() pide al decodificador JPEG una versión reducida (DCT a 1/8),
+        # mucho más barata que decodificar a tamaño completo y escalar.
+        image.draft("L", (size[0] * 8, size[1] * 8))
+        gray = image.convert("L")
+        return list(gray.resize(size, Image.BILINEAR).getdata())
+
+
+def dhash(path: str, bits: int = 8) -> int:
+    """Hash de diferencias: compara cada píxel con su vecino derecho (bits² bits)."""
+    pixels = _open_gray(path, (bits + 1, bits))
+    value = 0
+    for row in range(bits):
+        offset = row * (bits + 1)
+        for col in range(bits):
+            value = (value << 1) | (pixels[offset + col] < pixels[offset + col + 1])
+    return value
+
+
+def _dct_matrix(size: int, keep: int) -> List[List[float]]:
+    return [
+        [math.cos(math.pi * (2 * x + 1) * u / (2 * size)) for x in range(size)]
+        for u in range(keep)
+    ]
+
+
+_DCT_32 = _dct_matrix(32, 8)
+
+
+def phash(path: str) -> int:
+    """Hash perceptual por DCT: 8×8 coeficientes bajos de una imagen 32×32 frente a su mediana."""
+    pixels = _open_gray(path, (32, 32))
+    rows = [pixels[pos:pos + 32] for pos in range(0, 1024, 32)]
+    # DCT separable: primero por filas, luego por columnas, solo 8 frecuencias.
+    partial = [[sum(c * v for c, v in zip(basis, row)) for basis in _DCT_32] for row in rows]
+    coeffs = [
+        sum(_DCT_32[u][x] * partial[x][v] for x in range(32))
+        for u in range(8)
+        for v in range(8)
+    ]
+    median = sorted(coeffs[1:])[len(coeffs[1:]) // 2]
+    value = 0
+    for coeff in coeffs:
+        value = (value << 1) | (coeff > median)
+    return value
+
+
+HASHERS: Dict[str, Callable[[str], int]] = {"dhash": dhash, "phash": phash}
+
+
+def hamming(left: int, right: int) -> int:
+    return (left ^ right).bit_count()
+
+
+class FingerprintCache:
+    """Huellas calculadas, indexadas por hash de contenido y tipo de huella.
+
+    Como la clave es el SHA-256 del archivo, las copias exactas y los
+    reescaneos de otras unidades reutilizan el cálculo.
+    """
+
+    def __init__(self, path: pathlib.Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, str]] = {}
+        self.dirty = False
+        if path.exists():
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as handle:
+                    payload = json.load(handle)
+                if isinstance(payload, dict):
+                    self.entries = payload
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def get(self, sha: str, kind: str) -> Optional[str]:
+        with self._lock:
+            return self.entries.get(sha, {}).get(kind)
+
+    def put(self, sha: str, kind: str, value: str) -> None:
+        with self._lock:
+            self.entries.setdefault(sha, {})[kind] = value
+            self.dirty = True
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with self._lock, gzip.open(tmp, "wt", encoding="utf-8") as handle:
+            json.dump(self.entries, handle, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+class MultiIndexHash:
+    """Índice multi-tabla para buscar vecinos por distancia de Hamming.
+
+    Cada hash de 64 bits se parte en ``chunks`` trozos y cada trozo tiene su
+    tabla. Si dos hashes distan como mucho ``r``, por el principio del
+    palomar al menos un trozo difiere en ≤ ``r // chunks`` bits, así que basta
+    consultar en cada tabla el trozo y sus variantes con esos pocos bits
+    cambiados. Con trozos de 16 bits los cubos son pequeños y el coste por
+    consulta no crece con el número de fotos, a diferencia de un árbol BK,
+    que con 64 bits y radios de 6–10 acaba recorriendo casi todo.
+    """
+
+    def __init__(self, bits: int = 64, chunks: int = 4) -> None:
+        self.bits = bits
+        self.chunks = chunks
+        self.width = bits // chunks
+        self.mask = (1 << self.width) - 1
+        self.tables: List[Dict[int, List[int]]] = [{} for _ in range(chunks)]
+        self.values: List[int] = []
+        self.items: List[str] = []
+        self._mask_cache: Dict[int, List[int]] = {}
+
+    def _parts(self, value: int) -> Iterator[int]:
+        for chunk in range(self.chunks):
+            yield (value >> (chunk * self.width)) & self.mask
+
+    def add(self, value: int, item: str) -> None:
+        position = len(self.values)
+        self.values.append(value)
+        self.items.append(item)
+        for table, part in zip(self.tables, self._parts(value)):
+            table.setdefault(part, []).append(position)
+
+    def _masks(self, flips: int) -> List[int]:
+        masks = self._mask_cache.get(flips)
+        if masks is None:
+            masks = [0]
+            for bits in range(1, flips + 1):
+                for combo in itertools.combinations(range(self.width), bits):
+                    masks.append(sum(1 << bit for bit in combo))
+            self._mask_cache[flips] = masks
+        return masks
+
+    def search(self, value: int, radius: int) -> Iterator[Tuple[int, str]]:
+        """Elementos a distancia ≤ ``radius`` de ``value`` como ``(distancia, elemento)``."""
+        masks = self._masks(radius // self.chunks)
+        values = self.values
+        seen = set()
+        for table, part in zip(self.tables, self._parts(value)):
+            for mask in masks:
+                bucket = table.get(part ^ mask)
+                if not bucket:
+                    continue
+                for position in bucket:
+                    if position in seen:
+                        continue
+                    seen.add(position)
+                    distance = (value ^ values[position]).bit_count()
+                    if distance <= radius:
+                        yield distance, self.items[position]
+
+
+class DisjointSet:
+    """Union-find sobre hashes de contenido con compresión de caminos."""
+
+    def __init__(self) -> None:
+        self.parent: Dict[str, str] = {}
+
+    def find(self, item: str) -> str:
+        parent = self.parent
+        root = item
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while item != root:
+            parent[item], item = root, parent.get(item, item)
+        return root
+
+    def union(self, left: str, right: str) -> None:
+        left, right = self.find(left), self.find(right)
+        if left != right:
+            self.parent[max(left, right)] = min(left, right)
+
+    def components(self, items: Iterable[str]) -> List[List[str]]:
+        """Componentes con más de un elemento, cada una ordenada."""
+        members: Dict[str, List[str]] = {}
+        for item in items:
+            members.setdefault(self.find(item), []).append(item)
+        return [sorted(group) for group in members.values() if len(group) > 1]
+
+
+def _hash_worker(task: Tuple[str, str, str]) -> Tuple[str, Optional[int], str]:
+    sha, path, algo = task
+    try:
+        return sha, HASHERS[algo](path), ""
+    except Exception as exc:  # cualquier fallo de decodificación se informa
+        return sha, None, f"{type(exc).__name__}: {exc}"
+
+
+def perceptual_candidates(entries: Iterable[MediaRecord]) -> Dict[str, MediaRecord]:
+    """Una fila representativa por hash de contenido para las fotos decodificables."""
+    chosen: Dict[str, MediaRecord] = {}
+    for entry in entries:
+        if entry.sha and entry.extension.lower() in DECODABLE_EXT and entry.sha not in chosen:
+            chosen[entry.sha] = entry
+    return chosen
+
+
+def compute_hashes(
+    candidates: Dict[str, MediaRecord],
+    cache: FingerprintCache,
+    algo: str = "dhash",
+    workers: Optional[int] = None,
+    on_error: Optional[Callable[[str, str], None]] = None,
+) -> Dict[str, int]:
+    """Hash perceptual por hash de contenido; lo no cacheado se calcula en un pool de procesos."""
+    result: Dict[str, int] = {}
+    pending: List[Tuple[str, str, str]] = []
+    for sha, entry in candidates.items():
+        cached = cache.get(sha, algo)
+        if cached is not None:
+            result[sha] = int(cached, 16)
+        else:
+            pending.append((sha, entry.path, algo))
+    if not pending:
+        return result
+    require_pillow()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for sha, value, error in pool.map(_hash_worker, pending, chunksize=64):
+            if value is None:
+                if on_error:
+                    on_error(candidates[sha].path, error)
+                continue
+            result[sha] = value
+            cache.put(sha, algo, f"{value:016x}")
+    return result
+
+
+def near_duplicate_groups(hashes: Dict[str, int], radius: int = DEFAULT_DISTANCE) -> List[List[Tuple[str, int]]]:
+    """Agrupa hashes de contenido cuyos hashes perceptuales distan ≤ ``radius``.
+
+    Los vecinos se unen con union-find, así que los grupos son las
+    componentes conexas. Cada grupo va como ``[(sha, distancia al primero)]``.
+    """
+    index = MultiIndexHash()
+    for sha, value in hashes.items():
+        index.add(value, sha)
+    links = DisjointSet()
+    for sha, value in hashes.items():
+        for _, other in index.search(value, radius):
+            if other != sha:
+                links.union(sha, other)
+
+    groups: List[List[Tuple[str, int]]] = []
+    for items in links.components(hashes):
+        anchor = hashes[items[0]]
+        groups.append([(sha, hamming(anchor, hashes[sha])) for sha in items])
+    return groups
+
+
+def expand_groups(
+    groups: Sequence[List[Tuple[str, float]]],
+    entries: Iterable[MediaRecord],
+) -> Iterator[Tuple[int, float, MediaRecord]]:
+    """Filas ``(grupo, distancia o similitud, entrada)`` con todas las copias de cada hash agrupado."""
+    position: Dict[str, Tuple[int, float]] = {}
+    for number, group in enumerate(groups, start=1):
+        for sha, distance in group:
+            position[sha] = (number, distance)
+    for entry in entries:
+        found = position.get(entry.sha)
+        if found:
+            yield found[0], found[1], entry
+
+
+__all__ = [
+    "ALGORITHMS",
+    "DECODABLE_EXT",
+    "DEFAULT_DISTANCE",
+    "DisjointSet",
+    "FingerprintCache",
+    "MultiIndexHash",
+    "compute_hashes",
+    "dhash",
+    "expand_groups",
+    "hamming",
+    "near_duplicate_groups",
+    "perceptual_candidates",
+    "phash",
+    "require_pillow",
+]
@@ -0,0 +1,195 @@
+"""Tubería asíncrona por etapas con colas acotadas y métricas por etapa.
+
+Cada etapa toma elementos de su cola de entrada con hasta ``concurrency``
+tareas y deja el resultado en la cola de la siguiente. Las colas tienen
+tamaño fijo: si una etapa se atasca, las anteriores esperan (contrapresión)
+en lugar de acumular memoria. Las funciones bloqueantes (E/S de disco,
+llamadas HTTP) se ejecutan en hilos con ``asyncio.to_thread``; las rápidas
+(consultas en memoria, SQLite del hilo principal) se ejecutan en el propio
+bucle de eventos.
+
+Las métricas de cada etapa separan el tiempo ocupada, el tiempo esperando
+entrada (la etapa anterior no da abasto) y el tiempo bloqueada por la cola
+de salida llena (la siguiente no da abasto), así que el cuello de botella
+es la etapa ocupada cuyas vecinas esperan.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, List, Optional, Sequence
+
+from .constants import DEFAULT_QUEUE_SIZE
+
+# Marca de fin de flujo; cada tarea la devuelve a la cola para sus hermanas.
+_END = object()
+
+
+@dataclass
+class StageMetrics:
+    """Contadores de una etapa; los tiempos suman los de todas sus tareas."""
+
+    name: str
+    concurrency: int = 1
+    received: int = 0
+    emitted: int = 0
+    busy: float = 0.0
+    waiting: float = 0.0
+    blocked: float = 0.0
+    depth_max: int = 0
+    depth_sum: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    finished: float = 0.0
+
+    @property
+    def dropped(self) -> int:
+        return self.received - self.emitted
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def rate(self) -> float:
+        elapsed = self.elapsed
+        return self.received / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def depth_avg(self) -> float:
+        return self.depth_sum / self.received if self.received else 0.0
+
+    def line(self) -> str:
+        return (
+            f"{self.name:<14} x{self.concurrency:<2} {self.received:>7} ent {self.emitted:>7} sal "
+            f"{self.rate:9.1f}/s  cola máx {self.depth_max:>3} media {self.depth_avg:5.1f}  "
+            f"ocupada {self.busy:7.1f}s esperando {self.waiting:7.1f}s bloqueada {self.blocked:7.1f}s"
+        )
+
+
+@dataclass
+class Stage:
+    """Etapa de la tubería.
+
+    ``func`` recibe un elemento y devuelve el resultado o ``None`` para
+    descartarlo. Con ``batch_size`` recibe una lista de hasta ese tamaño
+    (lo que haya en la cola, sin esperar a llenarla) y devuelve otra lista
+    de la misma longitud.
+    """
+
+    name: str
+    func: Callable[[Any], Any]
+    concurrency: int = 1
+    queue_size: int = DEFAULT_QUEUE_SIZE
+    blocking: bool = True
+    batch_size: int = 0
+
+
+class Pipeline:
+    """Conecta un origen, varias etapas y un destino con colas acotadas."""
+
+    def __init__(self, source: Iterable[Any], stages: Sequence[Stage], sink: Callable[[Any], None]) -> None:
+        self.source = source
+        self.stages = [*stages, Stage("salida", sink, blocking=False)]
+        self.metrics: List[StageMetrics] = [StageMetrics("origen")]
+        self.metrics.extend(StageMetrics(stage.name, max(1, stage.concurrency)) for stage in self.stages)
+        self._stopped = False
+
+    def stop(self) -> None:
+        """Deja de leer del origen; lo que ya está en curso termina de procesarse."""
+        self._stopped = True
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped
+
+    async def _feed(self, outbox: asyncio.Queue) -> None:
+        metrics = self.metrics[0]
+        for item in self.source:
+            if self._stopped:
+                break
+            metrics.received += 1
+            started = time.perf_counter()
+            await outbox.put(item)
+            metrics.blocked += time.perf_counter() - started
+            metrics.emitted += 1
+        await outbox.put(_END)
+        metrics.finished = time.perf_counter()
+
+    async def _worker(
+        self,
+        stage: Stage,
+        metrics: StageMetrics,
+        inbox: asyncio.Queue,
+        outbox: Optional[asyncio.Queue],
+        alive: List[int],
+    ) -> None:
+        while True:
+            started = time.perf_counter()
+            item = await inbox.get()
+            metrics.waiting += time.perf_counter() - started
+            if item is _END:
+                await inbox.put(_END)
+                alive[0] -= 1
+                if alive[0] == 0:
+                    metrics.finished = time.perf_counter()
+                    if outbox is not None:
+                        await outbox.put(_END)
+                return
+            items = [item]
+            while len(items) < stage.batch_size:
+                try:
+                    extra = inbox.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if extra is _END:
+                    inbox.put_nowait(_END)  # la cola acaba de quedar vacía
+                    break
+                items.append(extra)
+            depth = inbox.qsize()
+            metrics.depth_max = max(metrics.depth_max, depth)
+            metrics.depth_sum += depth * len(items)
+            metrics.received += len(items)
+            started = time.perf_counter()
+            payload = items if stage.batch_size else item
+            if stage.blocking:
+                result = await asyncio.to_thread(stage.func, payload)
+            else:
+                result = stage.func(payload)
+            metrics.busy += time.perf_counter() - started
+            if outbox is None:
+                metrics.emitted += len(items)
+                continue
+            results = result if stage.batch_size else [result]
+            for value in results:
+                if value is None:
+                    continue
+                metrics.emitted += 1
+                started = time.perf_counter()
+                await outbox.put(value)
+                metrics.blocked += time.perf_counter() - started
+
+    async def run(self) -> List[StageMetrics]:
+        """Procesa todo el origen; la primera excepción de una etapa cancela el resto."""
+        queues = [asyncio.Queue(maxsize=max(1, stage.queue_size)) for stage in self.stages]
+        tasks = [asyncio.create_task(self._feed(queues[0]))]
+        for index, stage in enumerate(self.stages):
+            outbox = queues[index + 1] if index + 1 < len(queues) else None
+            metrics = self.metrics[index + 1]
+            alive = [metrics.concurrency]
+            for _ in range(metrics.concurrency):
+                tasks.append(asyncio.create_task(self._worker(stage, metrics, queues[index], outbox, alive)))
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            if task.exception() is not None:
+                raise task.exception()  # type: ignore[misc]
+        return self.metrics
+
+    def run_sync(self) -> List[StageMetrics]:
+        return asyncio.run(self.run())
+
+
+__all__ = ["DEFAULT_QUEUE_SIZE", "Pipeline", "Stage", "StageMetrics"]
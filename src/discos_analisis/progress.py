@@ -0,0 +1,252 @@
+"""Progreso de ejecuciones largas: ritmo, ETA, línea de estado y archivo de estado JSON.
+
+``Progress`` cuenta archivos y bytes desde varios hilos, calcula el ritmo
+sobre una ventana deslizante y estima el tiempo restante con los totales
+conocidos; cuando no se conocen (un recorrido de disco sin pasada previa)
+se toman del archivo de estado de la ejecución anterior con
+``previous_totals``. En un terminal muestra una sola línea que se
+reescribe como mucho cada ``interval`` segundos; fuera de un terminal
+emite una línea normal cada ``line_interval`` segundos. Con
+``status_path`` vuelca además el estado a un JSON (escritura atómica) que
+la GUI u otro proceso pueden leer sin coste.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, TextIO, Tuple
+
+DEFAULT_INTERVAL = 0.5
+DEFAULT_WINDOW = 30.0
+DEFAULT_LINE_INTERVAL = 30.0
+STATUS_INTERVAL = 1.0
+STATE_RUNNING = "en curso"
+STATE_DONE = "terminado"
+
+
+def format_count(value: int) -> str:
+    return f"{value:,}".replace(",", ".")
+
+
+def format_bytes(value: float) -> str:
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if abs(value) < 1024 or unit == "TB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TB"
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "?"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}"
+
+
+def load_status(path: pathlib.Path) -> Optional[Dict[str, object]]:
+    """Estado publicado por ``Progress`` (``None`` si no existe o está a medio escribir)."""
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def previous_totals(path: Optional[pathlib.Path]) -> Tuple[int, int]:
+    """``(archivos, bytes)`` de la última ejecución terminada que escribió ``path``."""
+    status = load_status(path) if path is not None else None
+    if not status or status.get("state") != STATE_DONE:
+        return 0, 0
+    return int(status.get("files") or 0), int(status.get("bytes") or 0)
+
+
+class Progress:
+    """Contador de avance seguro entre hilos con ritmo, ETA y salida limitada en frecuencia."""
+
+    def __init__(
+        self,
+        label: str = "",
+        total_files: int = 0,
+        total_bytes: int = 0,
+        stream: Optional[TextIO] = sys.stderr,
+        status_path: Optional[pathlib.Path] = None,
+        interval: float = DEFAULT_INTERVAL,
+        window: float = DEFAULT_WINDOW,
+        line_interval: float = DEFAULT_LINE_INTERVAL,
+        printer: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self.label = label
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.stream = stream
+        self.status_path = status_path
+        self.interval = interval
+        self.window = window
+        self.line_interval = line_interval
+        self.printer = printer
+        self.files = 0
+        self.bytes = 0
+        self.detail = ""
+        self.state = STATE_RUNNING
+        self.started = time.monotonic()
+        self.started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self._tty = bool(stream is not None and hasattr(stream, "isatty") and stream.isatty())
+        self._samples: Deque[Tuple[float, int, int]] = deque([(self.started, 0, 0)])
+        self._last_tick = 0.0
+        self._last_line = self.started
+        self._last_status = 0.0
+        self._width = 0
+        self._lock = threading.Lock()
+
+    def add(self, files: int = 1, size: int = 0, detail: str = "") -> None:
+        with self._lock:
+            self.files += files
+            self.bytes += size
+            if detail:
+                self.detail = detail
+        self.tick()
+
+    def set_total(self, files: Optional[int] = None, size: Optional[int] = None) -> None:
+        with self._lock:
+            if files is not None:
+                self.total_files = files
+            if size is not None:
+                self.total_bytes = size
+
+    def _rates(self, now: float) -> Tuple[float, float]:
+        start, files, size = self._samples[0]
+        elapsed = now - start
+        if elapsed <= 0:
+            return 0.0, 0.0
+        return (self.files - files) / elapsed, (self.bytes - size) / elapsed
+
+    def snapshot(self) -> Dict[str, object]:
+        """Estado actual como diccionario (el mismo que se escribe en el JSON)."""
+        now = time.monotonic()
+        with self._lock:
+            rate_files, rate_bytes = self._rates(now)
+            eta: Optional[float] = None
+            percent: Optional[float] = None
+            if self.total_bytes and rate_bytes > 0 and self.bytes < self.total_bytes:
+                eta = (self.total_bytes - self.bytes) / rate_bytes
+            elif self.total_files and rate_files > 0 and self.files < self.total_files:
+                eta = (self.total_files - self.files) / rate_files
+            if self.state == STATE_DONE:
+                percent, eta = 100.0, 0.0
+            elif self.total_bytes:
+                percent = min(99.9, 100.0 * self.bytes / self.total_bytes)
+            elif self.total_files:
+                percent = min(99.9, 100.0 * self.files / self.total_files)
+            return {
+                "label": self.label,
+                "state": self.state,
+                "pid": os.getpid(),
+                "started_at": self.started_at,
+                "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "elapsed": round(now - self.started, 1),
+                "files": self.files,
+                "bytes": self.bytes,
+                "total_files": self.total_files,
+                "total_bytes": self.total_bytes,
+                "percent": None if percent is None else round(percent, 1),
+                "rate_files": round(rate_files, 2),
+                "rate_bytes": round(rate_bytes, 1),
+                "eta_seconds": None if eta is None else round(eta, 1),
+                "detail": self.detail,
+            }
+
+    def render(self, snapshot: Optional[Dict[str, object]] = None) -> str:
+        status = snapshot or self.snapshot()
+        parts = [self.label] if self.label else []
+        files = format_count(int(status["files"]))
+        if status["total_files"]:
+            files += "/" + format_count(int(status["total_files"]))
+        parts.append(f"{files} archivos")
+        if status["bytes"] or status["total_bytes"]:
+            parts.append(format_bytes(float(status["bytes"])))
+        if status["percent"] is not None:
+            parts.append(f"{status['percent']:.1f}%")
+        rate = f"{float(status['rate_files']):.1f} arch/s"
+        if status["rate_bytes"]:
+            rate += f" {format_bytes(float(status['rate_bytes']))}/s"
+        parts.append(rate)
+        eta = status["eta_seconds"]
+        parts.append(f"ETA {format_duration(None if eta is None else float(eta))}")
+        return " · ".join(parts)
+
+    def tick(self, force: bool = False) -> bool:
+        """Actualiza la línea y el archivo de estado si ha pasado el intervalo; devuelve si lo hizo."""
+        now = time.monotonic()
+        if not force and now - self._last_tick < self.interval:
+            return False
+        with self._lock:
+            if not force and now - self._last_tick < self.interval:
+                return False
+            self._last_tick = now
+            self._samples.append((now, self.files, self.bytes))
+            while len(self._samples) > 2 and now - self._samples[0][0] > self.window:
+                self._samples.popleft()
+        snapshot = self.snapshot()
+        line = self.render(snapshot)
+        with self._lock:
+            if self._tty and self.stream is not None:
+                self.stream.write("\r" + line.ljust(self._width))
+                self.stream.flush()
+                self._width = len(line)
+            elif force or now - self._last_line >= self.line_interval:
+                self._last_line = now
+                if self.printer is not None:
+                    self.printer(line)
+                elif self.stream is not None:
+                    print(line, file=self.stream, flush=True)
+            if self.status_path is not None and (force or now - self._last_status >= STATUS_INTERVAL):
+                self._last_status = now
+                self._write_status(snapshot)
+        return True
+
+    def _write_status(self, snapshot: Dict[str, object]) -> None:
+        assert self.status_path is not None
+        tmp = self.status_path.with_name(f"{self.status_path.name}.{os.getpid()}.tmp")
+        try:
+            self.status_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(snapshot, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.status_path)
+        except OSError:
+            pass  # el estado es informativo; no debe interrumpir el trabajo
+
+    def clear(self) -> None:
+        """Borra la línea de estado para que otra salida no se mezcle con ella."""
+        if self._tty and self.stream is not None and self._width:
+            self.stream.write("\r" + " " * self._width + "\r")
+            self.stream.flush()
+            self._width = 0
+
+    def close(self, state: str = STATE_DONE) -> None:
+        """Marca el final, deja la última línea y escribe el estado definitivo."""
+        with self._lock:
+            self.state = state
+        self.tick(force=True)
+        if self._tty and self.stream is not None:
+            self.stream.write("\n")
+            self.stream.flush()
+            self._width = 0
+
+
+__all__ = [
+    "Progress",
+    "STATE_DONE",
+    "STATE_RUNNING",
+    "format_bytes",
+    "format_count",
+    "format_duration",
+    "load_status",
+    "previous_totals",
+]
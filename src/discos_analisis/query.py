@@ -0,0 +1,168 @@
+"""Índices en memoria para consultar inventarios por hash, ruta, tipo y rangos."""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .hashindex import MediaRecord, normalize_index_path
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+@dataclass
+class QueryResult:
+    """Página de resultados junto al total de coincidencias."""
+
+    total: int
+    offset: int
+    limit: int
+    items: List[MediaRecord]
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "total": self.total,
+            "offset": self.offset,
+            "limit": self.limit,
+            "items": [entry.to_dict() for entry in self.items],
+        }
+
+
+class InventoryIndex:
+    """Inventario cargado una vez con índices secundarios.
+
+    Las filas se guardan ordenadas por ruta, así que su posición sirve de
+    identificador y un prefijo de ruta es un rango contiguo localizable con
+    ``bisect``. Hash, unidad, extensión y categoría tienen listas invertidas
+    de posiciones (ya ordenadas); el índice por hash solo recoge hashes
+    completos, no huellas muestreadas. Tamaño y fecha tienen permutaciones
+    ordenadas para resolver rangos. Cada consulta parte del candidato más
+    selectivo y lo interseca con el resto.
+    """
+
+    def __init__(self, entries: Iterable[MediaRecord], version: str = "") -> None:
+        rows = sorted(entries, key=lambda entry: normalize_index_path(entry.path))
+        self.entries: List[MediaRecord] = rows
+        self.keys: List[str] = [normalize_index_path(entry.path) for entry in rows]
+        self.by_hash: Dict[str, List[int]] = {}
+        self.by_drive: Dict[str, List[int]] = {}
+        self.by_extension: Dict[str, List[int]] = {}
+        self.by_category: Dict[str, List[int]] = {}
+        for position, entry in enumerate(rows):
+            if entry.verified:
+                self.by_hash.setdefault(entry.sha, []).append(position)
+            self.by_drive.setdefault(entry.drive, []).append(position)
+            self.by_extension.setdefault(entry.extension, []).append(position)
+            self.by_category.setdefault(entry.category, []).append(position)
+        self.size_order: List[int] = sorted(range(len(rows)), key=lambda pos: rows[pos].size)
+        self.sizes: List[int] = [rows[pos].size for pos in self.size_order]
+        self.date_order: List[int] = sorted(range(len(rows)), key=lambda pos: rows[pos].modified)
+        self.dates: List[str] = [rows[pos].modified for pos in self.date_order]
+        self.version = version or hashlib.sha1(str(len(rows)).encode("utf-8")).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _prefix_range(self, prefix: str) -> range:
+        key = normalize_index_path(prefix)
+        lo = bisect.bisect_left(self.keys, key)
+        hi = bisect.bisect_left(self.keys, key + "\uffff", lo)
+        return range(lo, hi)
+
+    @staticmethod
+    def _slice(order: List[int], values: list, low, high) -> List[int]:
+        lo = 0 if low is None else bisect.bisect_left(values, low)
+        hi = len(values) if high is None else bisect.bisect_right(values, high)
+        return order[lo:hi]
+
+    def query(
+        self,
+        sha: Optional[str] = None,
+        prefix: Optional[str] = None,
+        extension: Optional[str] = None,
+        category: Optional[str] = None,
+        drive: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        offset: int = 0,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> QueryResult:
+        """Devuelve la página pedida de filas que cumplen todos los filtros."""
+        offset = max(0, offset)
+        limit = max(0, min(limit, MAX_PAGE_SIZE))
+        if extension:
+            extension = "." + extension.lower().lstrip(".")
+        if drive:
+            drive = drive.rstrip(":\\").upper()
+        if until and len(until) == 10:
+            until += "T23:59:59"
+
+        candidates: List[Sequence[int]] = []
+        # Cortes de las permutaciones por tamaño o fecha: los únicos candidatos
+        # que no están en orden de posición.
+        unordered: List[List[int]] = []
+        if sha:
+            candidates.append(self.by_hash.get(sha.upper(), []))
+        if prefix:
+            candidates.append(self._prefix_range(prefix))
+        if extension:
+            candidates.append(self.by_extension.get(extension, []))
+        if category:
+            candidates.append(self.by_category.get(category.lower(), []))
+        if drive:
+            candidates.append(self.by_drive.get(drive, []))
+        if min_size is not None or max_size is not None:
+            unordered.append(self._slice(self.size_order, self.sizes, min_size, max_size))
+            candidates.append(unordered[-1])
+        if since or until:
+            unordered.append(self._slice(self.date_order, self.dates, since or None, until or None))
+            candidates.append(unordered[-1])
+        if not candidates:
+            candidates.append(range(len(self.entries)))
+
+        candidates.sort(key=len)
+        base = candidates[0]
+        if len(candidates) == 1:
+            positions: Sequence[int] = sorted(base) if any(base is cut for cut in unordered) else base
+        else:
+            # Intersección en C partiendo del candidato más pequeño; los rangos
+            # (prefijo de ruta) se comprueban por pertenencia, que es O(1).
+            selected = set(base)
+            for other in candidates[1:]:
+                if isinstance(other, range):
+                    selected = {pos for pos in selected if pos in other}
+                else:
+                    selected.intersection_update(other)
+                if not selected:
+                    break
+            positions = sorted(selected)
+        page = [self.entries[pos] for pos in positions[offset:offset + limit]]
+        return QueryResult(total=len(positions), offset=offset, limit=limit, items=page)
+
+    def stats(self) -> Dict[str, object]:
+        """Totales globales y por unidad/categoría."""
+        per_drive: Counter[str] = Counter()
+        for drive, positions in self.by_drive.items():
+            per_drive[drive] = sum(self.entries[pos].size for pos in positions)
+        return {
+            "files": len(self.entries),
+            "bytes": sum(self.sizes),
+            "hashes": len(self.by_hash),
+            "duplicateGroups": sum(1 for positions in self.by_hash.values() if len(positions) > 1),
+            "drives": {
+                drive: {"files": len(positions), "bytes": per_drive[drive]}
+                for drive, positions in sorted(self.by_drive.items())
+            },
+            "categories": {
+                name: len(positions) for name, positions in sorted(self.by_category.items())
+            },
+        }
+
+
+__all__ = ["DEFAULT_PAGE_SIZE", "MAX_PAGE_SIZE", "InventoryIndex", "QueryResult"]
@@ -0,0 +1,258 @@
+"""Planificador de espacio recuperable entre unidades según políticas de retención."""
+
+from __future__ import annotations
+
+import csv
+import fnmatch
+import heapq
+import os
+import pathlib
+import shutil
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .hashindex import MediaRecord
+from .hashing import hash_file
+
+ACTIONS = ("move", "delete")
+DEFAULT_DRIVE_ORDER = ("H", "I", "J")
+DEFAULT_PREFER_FOLDERS = ("Media_Final",)
+DEFAULT_AVOID = ("_quarantine*", "duplicados")
+DEFAULT_QUARANTINE = "duplicados"
+PLAN_FIELDS = ["Action", "Hash", "Bytes", "SourcePath", "DestPath", "KeepPath"]
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """Decide qué copia de cada grupo se conserva.
+
+    El orden de preferencia es: copias fuera de carpetas a evitar
+    (``_quarantine_*``), después las que están dentro de una carpeta
+    preferida (por posición en ``prefer_folders``), después la unidad según
+    ``drive_order`` y por último la ruta, para que el resultado sea estable.
+    """
+
+    drive_order: Tuple[str, ...] = DEFAULT_DRIVE_ORDER
+    prefer_folders: Tuple[str, ...] = DEFAULT_PREFER_FOLDERS
+    avoid: Tuple[str, ...] = DEFAULT_AVOID
+    action: str = "move"
+    quarantine: str = DEFAULT_QUARANTINE
+    _drive_rank: Dict[str, int] = field(init=False, repr=False, compare=False)
+    _folders: Tuple[str, ...] = field(init=False, repr=False, compare=False)
+    _avoid: Tuple[str, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.action not in ACTIONS:
+            raise ValueError(f"Acción desconocida: {self.action}")
+        # Normalización resuelta una vez; keep_key se llama por cada fila.
+        object.__setattr__(self, "_drive_rank", {d.upper().rstrip(":"): i for i, d in enumerate(self.drive_order)})
+        object.__setattr__(self, "_folders", tuple(name.lower() for name in self.prefer_folders))
+        object.__setattr__(self, "_avoid", tuple(pattern.lower() for pattern in self.avoid))
+
+    def is_avoided(self, path: str) -> bool:
+        parts = path.lower().split("\\")[1:-1]
+        return any(fnmatch.fnmatchcase(part, pattern) for part in parts for pattern in self._avoid)
+
+    def folder_rank(self, path: str) -> int:
+        parts = path.lower().split("\\")[1:-1]
+        for rank, name in enumerate(self._folders):
+            if name in parts:
+                return rank
+        return len(self._folders)
+
+    def keep_key(self, entry: MediaRecord) -> Tuple[int, int, int, str]:
+        return (
+            1 if self.is_avoided(entry.path) else 0,
+            self.folder_rank(entry.path),
+            self._drive_rank.get(entry.drive, len(self._drive_rank)),
+            entry.path.lower(),
+        )
+
+    def destination(self, entry: MediaRecord) -> str:
+        """Ruta en la carpeta de cuarentena de la misma unidad, como Move-I-Duplicates.ps1."""
+        if self.action != "move":
+            return ""
+        drive, _, rest = entry.path.partition(":\\")
+        return f"{drive}:\\{self.quarantine}\\{rest}"
+
+
+@dataclass
+class PlanStep:
+    """Copia sobrante de un grupo y qué hacer con ella."""
+
+    action: str
+    sha: str
+    size: int
+    source: str
+    destination: str
+    keep: str
+
+    def to_row(self) -> List[object]:
+        return [self.action, self.sha, self.size, self.source, self.destination, self.keep]
+
+
+@dataclass
+class ReclaimReport:
+    """Totales recuperables y los mayores grupos/carpetas (top-N con montículo)."""
+
+    groups: int = 0
+    copies: int = 0
+    reclaimable: int = 0
+    by_drive: Counter = field(default_factory=Counter)
+    by_folder: Counter = field(default_factory=Counter)
+    top_groups: List[Tuple[int, str, int]] = field(default_factory=list)
+
+    def top_folders(self, limit: int) -> List[Tuple[str, int]]:
+        return heapq.nlargest(limit, self.by_folder.items(), key=lambda item: item[1])
+
+    def largest_groups(self) -> List[Tuple[int, str, int]]:
+        return sorted(self.top_groups, reverse=True)
+
+
+def group_by_hash(entries: Iterable[MediaRecord]) -> Iterator[List[MediaRecord]]:
+    """Agrupa por hash y devuelve solo los grupos con más de una copia.
+
+    Solo cuentan los hashes completos: una huella muestreada no confirma que
+    dos archivos sean iguales y el plan nunca debe retirar una copia por ella.
+    """
+    grouped: Dict[str, List[MediaRecord]] = {}
+    for entry in entries:
+        if entry.verified:
+            grouped.setdefault(entry.sha, []).append(entry)
+    for members in grouped.values():
+        if len(members) > 1:
+            yield members
+
+
+def plan_reclaim(
+    groups: Iterable[Sequence[MediaRecord]],
+    policy: RetentionPolicy,
+    report: ReclaimReport,
+    top: int = 20,
+) -> Iterator[PlanStep]:
+    """Genera los pasos del plan y rellena ``report`` al vuelo.
+
+    No se ordena nada globalmente: cada grupo elige su copia con ``min`` y
+    los mayores grupos se mantienen en un montículo de tamaño ``top``.
+    """
+    for members in groups:
+        keeper = min(members, key=policy.keep_key)
+        freed = 0
+        for entry in members:
+            if entry is keeper:
+                continue
+            freed += entry.size
+            report.copies += 1
+            report.by_drive[entry.drive] += entry.size
+            report.by_folder[entry.directory] += entry.size
+            yield PlanStep(policy.action, entry.sha, entry.size, entry.path, policy.destination(entry), keeper.path)
+        report.groups += 1
+        report.reclaimable += freed
+        item = (freed, keeper.sha, len(members))
+        if len(report.top_groups) < top:
+            heapq.heappush(report.top_groups, item)
+        elif top and item > report.top_groups[0]:
+            heapq.heapreplace(report.top_groups, item)
+
+
+def write_plan(steps: Iterable[PlanStep], target: pathlib.Path) -> int:
+    """Escribe el plan CSV en streaming y devuelve el número de pasos."""
+    count = 0
+    with target.open("w", encoding="utf-8-sig", newline="") as handle:
+        writer = csv.writer(handle, quoting=csv.QUOTE_ALL)
+        writer.writerow(PLAN_FIELDS)
+        for step in steps:
+            writer.writerow(step.to_row())
+            count += 1
+    return count
+
+
+def read_plan(source: pathlib.Path) -> Iterator[PlanStep]:
+    with source.open("r", encoding="utf-8-sig", newline="") as handle:
+        for row in csv.DictReader(handle):
+            yield PlanStep(
+                action=row["Action"],
+                sha=row["Hash"],
+                size=int(row["Bytes"] or 0),
+                source=row["SourcePath"],
+                destination=row["DestPath"],
+                keep=row["KeepPath"],
+            )
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return -1
+
+
+def apply_step(step: PlanStep, dry_run: bool = False, verify: bool = False) -> str:
+    """Ejecuta un paso; nunca toca la copia origen si la conservada ya no existe.
+
+    Si el tamaño de la copia conservada o de la origen ya no coincide con el
+    del plan (el archivo cambió desde que se indexó) el paso se salta. Con
+    ``verify`` se vuelve a calcular el hash de la conservada antes de borrar.
+    """
+    if not os.path.exists(step.keep):
+        return "sin-copia-conservada"
+    if not os.path.exists(step.source):
+        return "no-existe"
+    if _size(step.keep) != step.size or _size(step.source) != step.size:
+        return "tamano-distinto"
+    if dry_run:
+        return "simulado"
+    if step.action == "delete":
+        if verify and hash_file(step.keep).upper() != step.sha.upper():
+            return "hash-distinto"
+        os.remove(step.source)
+        return "borrado"
+    if os.path.exists(step.destination):
+        return "destino-existe"
+    os.makedirs(os.path.dirname(step.destination), exist_ok=True)
+    shutil.move(step.source, step.destination)
+    return "movido"
+
+
+def apply_plan(
+    steps: Iterable[PlanStep],
+    log_path: Optional[pathlib.Path] = None,
+    dry_run: bool = False,
+    verify: bool = False,
+) -> Counter:
+    """Ejecuta el plan completo y devuelve el recuento de resultados."""
+    results: Counter = Counter()
+    handle = log_path.open("w", encoding="utf-8-sig", newline="") if log_path else None
+    try:
+        writer = csv.writer(handle, quoting=csv.QUOTE_ALL) if handle else None
+        if writer:
+            writer.writerow(PLAN_FIELDS + ["Result"])
+        for step in steps:
+            try:
+                outcome = apply_step(step, dry_run, verify)
+            except OSError as exc:
+                outcome = f"error: {exc}"
+            results[outcome.split(":", 1)[0]] += 1
+            if outcome in ("movido", "borrado"):
+                results["bytes"] += step.size
+            if writer:
+                writer.writerow(step.to_row() + [outcome])
+    finally:
+        if handle:
+            handle.close()
+    return results
+
+
+__all__ = [
+    "ACTIONS",
+    "PlanStep",
+    "ReclaimReport",
+    "RetentionPolicy",
+    "apply_plan",
+    "apply_step",
+    "group_by_hash",
+    "plan_reclaim",
+    "read_plan",
+    "write_plan",
+]
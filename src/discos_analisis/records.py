@@ -0,0 +1,386 @@
+"""Conversión en streaming entre formatos de inventario.
+
+Formatos soportados:
+
+``index``
+    ``index_by_hash.csv`` de ``tools/reindex_hij.py`` (``Hash,Path,...,HashKind,FileId``).
+``folder``
+    ``inventory_by_folder.csv`` (``sha,tipo,extension,nombre,ruta,unidad,drive,tamano,fecha``).
+``listado``
+    ``listado_archivos.csv`` de PowerShell (``FullName,Length,LastWriteTime``).
+``inventory``
+    ``data/inventory.json``: lista de ``{"path","size","ext","modified"}``.
+``gui``
+    ``data/inventory.json.gz`` del GUI: ``{"generated_at", "items": [{"path","hash","algo","timestamp"}]}``.
+
+Los lectores resuelven la correspondencia de campos una vez por archivo (con
+la cabecera del CSV o las claves del primer objeto JSON) y producen
+``MediaRecord`` (el modelo de ``hashindex``) de uno en uno; los escritores
+consumen iteradores, así que convertir inventarios de millones de filas no
+carga nada entero en memoria.
+"""
+
+from __future__ import annotations
+
+import csv
+import datetime as dt
+import gzip
+import io
+import json
+import operator
+import pathlib
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from .hashindex import (
+    MediaRecord,
+    RowParser,
+    folder_row_parser,
+    format_mb,
+    hash_row_parser,
+    header_columns,
+    normalize_extension,
+    parse_int,
+    parse_timestamp,
+)
+
+FORMATS = ("folder", "gui", "index", "inventory", "listado")
+JSON_CHUNK = 1 << 16
+# El nivel 9 por defecto de gzip es bastante más lento y apenas reduce el tamaño.
+GZIP_LEVEL = 6
+_ITEMS_KEY = re.compile(r'"(?:items|data)"\s*:\s*\[')
+
+
+def _picker(columns: Dict[str, int], *specs: Tuple[str, ...]) -> Callable[[List[str]], Tuple[str, ...]]:
+    """``itemgetter`` resuelto una vez por archivo: un campo por ``spec`` (primer nombre presente).
+
+    Las columnas ausentes apuntan a la celda vacía que ``iter_records`` añade
+    al final de cada fila, así que el parser no comprueba nada por fila.
+    """
+    positions = [next((columns[name] for name in names if name in columns), -1) for names in specs]
+    return operator.itemgetter(*positions)
+
+
+def _listado_parser(columns: Dict[str, int]) -> RowParser:
+    fields = _picker(columns, ("fullname", "path"), ("length",), ("lastwritetime",))
+
+    def parse(row: List[str]) -> Optional[MediaRecord]:
+        full, size, date = fields(row)
+        full = full.strip()
+        if not full:
+            return None
+        return MediaRecord(path=full, size=parse_int(size), modified=parse_timestamp(date))
+
+    return parse
+
+
+# Índice y carpetas usan los mismos parsers que ``hashindex.iter_index``.
+CSV_PARSERS: Dict[str, Callable[[Dict[str, int]], RowParser]] = {
+    "folder": folder_row_parser,
+    "index": hash_row_parser,
+    "listado": _listado_parser,
+}
+
+
+def _csv_format(columns: Dict[str, int]) -> str:
+    if "nombre" in columns:
+        return "folder"
+    if "fullname" in columns:
+        return "listado"
+    if "path" in columns:
+        return "index"
+    raise ValueError("Cabecera CSV no reconocida")
+
+
+def iter_json_items(handle: TextIO, chunk_size: int = JSON_CHUNK) -> Iterator[Dict[str, object]]:
+    """Recorre los objetos de una lista JSON (o de su clave ``items``/``data``) sin cargarla entera.
+
+    Se decodifica objeto a objeto con ``raw_decode`` sobre un búfer que se
+    recorta al avanzar, así que la memoria depende del objeto más grande y
+    no del archivo.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    eof = False
+    pos = -1
+    while pos < 0:
+        chunk = handle.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+        stripped = buffer.lstrip()
+        if stripped.startswith("["):
+            pos = len(buffer) - len(stripped) + 1
+        elif stripped.startswith("{"):
+            match = _ITEMS_KEY.search(buffer)
+            if match:
+                pos = match.end()
+            elif eof:
+                return
+        elif eof or stripped:
+            if stripped:
+                raise ValueError("El JSON no contiene una lista de elementos")
+            return
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buffer):
+            if buffer[pos] == "]":
+                return
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                pass  # Objeto cortado al final del búfer: leer más.
+            else:
+                if isinstance(item, dict):
+                    yield item
+                continue
+        if eof:
+            raise ValueError("Lista JSON incompleta")
+        chunk = handle.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+def _json_parser(sample: Dict[str, object]) -> Callable[[Dict[str, object]], Optional[MediaRecord]]:
+    """Parser para objetos JSON con las claves resueltas a partir del primero."""
+
+    def pick(*names: str) -> Optional[str]:
+        return next((name for name in names if name in sample), None)
+
+    path_key = pick("path", "fullname", "ruta")
+    name_key = pick("nombre", "name") if path_key in (None, "ruta") else None
+    size_key = pick("size", "length", "tamano", "bytes")
+    date_key = pick("modified", "lastwrite", "fecha", "mtime")
+    sha_key = pick("hash", "sha", "sha256")
+    ext_key = pick("ext", "extension")
+    algo_key = pick("algo")
+    stamp_key = pick("timestamp")
+
+    def parse(item: Dict[str, object]) -> Optional[MediaRecord]:
+        full = str(item.get(path_key) or "").strip() if path_key else ""
+        if name_key:
+            base = str(item.get(name_key) or "").strip()
+            if full and base:
+                full = full if full.endswith("\\") else full + "\\"
+            full += base
+        if not full:
+            return None
+        size = item.get(size_key) if size_key else 0
+        stamp = item.get(stamp_key) if stamp_key else 0
+        return MediaRecord(
+            path=full,
+            size=size if isinstance(size, int) else parse_int(str(size or "0")),
+            modified=parse_timestamp(str(item.get(date_key) or "")) if date_key else "",
+            sha=str(item.get(sha_key) or "").upper() if sha_key else "",
+            algo=str(item.get(algo_key) or "sha256") if algo_key else "sha256",
+            extension=normalize_extension(str(item.get(ext_key) or "")) if ext_key else "",
+            hashed_at=float(stamp) if isinstance(stamp, (int, float)) else 0.0,
+        )
+
+    return parse
+
+
+def _open_text(path: pathlib.Path, mode: str) -> TextIO:
+    if path.suffix.lower() == ".gz":
+        raw = gzip.open(path, mode + "b", compresslevel=GZIP_LEVEL)
+        return io.TextIOWrapper(raw, encoding="utf-8-sig" if mode == "r" else "utf-8")
+    if mode == "r":
+        return path.open("r", encoding="utf-8-sig", newline="")
+    return path.open("w", encoding="utf-8", newline="")
+
+
+def detect_format(path: pathlib.Path) -> str:
+    """Formato a partir de la extensión y, en CSV, de la cabecera."""
+    suffixes = "".join(path.suffixes[-2:]).lower()
+    if suffixes.endswith(".json.gz"):
+        return "gui"
+    if suffixes.endswith(".json"):
+        return "inventory"
+    if path.exists():
+        with _open_text(path, "r") as handle:
+            header = next(csv.reader(handle), None)
+        if header:
+            return _csv_format(header_columns(header))
+    name = path.name.lower()
+    if "listado" in name:
+        return "listado"
+    if "folder" in name:
+        return "folder"
+    return "index"
+
+
+def iter_records(path: pathlib.Path, fmt: Optional[str] = None) -> Iterator[MediaRecord]:
+    """Recorre cualquier inventario soportado produciendo ``MediaRecord``."""
+    fmt = fmt or detect_format(path)
+    with _open_text(path, "r") as handle:
+        if fmt in ("gui", "inventory"):
+            parse = None
+            for item in iter_json_items(handle):
+                parse = parse or _json_parser(item)
+                record = parse(item)
+                if record is not None:
+                    yield record
+            return
+        reader = csv.reader(handle)
+        header = next(reader, None)
+        if not header:
+            return
+        columns = header_columns(header)
+        width = len(header)
+        parse_row = CSV_PARSERS[fmt if fmt in CSV_PARSERS else _csv_format(columns)](columns)
+        for row in reader:
+            if len(row) != width:
+                row = (row + [""] * width)[:width]
+            row.append("")
+            record = parse_row(row)
+            if record is not None:
+                yield record
+
+
+def _stamp(modified: str, pattern: str) -> str:
+    if not modified:
+        return ""
+    try:
+        return dt.datetime.fromisoformat(modified).strftime(pattern)
+    except ValueError:
+        return modified
+
+
+def _write_index(records: Iterable[MediaRecord], handle: TextIO) -> int:
+    writer = csv.writer(handle)
+    writer.writerow(["Hash", "Path", "Drive", "Extension", "Length", "MB", "LastWrite", "HashKind", "FileId"])
+    count = 0
+    for record in records:
+        writer.writerow([
+            record.sha,
+            record.path,
+            record.drive,
+            record.extension or "(sin)",
+            record.size,
+            format_mb(record.size),
+            _stamp(record.modified, "%d/%m/%Y %H:%M:%S"),
+            record.hash_kind,
+            record.file_id,
+        ])
+        count += 1
+    return count
+
+
+def _write_folder(records: Iterable[MediaRecord], handle: TextIO) -> int:
+    writer = csv.writer(handle, quoting=csv.QUOTE_ALL)
+    writer.writerow(["sha", "tipo", "extension", "nombre", "ruta", "unidad", "drive", "tamano", "fecha"])
+    count = 0
+    for record in records:
+        directory = record.directory
+        if directory and not directory.endswith("\\"):
+            directory += "\\"
+        unit = f"{record.drive}:" if record.drive else ""
+        writer.writerow([
+            record.sha,
+            record.category,
+            record.extension.lstrip("."),
+            record.name,
+            directory,
+            unit,
+            unit,
+            record.size,
+            record.modified + "Z" if record.modified else "",
+        ])
+        count += 1
+    return count
+
+
+def _write_listado(records: Iterable[MediaRecord], handle: TextIO) -> int:
+    handle.write("\ufeff")
+    writer = csv.writer(handle, quoting=csv.QUOTE_ALL)
+    writer.writerow(["FullName", "Length", "LastWriteTime"])
+    count = 0
+    for record in records:
+        writer.writerow([record.path, record.size, _stamp(record.modified, "%d/%m/%Y %H:%M:%S")])
+        count += 1
+    return count
+
+
+def _write_json_items(items: Iterable[Dict[str, object]], handle: TextIO) -> int:
+    count = 0
+    for item in items:
+        handle.write(",\n  " if count else "\n  ")
+        handle.write(json.dumps(item, ensure_ascii=False))
+        count += 1
+    handle.write("\n" if count else "")
+    return count
+
+
+def _write_inventory(records: Iterable[MediaRecord], handle: TextIO) -> int:
+    handle.write("[")
+    count = _write_json_items(
+        (
+            {
+                "path": record.path,
+                "size": record.size,
+                "ext": record.extension,
+                "modified": record.modified + "Z" if record.modified else "",
+            }
+            for record in records
+        ),
+        handle,
+    )
+    handle.write("]\n")
+    return count
+
+
+def _write_gui(records: Iterable[MediaRecord], handle: TextIO) -> int:
+    generated = dt.datetime.now().isoformat(timespec="seconds")
+    handle.write(f'{{"generated_at": {json.dumps(generated)}, "items": [')
+    count = _write_json_items(
+        (
+            {"path": record.path, "hash": record.sha, "algo": record.algo, "timestamp": record.hashed_at}
+            for record in records
+            if record.sha
+        ),
+        handle,
+    )
+    handle.write("]}\n")
+    return count
+
+
+WRITERS: Dict[str, Callable[[Iterable[MediaRecord], TextIO], int]] = {
+    "folder": _write_folder,
+    "gui": _write_gui,
+    "index": _write_index,
+    "inventory": _write_inventory,
+    "listado": _write_listado,
+}
+
+
+def write_records(records: Iterable[MediaRecord], target: pathlib.Path, fmt: Optional[str] = None) -> int:
+    """Escribe ``records`` en ``target`` (formato por extensión si no se indica) y devuelve cuántos."""
+    fmt = fmt or detect_format(target)
+    tmp = target.with_name(f"{target.stem}.tmp{target.suffix}")
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with _open_text(tmp, "w") as handle:
+        count = WRITERS[fmt](records, handle)
+    tmp.replace(target)
+    return count
+
+
+def convert(
+    source: pathlib.Path,
+    target: pathlib.Path,
+    source_format: Optional[str] = None,
+    target_format: Optional[str] = None,
+) -> int:
+    """Convierte un inventario a otro formato fila a fila, con memoria constante."""
+    return write_records(iter_records(source, source_format), target, target_format)
+
+
+__all__ = [
+    "FORMATS",
+    "MediaRecord",
+    "convert",
+    "detect_format",
+    "iter_json_items",
+    "iter_records",
+    "write_records",
+]
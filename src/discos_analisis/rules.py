@@ -0,0 +1,166 @@
+"""Reglas de preclasificación por extensión, glob y expresión regular.
+
+Todas las condiciones se compilan en una única expresión regular con una
+alternativa por regla (dentro de una anticipación anclada al inicio), de
+modo que una sola búsqueda devuelve la primera regla, en orden, que
+coincide con la ruta. La ruta se compara con ``/`` como separador y sin
+distinguir mayúsculas.
+
+Formato del archivo de reglas (JSON)::
+
+    {
+      "replace_defaults": false,
+      "rules": [
+        {"name": "scripts", "category": "codigo", "extensions": [".py"],
+         "globs": ["*/scripts/*"], "regex": ["\\\\.ps1\\\\.txt$"]}
+      ]
+    }
+
+Las reglas del archivo se evalúan antes que las predefinidas. Se aplican
+también a archivos fuera de ``--extensions`` (p. ej. multimedia o copias
+``.bak``), que sin regla no se clasifican porque su contenido no es legible.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import json
+import pathlib
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .constants import AUDIO_EXT, PHOTO_EXT, VIDEO_EXT
+
+CODE_EXT = {
+    ".py", ".ps1", ".psm1", ".psd1", ".bat", ".cmd", ".sh", ".bash", ".zsh", ".js", ".ts",
+    ".java", ".cs", ".cpp", ".c", ".h", ".hpp", ".rb", ".php", ".go", ".rs", ".sql",
+}
+BACKUP_EXT = {".bak", ".old", ".orig", ".bkp"}
+
+# ``(?i)`` al inicio de un patrón es global; dentro de la expresión combinada se reescribe como ``(?i:...)``.
+_GLOBAL_FLAGS = re.compile(r"\A\(\?([imsx]+)\)")
+
+
+@dataclass(frozen=True)
+class Rule:
+    """Regla: si la ruta cumple alguna condición, la fila recibe ``category``."""
+
+    name: str
+    category: str
+    extensions: frozenset = field(default_factory=frozenset)
+    globs: tuple = ()
+    regex: tuple = ()
+
+    def pattern(self) -> str:
+        """Alternativa de esta regla para la expresión combinada (busca desde el inicio)."""
+        options: List[str] = []
+        if self.extensions:
+            suffixes = "|".join(sorted(re.escape(ext.lower().lstrip(".")) for ext in self.extensions))
+            options.append(rf".*\.(?:{suffixes})\Z")
+        for glob in self.globs:
+            options.append(fnmatch.translate(glob.replace("\\", "/")))
+        for regex in self.regex:
+            re.compile(regex)  # error claro con el patrón original si no es válido
+            flags = _GLOBAL_FLAGS.match(regex)
+            if flags:
+                regex = f"(?{flags.group(1)}:{regex[flags.end():]})"
+            options.append(rf".*?(?:{regex})")
+        return "|".join(f"(?:{option})" for option in options)
+
+
+DEFAULT_RULES = (
+    Rule(
+        "backup",
+        "backup",
+        frozenset(BACKUP_EXT),
+        ("*/_backup_*/*", "*/backup/*", "*/backups/*"),
+        (r"\.bak(?:\.[^/]*)?\Z",),
+    ),
+    Rule("codigo", "codigo", frozenset(CODE_EXT)),
+    Rule("multimedia", "multimedia", frozenset(VIDEO_EXT | PHOTO_EXT | AUDIO_EXT)),
+)
+
+
+class RuleEngine:
+    """Todas las reglas compiladas en un único patrón, con estadísticas de uso."""
+
+    def __init__(self, rules: Sequence[Rule], categories: Optional[Iterable[str]] = None) -> None:
+        allowed = set(categories) if categories is not None else None
+        self.rules = [rule for rule in rules if allowed is None or rule.category in allowed]
+        self.stats: Counter = Counter()
+        patterns = [rule.pattern() for rule in self.rules]
+        alternatives = [f"(?=(?P<r{index}>{pattern}))" for index, pattern in enumerate(patterns) if pattern]
+        self._matcher = re.compile("|".join(alternatives), re.IGNORECASE | re.DOTALL) if alternatives else None
+
+    def _find(self, path: str) -> Optional[Rule]:
+        if self._matcher is None:
+            return None
+        found = self._matcher.match(path.replace("\\", "/"))
+        if found is None or found.lastgroup is None:
+            return None
+        return self.rules[int(found.lastgroup[1:])]
+
+    def covers(self, path: str) -> bool:
+        """Si alguna regla cumple ``path``, sin contarla como aplicada."""
+        return self._find(path) is not None
+
+    def match(self, path: str) -> Optional[Rule]:
+        """Primera regla que cumple ``path`` (o ``None``); cuenta la regla aplicada."""
+        rule = self._find(path)
+        if rule is not None:
+            self.stats[rule.name] += 1
+        return rule
+
+    @property
+    def saved(self) -> int:
+        """Llamadas al modelo evitadas por las reglas."""
+        return sum(self.stats.values())
+
+    def summary(self) -> str:
+        detail = ", ".join(f"{name}={count}" for name, count in self.stats.most_common())
+        return f"{self.saved} llamadas evitadas por reglas" + (f" ({detail})" if detail else "")
+
+
+def _rule_from_json(payload: Dict[str, object]) -> Rule:
+    name = str(payload.get("name") or "").strip()
+    category = str(payload.get("category") or "").strip().lower()
+    if not name or not category:
+        raise ValueError(f"Regla sin 'name' o 'category': {payload}")
+    extensions = frozenset(
+        "." + str(ext).strip().lower().lstrip(".") for ext in payload.get("extensions") or [] if str(ext).strip()
+    )
+    return Rule(
+        name,
+        category,
+        extensions,
+        tuple(str(glob) for glob in payload.get("globs") or []),
+        tuple(str(regex) for regex in payload.get("regex") or []),
+    )
+
+
+def load_rules(path: Optional[pathlib.Path] = None, use_defaults: bool = True) -> List[Rule]:
+    """Reglas del archivo ``path`` (si se indica) seguidas de las predefinidas."""
+    rules: List[Rule] = []
+    replace = False
+    if path is not None:
+        with path.open("r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+        if isinstance(payload, list):
+            payload = {"rules": payload}
+        replace = bool(payload.get("replace_defaults"))
+        rules.extend(_rule_from_json(item) for item in payload.get("rules") or [])
+    if use_defaults and not replace:
+        rules.extend(DEFAULT_RULES)
+    return rules
+
+
+__all__ = [
+    "BACKUP_EXT",
+    "CODE_EXT",
+    "DEFAULT_RULES",
+    "Rule",
+    "RuleEngine",
+    "load_rules",
+]
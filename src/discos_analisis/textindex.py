@@ -0,0 +1,298 @@
+"""Índice invertido de nombres y carpetas con búsqueda por prefijo, subcadena y aproximada."""
+
+from __future__ import annotations
+
+import bisect
+import gzip
+import json
+import pathlib
+import re
+import struct
+import unicodedata
+from array import array
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set
+
+MAGIC = b"DAIX2\n"
+MODES = ("prefix", "substring", "fuzzy")
+_TOKEN = re.compile(r"[0-9a-z]+")
+_HEADER = struct.Struct("<IIIIIII")
+
+
+def fold(text: str) -> str:
+    """Pasa a minúsculas sin acentos: "Cómo" → "como", "FOTOS FAMILIA" → "fotos familia"."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return stripped.casefold()
+
+
+def tokenize(text: str) -> List[str]:
+    """Divide un texto normalizado en palabras alfanuméricas."""
+    return _TOKEN.findall(fold(text))
+
+
+def path_tokens(path: str) -> Set[str]:
+    """Palabras del nombre y de cada carpeta de una ruta (sin la letra de unidad)."""
+    normalized = path.replace("/", "\\")
+    if normalized[1:2] == ":":
+        normalized = normalized[2:]
+    return set(tokenize(normalized.replace("\\", " ")))
+
+
+def trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[pos:pos + 3] for pos in range(len(padded) - 2)}
+
+
+def _encode_postings(doc_ids: Sequence[int]) -> bytes:
+    out = bytearray()
+    previous = 0
+    for doc_id in doc_ids:
+        delta = doc_id - previous
+        previous = doc_id
+        while delta >= 0x80:
+            out.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        out.append(delta)
+    return bytes(out)
+
+
+def _decode_postings(blob: bytes, start: int, end: int) -> List[int]:
+    values: List[int] = []
+    current = 0
+    shift = 0
+    delta = 0
+    for pos in range(start, end):
+        byte = blob[pos]
+        delta |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        current += delta
+        values.append(current)
+        delta = 0
+        shift = 0
+    return values
+
+
+def bounded_distance(left: str, right: str, limit: int) -> int:
+    """Distancia de Levenshtein que abandona en cuanto supera ``limit``."""
+    if abs(len(left) - len(right)) > limit:
+        return limit + 1
+    previous = list(range(len(right) + 1))
+    for row, char in enumerate(left, start=1):
+        current = [row]
+        best = row
+        for col, other in enumerate(right, start=1):
+            cost = 0 if char == other else 1
+            value = min(previous[col] + 1, current[col - 1] + 1, previous[col - 1] + cost)
+            current.append(value)
+            best = min(best, value)
+        if best > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class TextIndex:
+    """Índice invertido palabra → documentos, con trigramas sobre el vocabulario.
+
+    Los documentos son rutas únicas. Tanto las listas palabra → documentos
+    como trigrama → palabras se guardan codificadas (delta + varint) y solo
+    se decodifican las que toca cada consulta, así que cargar el índice no
+    depende del tamaño del vocabulario más allá de leer los bloques.
+    """
+
+    def __init__(
+        self,
+        paths: List[str],
+        vocab: List[str],
+        offsets: array,
+        blob: bytes,
+        grams: List[str],
+        gram_offsets: array,
+        gram_blob: bytes,
+    ) -> None:
+        self.paths = paths
+        self.vocab = vocab
+        self.offsets = offsets
+        self.blob = blob
+        self.grams = {gram: position for position, gram in enumerate(grams)}
+        self.gram_list = grams
+        self.gram_offsets = gram_offsets
+        self.gram_blob = gram_blob
+
+    @classmethod
+    def build(cls, paths: Iterable[str]) -> "TextIndex":
+        unique = sorted(set(paths), key=str.lower)
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for doc_id, path in enumerate(unique):
+            for token in path_tokens(path):
+                postings[token].append(doc_id)
+        vocab = sorted(postings)
+        offsets = array("Q", [0])
+        blob = bytearray()
+        by_gram: Dict[str, List[int]] = defaultdict(list)
+        for token_id, token in enumerate(vocab):
+            blob += _encode_postings(postings[token])
+            offsets.append(len(blob))
+            for gram in trigrams(token):
+                by_gram[gram].append(token_id)
+        grams = sorted(by_gram)
+        gram_offsets = array("Q", [0])
+        gram_blob = bytearray()
+        for gram in grams:
+            gram_blob += _encode_postings(by_gram[gram])
+            gram_offsets.append(len(gram_blob))
+        return cls(unique, vocab, offsets, bytes(blob), grams, gram_offsets, bytes(gram_blob))
+
+    def save(self, path: pathlib.Path) -> None:
+        """Guarda el índice comprimido: cabecera, rutas, vocabulario, trigramas y postings."""
+        sections = [
+            "\n".join(self.paths).encode("utf-8"),
+            "\n".join(self.vocab).encode("utf-8"),
+            self.offsets.tobytes(),
+            self.blob,
+            "\n".join(self.gram_list).encode("utf-8"),
+            self.gram_offsets.tobytes(),
+            self.gram_blob,
+        ]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, "wb", compresslevel=6) as handle:
+            handle.write(MAGIC)
+            handle.write(_HEADER.pack(*(len(section) for section in sections)))
+            for section in sections:
+                handle.write(section)
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "TextIndex":
+        with gzip.open(path, "rb") as handle:
+            if handle.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} no es un índice de nombres válido")
+            sizes = _HEADER.unpack(handle.read(_HEADER.size))
+            sections = [handle.read(size) for size in sizes]
+
+        def lines(raw: bytes) -> List[str]:
+            return raw.decode("utf-8").split("\n") if raw else []
+
+        def offsets(raw: bytes) -> array:
+            values = array("Q")
+            values.frombytes(raw)
+            return values
+
+        return cls(
+            lines(sections[0]),
+            lines(sections[1]),
+            offsets(sections[2]),
+            sections[3],
+            lines(sections[4]),
+            offsets(sections[5]),
+            sections[6],
+        )
+
+    def postings(self, token_id: int) -> List[int]:
+        return _decode_postings(self.blob, self.offsets[token_id], self.offsets[token_id + 1])
+
+    def gram_tokens(self, gram: str) -> List[int]:
+        position = self.grams.get(gram)
+        if position is None:
+            return []
+        return _decode_postings(self.gram_blob, self.gram_offsets[position], self.gram_offsets[position + 1])
+
+    def match_tokens(self, term: str, mode: str = "prefix") -> List[int]:
+        """Identificadores de vocabulario que casan con ``term`` según ``mode``."""
+        if mode == "prefix":
+            lo = bisect.bisect_left(self.vocab, term)
+            hi = bisect.bisect_left(self.vocab, term + "\uffff", lo)
+            return list(range(lo, hi))
+        if mode == "substring":
+            inner = {term[pos:pos + 3] for pos in range(len(term) - 2)}
+            if not inner:
+                return [tid for tid, token in enumerate(self.vocab) if term in token]
+            lists = sorted((self.gram_tokens(gram) for gram in inner), key=len)
+            candidates = set(lists[0])
+            for other in lists[1:]:
+                candidates.intersection_update(other)
+            return sorted(tid for tid in candidates if term in self.vocab[tid])
+        if mode == "fuzzy":
+            limit = max(1, len(term) // 4)
+            query_grams = trigrams(term)
+            shared: Dict[int, int] = defaultdict(int)
+            for gram in query_grams:
+                for tid in self.gram_tokens(gram):
+                    shared[tid] += 1
+            # Cada edición destruye como mucho 3 trigramas.
+            needed = max(1, len(query_grams) - 3 * limit)
+            return sorted(
+                tid
+                for tid, count in shared.items()
+                if count >= needed and bounded_distance(term, self.vocab[tid], limit) <= limit
+            )
+        raise ValueError(f"Modo de búsqueda desconocido: {mode}")
+
+    def search(self, query: str, mode: str = "prefix", limit: Optional[int] = 50) -> List[str]:
+        """Rutas que contienen todas las palabras de ``query`` (AND)."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        result: Optional[Set[int]] = None
+        for term in sorted(terms, key=len, reverse=True):
+            docs: Set[int] = set()
+            for token_id in self.match_tokens(term, mode):
+                docs.update(self.postings(token_id))
+            result = docs if result is None else result & docs
+            if not result:
+                return []
+        ordered = sorted(result or ())
+        if limit is not None:
+            ordered = ordered[:limit]
+        return [self.paths[doc_id] for doc_id in ordered]
+
+    def export_shards(self, target: pathlib.Path, docs_per_shard: int = 50000) -> int:
+        """Exporta el índice como JSON fragmentado para el visor estático.
+
+        ``tokens/<xx>.json`` agrupa las palabras por sus dos primeros
+        caracteres y ``docs/<n>.json`` contiene rutas por bloques, de modo que
+        el navegador solo descarga los fragmentos que toca la búsqueda.
+        Devuelve el número de archivos escritos.
+        """
+        (target / "tokens").mkdir(parents=True, exist_ok=True)
+        (target / "docs").mkdir(parents=True, exist_ok=True)
+        shards: Dict[str, Dict[str, List[int]]] = defaultdict(dict)
+        for token_id, token in enumerate(self.vocab):
+            shards[token[:2]][token] = self.postings(token_id)
+        written = 0
+        for key, payload in shards.items():
+            with (target / "tokens" / f"{key}.json").open("w", encoding="utf-8") as handle:
+                json.dump(payload, handle, separators=(",", ":"))
+            written += 1
+        chunks = range(0, len(self.paths), docs_per_shard)
+        for number, start in enumerate(chunks):
+            with (target / "docs" / f"{number}.json").open("w", encoding="utf-8") as handle:
+                json.dump(self.paths[start:start + docs_per_shard], handle, ensure_ascii=False)
+            written += 1
+        manifest = {
+            "docs": len(self.paths),
+            "docsPerShard": docs_per_shard,
+            "tokenShards": sorted(shards),
+            "normalization": "nfkd-sin-acentos-minusculas",
+        }
+        with (target / "manifest.json").open("w", encoding="utf-8") as handle:
+            json.dump(manifest, handle, indent=2)
+        return written + 1
+
+    def iter_stats(self) -> Iterator[str]:
+        yield f"Documentos: {len(self.paths)}"
+        yield f"Palabras: {len(self.vocab)}"
+        yield f"Postings: {len(self.blob)} bytes"
+
+
+__all__ = [
+    "MODES",
+    "TextIndex",
+    "bounded_distance",
+    "fold",
+    "path_tokens",
+    "tokenize",
+    "trigrams",
+]
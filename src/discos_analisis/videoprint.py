@@ -0,0 +1,234 @@
+"""Huellas de vídeo por muestreo para encontrar copias remultiplexadas entre unidades.
+
+No se decodifica el vídeo: se leen unas pocas ventanas de bytes en
+posiciones proporcionales del archivo y se extraen fragmentos anclados en
+los códigos de inicio MPEG (``00 00 01``). Esos fragmentos pertenecen al
+flujo elemental, así que sobreviven a cambiar de contenedor (``.m2ts`` →
+``.mpg``) aunque cambien cabeceras, tamaño y posiciones absolutas. La
+huella es un resumen *bottom-k* de los fragmentos, que estima la similitud
+de Jaccard entre dos vídeos comparando solo ``k`` valores.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import os
+import shutil
+import subprocess
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .constants import VIDEO_EXT
+from .hashindex import MediaRecord
+from .perceptual import DisjointSet, FingerprintCache
+from .scheduler import map_bounded
+
+FINGERPRINT_KIND = "video"
+DEFAULT_WINDOWS = 8
+DEFAULT_WINDOW_SIZE = 512 * 1024
+DEFAULT_SKETCH = 32
+DEFAULT_SIMILARITY = 0.35
+DEFAULT_SIZE_TOLERANCE = 0.25
+DEFAULT_DURATION_TOLERANCE = 2.0
+START_CODE = b"\x00\x00\x01"
+SHINGLE = 24
+# Limita el trabajo por ventana en flujos con muchísimos códigos de inicio.
+MAX_ANCHORS = 4096
+# Valores compartidos por demasiados vídeos (cabeceras de una misma cámara)
+# no discriminan y harían cuadrática la generación de candidatos.
+MAX_POSTING = 500
+
+
+@dataclass
+class VideoPrint:
+    """Huella compacta: tamaño, duración (si se conoce) y resumen bottom-k."""
+
+    size: int
+    duration: Optional[float]
+    sketch: Tuple[int, ...]
+
+    def encode(self) -> str:
+        duration = "" if self.duration is None else f"{self.duration:.2f}"
+        return f"{self.size};{duration};" + "".join(f"{value:016x}" for value in self.sketch)
+
+    @classmethod
+    def decode(cls, raw: str) -> "VideoPrint":
+        size, duration, blob = raw.split(";", 2)
+        sketch = tuple(int(blob[pos:pos + 16], 16) for pos in range(0, len(blob), 16))
+        return cls(int(size), float(duration) if duration else None, sketch)
+
+
+def window_offsets(size: int, windows: int = DEFAULT_WINDOWS, window_size: int = DEFAULT_WINDOW_SIZE) -> List[int]:
+    """Inicios de ventana en el centro de ``windows`` tramos iguales del archivo."""
+    if size <= windows * window_size:
+        return [0]
+    span = size - window_size
+    return [int(span * (index + 0.5) / windows) for index in range(windows)]
+
+
+def _shingles(data: bytes, found: Set[int]) -> None:
+    anchors = 0
+    pos = data.find(START_CODE)
+    while pos != -1 and anchors < MAX_ANCHORS:
+        chunk = data[pos + 3:pos + 3 + SHINGLE]
+        if len(chunk) == SHINGLE:
+            digest = hashlib.blake2b(chunk, digest_size=8).digest()
+            found.add(int.from_bytes(digest, "big"))
+            anchors += 1
+        pos = data.find(START_CODE, pos + 3)
+    if anchors < 8:
+        # Sin códigos de inicio (p. ej. MP4 con NAL por longitud): bloques fijos.
+        for start in range(0, len(data) - SHINGLE + 1, 4096):
+            digest = hashlib.blake2b(data[start:start + SHINGLE], digest_size=8).digest()
+            found.add(int.from_bytes(digest, "big"))
+
+
+def probe_duration(path: str) -> Optional[float]:
+    """Duración en segundos vía ``ffprobe`` si está instalado; ``None`` si no."""
+    ffprobe = shutil.which("ffprobe")
+    if not ffprobe:
+        return None
+    try:
+        completed = subprocess.run(
+            [ffprobe, "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+            capture_output=True,
+            text=True,
+            timeout=30,
+            check=False,
+        )
+        return float(completed.stdout.strip())
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+
+def fingerprint_video(
+    path: str,
+    windows: int = DEFAULT_WINDOWS,
+    window_size: int = DEFAULT_WINDOW_SIZE,
+    sketch_size: int = DEFAULT_SKETCH,
+    with_duration: bool = True,
+) -> VideoPrint:
+    """Lee ``windows`` ventanas (unos pocos MB en total) y calcula la huella."""
+    size = os.path.getsize(path)
+    found: Set[int] = set()
+    with open(path, "rb", buffering=0) as handle:
+        for offset in window_offsets(size, windows, window_size):
+            handle.seek(offset)
+            _shingles(handle.read(window_size), found)
+    sketch = tuple(heapq.nsmallest(sketch_size, found))
+    return VideoPrint(size, probe_duration(path) if with_duration else None, sketch)
+
+
+def similarity(left: VideoPrint, right: VideoPrint) -> float:
+    """Estimación de Jaccard con resúmenes bottom-k."""
+    if not left.sketch or not right.sketch:
+        return 0.0
+    k = min(len(left.sketch), len(right.sketch))
+    union = heapq.nsmallest(k, set(left.sketch) | set(right.sketch))
+    both = set(left.sketch) & set(right.sketch)
+    return sum(1 for value in union if value in both) / k
+
+
+def compatible(left: VideoPrint, right: VideoPrint, size_tolerance: float, duration_tolerance: float) -> bool:
+    """Misma duración (si ambas se conocen) o tamaños dentro de la tolerancia relativa."""
+    if left.duration is not None and right.duration is not None:
+        return abs(left.duration - right.duration) <= duration_tolerance
+    larger = max(left.size, right.size) or 1
+    return abs(left.size - right.size) / larger <= size_tolerance
+
+
+def video_candidates(entries: Iterable[MediaRecord]) -> Dict[str, MediaRecord]:
+    """Una fila representativa por hash de contenido para cada vídeo."""
+    chosen: Dict[str, MediaRecord] = {}
+    for entry in entries:
+        if entry.sha and entry.extension.lower() in VIDEO_EXT and entry.sha not in chosen:
+            chosen[entry.sha] = entry
+    return chosen
+
+
+def compute_prints(
+    candidates: Dict[str, MediaRecord],
+    cache: FingerprintCache,
+    readers: int = 4,
+    with_duration: bool = True,
+    on_error: Optional[Callable[[str, str], None]] = None,
+) -> Dict[str, VideoPrint]:
+    """Huella por hash de contenido; las no cacheadas se leen con ``readers`` hilos."""
+    result: Dict[str, VideoPrint] = {}
+    pending: List[str] = []
+    for sha in candidates:
+        cached = cache.get(sha, FINGERPRINT_KIND)
+        if cached is not None:
+            result[sha] = VideoPrint.decode(cached)
+        else:
+            pending.append(sha)
+
+    def job(sha: str) -> Tuple[str, Optional[VideoPrint], str]:
+        try:
+            return sha, fingerprint_video(candidates[sha].path, with_duration=with_duration), ""
+        except OSError as exc:
+            return sha, None, str(exc)
+
+    for sha, found, error in map_bounded(job, pending, readers):
+        if found is None:
+            if on_error:
+                on_error(candidates[sha].path, error)
+            continue
+        result[sha] = found
+        cache.put(sha, FINGERPRINT_KIND, found.encode())
+    return result
+
+
+def video_groups(
+    prints: Dict[str, VideoPrint],
+    threshold: float = DEFAULT_SIMILARITY,
+    size_tolerance: float = DEFAULT_SIZE_TOLERANCE,
+    duration_tolerance: float = DEFAULT_DURATION_TOLERANCE,
+) -> List[List[Tuple[str, float]]]:
+    """Agrupa vídeos compatibles en tamaño/duración con huellas parecidas.
+
+    Solo se comparan pares que comparten algún valor del resumen (índice
+    invertido valor → vídeos), así que el coste depende de los candidatos
+    reales y no de todas las parejas posibles.
+    """
+    postings: Dict[int, List[str]] = defaultdict(list)
+    for sha, found in prints.items():
+        for value in found.sketch:
+            postings[value].append(sha)
+    links = DisjointSet()
+    checked: Set[Tuple[str, str]] = set()
+    for members in postings.values():
+        if len(members) < 2 or len(members) > MAX_POSTING:
+            continue
+        for pos, left in enumerate(members):
+            for right in members[pos + 1:]:
+                pair = (left, right) if left < right else (right, left)
+                if pair in checked:
+                    continue
+                checked.add(pair)
+                a, b = prints[left], prints[right]
+                if compatible(a, b, size_tolerance, duration_tolerance) and similarity(a, b) >= threshold:
+                    links.union(left, right)
+
+    groups: List[List[Tuple[str, float]]] = []
+    for items in links.components(prints):
+        anchor = prints[items[0]]
+        groups.append([(sha, round(similarity(anchor, prints[sha]), 3)) for sha in items])
+    return groups
+
+
+__all__ = [
+    "DEFAULT_SIMILARITY",
+    "FINGERPRINT_KIND",
+    "VideoPrint",
+    "compatible",
+    "compute_prints",
+    "fingerprint_video",
+    "probe_duration",
+    "similarity",
+    "video_candidates",
+    "video_groups",
+    "window_offsets",
+]
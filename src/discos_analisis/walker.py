@@ -0,0 +1,213 @@
+"""Recorrido concurrente de directorios con poda temprana."""
+
+from __future__ import annotations
+
+import fnmatch
+import os
+import queue
+import re
+import threading
+from typing import Callable, Iterable, Iterator, List, Optional, Pattern, Tuple
+
+from .scheduler import inode_order_key
+
+DEFAULT_WALKERS = 4
+
+# Nombres de carpeta (en mayúsculas) que nunca se recorren.
+DEFAULT_SKIP_NAMES = frozenset(
+    {
+        "SYSTEM VOLUME INFORMATION",
+        "$RECYCLE.BIN",
+        "_QUARANTINE_FROM_HIJ",
+        "_QUARANTINE",
+    }
+)
+_FOUND_DIR = re.compile(r"FOUND\.\d+\Z", re.IGNORECASE)
+
+FileEntry = Tuple[str, os.stat_result]
+ErrorHandler = Callable[[str, OSError], None]
+
+_DONE = object()
+
+
+class _Failure:
+    """Excepción de un hilo de recorrido, entregada al consumidor para relanzarla."""
+
+    __slots__ = ("exc",)
+
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
+
+
+def compile_excludes(patterns: Iterable[str]) -> Tuple[Optional[Pattern[str]], Optional[Pattern[str]]]:
+    """Compila patrones glob en dos expresiones: por nombre y por ruta completa.
+
+    Los patrones con separador (``\\`` o ``/``) se comparan con la ruta; el
+    resto, solo con el nombre de la entrada. Ambas comparaciones ignoran
+    mayúsculas.
+    """
+    by_name: List[str] = []
+    by_path: List[str] = []
+    for raw in patterns:
+        pattern = raw.strip()
+        if not pattern:
+            continue
+        if "\\" in pattern or "/" in pattern:
+            by_path.append(fnmatch.translate(pattern.replace("\\", "/")))
+        else:
+            by_name.append(fnmatch.translate(pattern))
+    name_re = re.compile("|".join(by_name), re.IGNORECASE) if by_name else None
+    path_re = re.compile("|".join(by_path), re.IGNORECASE) if by_path else None
+    return name_re, path_re
+
+
+class ParallelWalker:
+    """Enumera varios directorios a la vez trabajando con ``os.DirEntry``.
+
+    Las entradas se producen como tuplas ``(ruta, stat)`` donde ``stat`` es
+    el obtenido durante ``scandir`` (gratuito en Windows), de modo que el
+    consumidor no necesita volver a inspeccionar el archivo. Los archivos de
+    cada carpeta se entregan juntos y ordenados por inode cuando es posible.
+    Las carpetas de ``skip_names`` y, con ellas, las ``FOUND.nnn`` de chkdsk
+    no se recorren; con ``skip_names`` vacío se recorre todo, como ``os.walk``.
+    """
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WALKERS,
+        skip_names: Iterable[str] = DEFAULT_SKIP_NAMES,
+        exclude: Iterable[str] = (),
+        on_error: Optional[ErrorHandler] = None,
+        max_buffered: int = 64,
+    ) -> None:
+        self.workers = max(1, workers)
+        self.skip_names = frozenset(name.upper() for name in skip_names)
+        self._skip_found = bool(self.skip_names)
+        self.exclude_name, self.exclude_path = compile_excludes(exclude)
+        self.on_error = on_error
+        self.max_buffered = max(1, max_buffered)
+
+    def _excluded(self, entry: os.DirEntry) -> bool:
+        if self.exclude_name is not None and self.exclude_name.match(entry.name):
+            return True
+        if self.exclude_path is not None and self.exclude_path.match(entry.path.replace("\\", "/")):
+            return True
+        return False
+
+    def _skip_dir(self, entry: os.DirEntry) -> bool:
+        name = entry.name
+        if name.upper() in self.skip_names or (self._skip_found and _FOUND_DIR.match(name)):
+            return True
+        return self._excluded(entry)
+
+    def _error(self, path: str, exc: OSError) -> None:
+        if self.on_error is not None:
+            self.on_error(path, exc)
+
+    def scan(self, directory: str, strict: bool = False) -> Tuple[List[str], List[FileEntry]]:
+        """Lee un único directorio y devuelve (subcarpetas, archivos con stat).
+
+        Si no se puede abrir el directorio se notifica a ``on_error`` y se
+        devuelve vacío; con ``strict`` además se relanza, para que quien
+        compara con un estado anterior no lo tome por una carpeta vacía.
+        """
+        subdirs: List[str] = []
+        files: List[Tuple[os.DirEntry, os.stat_result]] = []
+        try:
+            with os.scandir(directory) as iterator:
+                for entry in iterator:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not self._skip_dir(entry):
+                                subdirs.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            if not self._excluded(entry):
+                                files.append((entry, entry.stat(follow_symlinks=False)))
+                    except OSError as exc:
+                        self._error(entry.path, exc)
+        except OSError as exc:
+            self._error(directory, exc)
+            if strict:
+                raise
+        files.sort(key=lambda item: inode_order_key(item[0]))
+        return subdirs, [(entry.path, stat) for entry, stat in files]
+
+    def walk(self, root: str) -> Iterator[FileEntry]:
+        """Recorre ``root`` con ``workers`` hilos y produce ``(ruta, stat)``."""
+        root = os.fspath(root)
+        if self.workers == 1:
+            stack = [root]
+            while stack:
+                subdirs, files = self.scan(stack.pop())
+                stack.extend(subdirs)
+                yield from files
+            return
+
+        directories: "queue.Queue[Optional[str]]" = queue.Queue()
+        results: "queue.Queue[object]" = queue.Queue(maxsize=self.max_buffered)
+        stop = threading.Event()
+        pending = [1]
+        lock = threading.Lock()
+
+        def emit(item: object) -> bool:
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def worker() -> None:
+            while True:
+                directory = directories.get()
+                if directory is None or stop.is_set():
+                    return
+                # Cada carpeta tomada se descuenta siempre; si no, un fallo
+                # dejaría al consumidor esperando un _DONE que nunca llega.
+                try:
+                    subdirs, files = self.scan(directory)
+                    with lock:
+                        pending[0] += len(subdirs)
+                    for subdir in subdirs:
+                        directories.put(subdir)
+                    if files and not emit(files):
+                        return
+                except BaseException as exc:
+                    emit(_Failure(exc))
+                    return
+                finally:
+                    with lock:
+                        pending[0] -= 1
+                        finished = pending[0] == 0
+                    if finished:
+                        emit(_DONE)
+
+        threads = [
+            threading.Thread(target=worker, name=f"walker-{index}", daemon=True)
+            for index in range(self.workers)
+        ]
+        directories.put(root)
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                batch = results.get()
+                if batch is _DONE:
+                    break
+                if isinstance(batch, _Failure):
+                    raise batch.exc
+                yield from batch  # type: ignore[misc]
+        finally:
+            stop.set()
+            for _ in threads:
+                directories.put(None)
+
+
+__all__ = [
+    "DEFAULT_SKIP_NAMES",
+    "DEFAULT_WALKERS",
+    "FileEntry",
+    "ParallelWalker",
+    "compile_excludes",
+]
@@ -0,0 +1,57 @@
+"""Comparación con la instantánea: carpetas ilegibles y archivos movidos."""
+
+from __future__ import annotations
+
+import os
+import pathlib
+
+import pytest
+
+from discos_analisis.changes import DiffStats, build_snapshot, diff_tree
+
+
+def _touch_dir(path: pathlib.Path) -> None:
+    """Adelanta el mtime de la carpeta para que ``diff_tree`` la vuelva a listar."""
+    stamp = path.stat().st_mtime + 10
+    os.utime(path, (stamp, stamp))
+
+
+def test_unreadable_changed_directory_keeps_previous_state(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    locked = tmp_path / "bloqueada"
+    (locked / "sub").mkdir(parents=True)
+    (locked / "a.txt").write_text("a", encoding="utf-8")
+    (locked / "sub" / "b.txt").write_text("b", encoding="utf-8")
+    snapshot = build_snapshot(str(tmp_path))
+    _touch_dir(locked)
+
+    scandir = os.scandir
+
+    def failing_scandir(path):
+        if os.fspath(path) == str(locked):
+            raise PermissionError(13, "Acceso denegado", str(path))
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", failing_scandir)
+    stats = DiffStats()
+    changes, current = diff_tree(snapshot, stats=stats)
+    assert changes == []
+    assert stats.unreadable == 1
+    assert current.dirs[str(locked)] == snapshot.dirs[str(locked)]
+    assert str(locked / "sub") in current.dirs
+
+    monkeypatch.setattr(os, "scandir", scandir)
+    (locked / "a.txt").unlink()
+    _touch_dir(locked)
+    changes, _ = diff_tree(current)
+    assert [(change.kind, change.path) for change in changes] == [("removed", str(locked / "a.txt"))]
+
+
+def test_renamed_file_is_reported_as_moved(tmp_path: pathlib.Path) -> None:
+    (tmp_path / "viejo.bin").write_bytes(b"x" * 100)
+    snapshot = build_snapshot(str(tmp_path))
+    (tmp_path / "viejo.bin").rename(tmp_path / "nuevo.bin")
+    _touch_dir(tmp_path)
+    changes, _ = diff_tree(snapshot, hasher=lambda path: pathlib.Path(path).read_bytes().hex())
+    assert [(change.kind, change.old_path) for change in changes] == [("moved", str(tmp_path / "viejo.bin"))]
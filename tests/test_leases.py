@@ -0,0 +1,96 @@
+"""Concesiones de tramos: exclusividad al reclamar, renovar y recuperar."""
+
+from __future__ import annotations
+
+import os
+import pathlib
+import threading
+import time
+from typing import List
+
+import pytest
+
+from discos_analisis.leases import LeaseLost, LeaseManager
+
+
+def _expire(path: pathlib.Path) -> None:
+    old = time.time() - 3600
+    os.utime(path, (old, old))
+
+
+def test_claim_while_renewing_never_steals_live_lease(tmp_path: pathlib.Path) -> None:
+    owner = LeaseManager(tmp_path, 1, ttl=30, owner="A")
+    lease = owner.claim()
+    assert lease is not None
+    stolen: List[str] = []
+    errors: List[BaseException] = []
+    stop = threading.Event()
+
+    def renew() -> None:
+        try:
+            while not stop.is_set():
+                lease.renew()
+        except BaseException as exc:  # se comprueba abajo
+            errors.append(exc)
+
+    def claim(name: str) -> None:
+        manager = LeaseManager(tmp_path, 1, ttl=30, owner=name)
+        while not stop.is_set():
+            if manager.claim() is not None:
+                stolen.append(name)
+
+    threads = [threading.Thread(target=renew)]
+    threads += [threading.Thread(target=claim, args=(f"B{index}",)) for index in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.5)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert not stolen
+    lease.renew()
+
+
+def test_expired_lease_is_reclaimed_by_exactly_one_worker(tmp_path: pathlib.Path) -> None:
+    lease = LeaseManager(tmp_path, 1, ttl=30, owner="A").claim()
+    assert lease is not None
+    _expire(lease.path)
+    winners: List[str] = []
+    barrier = threading.Barrier(8)
+
+    def claim(name: str) -> None:
+        manager = LeaseManager(tmp_path, 1, ttl=30, owner=name)
+        barrier.wait()
+        if manager.claim() is not None:
+            winners.append(name)
+
+    threads = [threading.Thread(target=claim, args=(f"B{index}",)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(winners) == 1
+    with pytest.raises(LeaseLost):
+        lease.renew()
+
+
+def test_renewed_lease_is_not_reclaimed(tmp_path: pathlib.Path) -> None:
+    lease = LeaseManager(tmp_path, 1, ttl=30, owner="A").claim()
+    assert lease is not None
+    _expire(lease.path)
+    lease.renew()
+    assert LeaseManager(tmp_path, 1, ttl=30, owner="B").claim() is None
+
+
+def test_claim_skips_shard_finished_during_claim(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    manager = LeaseManager(tmp_path, 1, ttl=30, owner="B")
+    create = LeaseManager._create
+
+    def finish_then_create(self: LeaseManager, lease) -> bool:
+        lease.done_path.write_text("A", encoding="utf-8")
+        return create(self, lease)
+
+    monkeypatch.setattr(LeaseManager, "_create", finish_then_create)
+    assert manager.claim() is None
+    assert not (tmp_path / "shard_000of001.lease").exists()
@@ -0,0 +1,115 @@
+"""Plan de recuperación: qué copia se conserva y cuándo ``apply`` se niega a tocar archivos."""
+
+from __future__ import annotations
+
+import hashlib
+import pathlib
+
+from discos_analisis.hashindex import HASH_SAMPLED, MediaRecord
+from discos_analisis.reclaim import (
+    PlanStep,
+    ReclaimReport,
+    RetentionPolicy,
+    apply_plan,
+    apply_step,
+    group_by_hash,
+    plan_reclaim,
+    read_plan,
+    write_plan,
+)
+
+SHA = "A" * 64
+
+
+def _plan(records, policy: RetentionPolicy = RetentionPolicy()):
+    report = ReclaimReport()
+    return list(plan_reclaim(group_by_hash(records), policy, report)), report
+
+
+def test_plan_keeps_preferred_folder_then_drive_order() -> None:
+    steps, report = _plan([
+        MediaRecord("J:\\Media_Final\\a.mp4", 100, sha=SHA),
+        MediaRecord("H:\\otros\\a.mp4", 100, sha=SHA),
+        MediaRecord("I:\\_quarantine_x\\Media_Final\\a.mp4", 100, sha=SHA),
+    ])
+    assert {step.keep for step in steps} == {"J:\\Media_Final\\a.mp4"}
+    assert sorted(step.source for step in steps) == ["H:\\otros\\a.mp4", "I:\\_quarantine_x\\Media_Final\\a.mp4"]
+    assert steps[0].destination.startswith(steps[0].source[:3] + "duplicados\\")
+    assert (report.groups, report.copies, report.reclaimable) == (1, 2, 200)
+
+
+def test_plan_ignores_sampled_hashes_and_singletons() -> None:
+    steps, report = _plan([
+        MediaRecord("H:\\a.mp4", 100, sha=SHA),
+        MediaRecord("I:\\a.mp4", 100, sha=SHA, hash_kind=HASH_SAMPLED),
+        MediaRecord("H:\\b.mp4", 100, sha="B" * 64),
+    ])
+    assert steps == []
+    assert report.groups == 0
+
+
+def test_plan_round_trips_through_csv(tmp_path: pathlib.Path) -> None:
+    steps, _ = _plan([MediaRecord("H:\\a.mp4", 100, sha=SHA), MediaRecord("I:\\a.mp4", 100, sha=SHA)])
+    target = tmp_path / "plan.csv"
+    assert write_plan(steps, target) == 1
+    assert list(read_plan(target)) == steps
+
+
+def _copies(tmp_path: pathlib.Path, content: bytes = b"contenido") -> PlanStep:
+    keep = tmp_path / "keep.bin"
+    source = tmp_path / "source.bin"
+    keep.write_bytes(content)
+    source.write_bytes(content)
+    sha = hashlib.sha256(content).hexdigest().upper()
+    return PlanStep("delete", sha, len(content), str(source), "", str(keep))
+
+
+def test_apply_deletes_matching_copy(tmp_path: pathlib.Path) -> None:
+    step = _copies(tmp_path)
+    assert apply_step(step, verify=True) == "borrado"
+    assert not pathlib.Path(step.source).exists()
+    assert pathlib.Path(step.keep).exists()
+
+
+def test_apply_skips_when_keeper_is_missing(tmp_path: pathlib.Path) -> None:
+    step = _copies(tmp_path)
+    pathlib.Path(step.keep).unlink()
+    assert apply_step(step) == "sin-copia-conservada"
+    assert pathlib.Path(step.source).exists()
+
+
+def test_apply_skips_when_sizes_changed(tmp_path: pathlib.Path) -> None:
+    step = _copies(tmp_path)
+    pathlib.Path(step.keep).write_bytes(b"")
+    assert apply_step(step) == "tamano-distinto"
+    assert pathlib.Path(step.source).exists()
+
+    step = _copies(tmp_path)
+    pathlib.Path(step.source).write_bytes(b"otro contenido mas largo")
+    assert apply_step(step) == "tamano-distinto"
+    assert pathlib.Path(step.source).exists()
+
+
+def test_apply_verify_skips_keeper_with_other_content(tmp_path: pathlib.Path) -> None:
+    step = _copies(tmp_path)
+    pathlib.Path(step.keep).write_bytes(b"CONTENIDO")
+    assert apply_step(step, verify=True) == "hash-distinto"
+    assert pathlib.Path(step.source).exists()
+
+
+def test_apply_moves_into_quarantine(tmp_path: pathlib.Path) -> None:
+    step = _copies(tmp_path)
+    step.action = "move"
+    step.destination = str(tmp_path / "duplicados" / "source.bin")
+    assert apply_step(step, dry_run=True) == "simulado"
+    assert apply_step(step) == "movido"
+    assert pathlib.Path(step.destination).read_bytes() == b"contenido"
+    assert not pathlib.Path(step.source).exists()
+
+
+def test_apply_plan_counts_outcomes(tmp_path: pathlib.Path) -> None:
+    step = _copies(tmp_path)
+    missing = PlanStep("delete", step.sha, step.size, str(tmp_path / "nada.bin"), "", step.keep)
+    results = apply_plan([step, missing], tmp_path / "log.csv")
+    assert results == {"borrado": 1, "no-existe": 1, "bytes": step.size}
+    assert (tmp_path / "log.csv").exists()
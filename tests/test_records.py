@@ -0,0 +1,53 @@
+"""Lectura de índices: ``records`` y ``hashindex`` producen los mismos registros."""
+
+from __future__ import annotations
+
+import pathlib
+
+from discos_analisis.hashindex import iter_index
+from discos_analisis.records import convert, iter_records
+
+INDEX = (
+    "Hash,Path,Drive,Extension,Length,MB,LastWrite,HashKind,FileId\n"
+    "aa,H:\\fotos\\a.JPG,H,.jpg,10,0,01/02/2024 10:00:00,full,7\n"
+    "bb,I:\\docs\\LEEME,,(sin),20,0,02/02/2024 11:00:00,sampled,\n"
+    "cc,\\\\nas\\x.txt,,.txt,30,0,,,\n"
+)
+FOLDER = (
+    '"sha","tipo","extension","nombre","ruta","unidad","drive","tamano","fecha"\n'
+    '"AA","foto","jpg","a.JPG","H:\\fotos\\","H:","H:","10","2024-02-01T10:00:00Z"\n'
+    '"","otro","(sin)","LEEME","I:\\docs","","","20",""\n'
+)
+
+
+def test_index_readers_agree(tmp_path: pathlib.Path) -> None:
+    source = tmp_path / "index_by_hash.csv"
+    source.write_text(INDEX, encoding="utf-8")
+    records = list(iter_records(source))
+    assert records == list(iter_index(source))
+    assert [record.drive for record in records] == ["H", "I", ""]
+    assert [record.extension for record in records] == [".jpg", "", ".txt"]
+    assert records[0].file_id == "7"
+
+
+def test_folder_readers_agree(tmp_path: pathlib.Path) -> None:
+    source = tmp_path / "inventory_by_folder.csv"
+    source.write_text(FOLDER, encoding="utf-8")
+    records = list(iter_records(source))
+    assert records == list(iter_index(source))
+    assert [(record.path, record.drive, record.extension) for record in records] == [
+        ("H:\\fotos\\a.JPG", "H", ".jpg"),
+        ("I:\\docs\\LEEME", "I", ""),
+    ]
+
+
+def test_index_folder_round_trip(tmp_path: pathlib.Path) -> None:
+    source = tmp_path / "index_by_hash.csv"
+    source.write_text(INDEX, encoding="utf-8")
+    folder = tmp_path / "inventory_by_folder.csv"
+    back = tmp_path / "index_back.csv"
+    assert convert(source, folder) == 3
+    assert convert(folder, back, target_format="index") == 3
+    before = {record.path: (record.sha, record.size, record.drive, record.extension) for record in iter_index(source)}
+    after = {record.path: (record.sha, record.size, record.drive, record.extension) for record in iter_index(back)}
+    assert after == before
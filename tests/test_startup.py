@@ -0,0 +1,56 @@
+"""Arranque de ``discos-enrich``: no debe cargar los módulos pesados al importarse."""
+
+from __future__ import annotations
+
+import os
+import pathlib
+import subprocess
+import sys
+from typing import Dict
+
+SRC = pathlib.Path(__file__).resolve().parents[1] / "src"
+MODULE = "discos_analisis.cli.enrich"
+# Módulos que solo deben importarse cuando hay trabajo que hacer.
+HEAVY = (
+    "discos_analisis.pipeline",
+    "discos_analisis.classifier",
+    "discos_analisis.annotationdb",
+    "discos_analisis.ai",
+)
+# Tiempo acumulado máximo de la importación, en microsegundos. Holgado para
+# máquinas lentas; importar los módulos pesados (asyncio, sqlite3, urllib)
+# lo supera con creces.
+IMPORT_BUDGET_US = 150_000
+
+
+def _import_times() -> Dict[str, int]:
+    """Tiempo acumulado por módulo según ``python -X importtime``."""
+    env = dict(os.environ, PYTHONPATH=str(SRC))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {MODULE}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    times: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # cabecera
+        times[parts[2].strip()] = int(parts[1])
+    return times
+
+
+def test_enrich_import_skips_heavy_modules() -> None:
+    times = _import_times()
+    assert MODULE in times
+    loaded = [name for name in HEAVY if name in times]
+    assert not loaded, f"{MODULE} importa al arrancar: {', '.join(loaded)}"
+
+
+def test_enrich_import_within_budget() -> None:
+    cumulative = _import_times()[MODULE]
+    assert cumulative < IMPORT_BUDGET_US, f"{MODULE} tarda {cumulative / 1000:.1f} ms en importarse"
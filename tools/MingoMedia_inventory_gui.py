@@ -28,10 +28,11 @@ Puedes convertir este script en un ejecutable `.exe` utilizando PyInstaller:
 Copyleft © 2025 tu nombre. Distribuido bajo la licencia MIT.
 """
 
-import os
 import json
 import gzip
 import hashlib
+import queue
+import sys
 import threading
 import time
 from pathlib import Path
@@ -43,6 +44,20 @@ import PySimpleGUI as sg
 ROOT = Path(__file__).resolve().parent
 DATA_DIR = ROOT / "data"
 INVENTORY_GZ = DATA_DIR / "inventory.json.gz"
+# Estado del escaneo en curso para otros procesos (tablero, scripts).
+STATUS_JSON = DATA_DIR / "scan_status.json"
+
+if str(ROOT.parent / "src") not in sys.path:
+    sys.path.insert(0, str(ROOT.parent / "src"))
+
+from discos_analisis.progress import Progress  # noqa: E402
+from discos_analisis.scheduler import IOScheduler  # noqa: E402
+from discos_analisis.walker import ParallelWalker  # noqa: E402
+
+# Intervalo mínimo (segundos) entre eventos de progreso enviados a la ventana.
+PROGRESS_INTERVAL = 0.25
+# Rutas descubiertas que pueden esperar en cola antes de frenar el recorrido.
+QUEUE_SIZE = 1000
 
 
 def load_inventory() -> dict:
@@ -105,39 +120,109 @@ def scan_and_hash(drive_list: list, algo: str, skip_already_hashed: bool, window
     items_map = {item.get("path"): item for item in inv.get("items", [])}
     new_items = []
 
-    # Contar archivos para calcular el progreso aproximado
-    total_files = 0
-    for d in drive_list:
-        for _, _, files in os.walk(d):
-            total_files += len(files)
-    if total_files == 0:
-        total_files = 1
-
-    processed = 0
-    for d in drive_list:
-        for root, _, files in os.walk(d):
-            for fname in files:
-                full_path = os.path.join(root, fname)
-                processed += 1
-                if skip_already_hashed and full_path in items_map:
-                    # Emitir evento de avance, indicar salto
-                    window.write_event_value(
-                        "-PROG-", (processed, total_files, f"Saltado: {full_path}")
-                    )
-                    continue
-                # Calcular hash
-                h = hash_file(full_path, algo)
-                window.write_event_value(
-                    "-PROG-", (processed, total_files, f"Hasheando: {full_path}")
-                )
-                if h:
-                    entry = {
+    # Sin pasada previa de conteo: el total se estima con lo ya descubierto y,
+    # mientras el recorrido sigue, con lo que el inventario anterior tenía de
+    # esas unidades.
+    previous = sum(1 for path in items_map if path and path.startswith(tuple(drive_list)))
+    state = {"found": 0, "walking": len(drive_list), "last_emit": 0.0}
+    lock = threading.Lock()
+    # Ritmo, ETA y archivo de estado; la ventana recibe la línea ya formateada.
+    progress = Progress("Escaneo", previous, stream=None, status_path=STATUS_JSON)
+
+    def report(message: str, force: bool = False) -> None:
+        now = time.monotonic()
+        with lock:
+            if not force and now - state["last_emit"] < PROGRESS_INTERVAL:
+                return
+            state["last_emit"] = now
+            total = state["found"] if state["walking"] == 0 else max(state["found"], previous)
+        progress.set_total(total)
+        snapshot = progress.snapshot()
+        processed = int(snapshot["files"])
+        status = f"{progress.render(snapshot)} · {message}"
+        window.write_event_value("-PROG-", (processed, max(total, processed, 1), status))
+
+    def hash_one(full_path: str) -> None:
+        if skip_already_hashed and full_path in items_map:
+            progress.add(1)
+            # Emitir evento de avance, indicar salto
+            report(f"Saltado: {full_path}")
+            return
+        # Calcular hash
+        h = hash_file(full_path, algo)
+        progress.add(1)
+        with lock:
+            if h:
+                new_items.append(
+                    {
                         "path": full_path,
                         "hash": h,
                         "algo": algo,
                         "timestamp": time.time(),
                     }
-                    new_items.append(entry)
+                )
+        report(f"Hasheando: {full_path}")
+
+    def scan_drive(d: str, readers: int) -> None:
+        # Productor: el recorrido vuelca rutas en una cola acotada que
+        # consumen tantos hilos de hash como lectores admite el disco.
+        paths = queue.Queue(maxsize=QUEUE_SIZE)
+        errors: list = []
+        failed = threading.Event()
+
+        def fail(exc: BaseException) -> None:
+            with lock:
+                errors.append(exc)
+            failed.set()
+
+        def produce() -> None:
+            try:
+                # Sin carpetas omitidas: el inventario cubre la unidad entera, como con os.walk.
+                for full_path, _ in ParallelWalker(skip_names=()).walk(d):
+                    if failed.is_set():
+                        break
+                    with lock:
+                        state["found"] += 1
+                    paths.put(full_path)
+            except BaseException as exc:
+                fail(exc)
+            finally:
+                with lock:
+                    state["walking"] -= 1
+                for _ in range(readers):
+                    paths.put(None)
+
+        def consume() -> None:
+            # Tras un fallo se sigue vaciando la cola para que el productor no
+            # se quede bloqueado en put().
+            while True:
+                full_path = paths.get()
+                if full_path is None:
+                    return
+                if failed.is_set():
+                    continue
+                try:
+                    hash_one(full_path)
+                except BaseException as exc:
+                    fail(exc)
+
+        workers = [threading.Thread(target=produce, daemon=True)]
+        workers += [threading.Thread(target=consume, daemon=True) for _ in range(readers)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        if errors:
+            raise errors[0]
+
+    # Un lector por disco giratorio y varios por SSD; discos distintos en paralelo.
+    failure = None
+    try:
+        IOScheduler().run(drive_list, scan_drive)
+    except Exception as exc:
+        failure = exc
+    progress.close()
+    report("Guardando inventario...", force=True)
 
     # Actualizar inventario
     for entry in new_items:
@@ -146,6 +231,13 @@ def scan_and_hash(drive_list: list, algo: str, skip_already_hashed: bool, window
     inv["generated_at"] = time.ctime()
     save_inventory(inv)
     # Señalar finalización
+    if failure is not None:
+        # Lo ya hasheado es válido y se conserva, pero el escaneo quedó incompleto.
+        window.write_event_value(
+            "-ERROR-",
+            f"Escaneo interrumpido: {failure!r}. Se guardaron {len(new_items)} elementos; vuelve a escanear.",
+        )
+        return
     window.write_event_value("-DONE-", f"Escaneo finalizado. {len(new_items)} nuevos elementos añadidos.")
 
 
@@ -212,12 +304,15 @@ def main() -> None:
             )
         if event == "-PROG-":
             processed, total, msg = values[event]
-            percent = int((processed / total) * 100)
+            percent = min(100, int((processed / total) * 100))
             window["-PROG_BAR-"].update(percent)
-            window["-PROG_TXT-"].update(f"{processed}/{total}: {msg}")
+            window["-PROG_TXT-"].update(msg)
         if event == "-DONE-":
             window["-PROG_BAR-"].update(100)
             sg.popup(values[event])
+        if event == "-ERROR-":
+            window["-PROG_TXT-"].update(values[event])
+            sg.popup_error(values[event])
     window.close()
 
 
@@ -14,73 +14,16 @@ from typing import Dict, List, Tuple
 from urllib.parse import quote
 
 ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT / "src") not in sys.path:
+    sys.path.insert(0, str(ROOT / "src"))
+
+from discos_analisis.constants import AUDIO_EXT, DOC_EXT, PHOTO_EXT, VIDEO_EXT  # noqa: E402
+from discos_analisis.hashindex import MediaRecord  # noqa: E402
+from discos_analisis.reclaim import RetentionPolicy  # noqa: E402
+
 DEFAULT_SOURCE = ROOT / "dupes_confirmed.csv"
 DEFAULT_TARGET = ROOT / "docs" / "Listado_Duplicados_interactivo.html"
 
-VIDEO_EXT = {
-    ".mp4",
-    ".m2ts",
-    ".avi",
-    ".mov",
-    ".mpg",
-    ".mpeg",
-    ".mts",
-    ".wmv",
-    ".m4v",
-    ".mkv",
-    ".flv",
-    ".ts",
-    ".webm",
-}
-PHOTO_EXT = {
-    ".jpg",
-    ".jpeg",
-    ".png",
-    ".gif",
-    ".heic",
-    ".tif",
-    ".tiff",
-    ".bmp",
-    ".raw",
-    ".nef",
-    ".cr2",
-    ".cr3",
-    ".arw",
-    ".psd",
-    ".svg",
-    ".webp",
-    ".ai",
-}
-AUDIO_EXT = {
-    ".mp3",
-    ".wav",
-    ".flac",
-    ".aac",
-    ".m4a",
-    ".ogg",
-    ".wma",
-    ".aiff",
-    ".aif",
-    ".mid",
-    ".midi",
-}
-DOC_EXT = {
-    ".pdf",
-    ".doc",
-    ".docx",
-    ".xls",
-    ".xlsx",
-    ".ppt",
-    ".pptx",
-    ".txt",
-    ".csv",
-    ".rtf",
-    ".odt",
-    ".ods",
-    ".odp",
-    ".md",
-    ".html",
-}
 ICON_MAP = {
     "video": "🎬",
     "foto": "🖼️",
@@ -210,10 +153,17 @@ def load_groups(csv_path: Path) -> List[Dict[str, object]]:
             }
             grouped[sha].append(entry)
 
-    priority = {"H": 0, "I": 1, "J": 2}
+    policy = RetentionPolicy()
+
+    def keep_key(item: Dict[str, object]):
+        probe = MediaRecord(
+            path=item["path"], size=item["bytes"], sha=item["sha"], drive=item["drive"], category=item["category"]
+        )
+        return policy.keep_key(probe)
+
     groups: List[Dict[str, object]] = []
     for sha, entries in grouped.items():
-        entries.sort(key=lambda item: (priority.get(item["drive"], 9), item["path"].lower()))
+        entries.sort(key=keep_key)
         for idx, entry in enumerate(entries):
             entry["role"] = "Principal" if idx == 0 else "Duplicado"
         drives = sorted({entry["drive"] for entry in entries})
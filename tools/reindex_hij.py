@@ -7,18 +7,38 @@ import argparse
 import csv
 import hashlib
 import os
+import random
 import shutil
 import sys
+import threading
 from collections import Counter, defaultdict
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Sequence
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 BUFFER_SIZE = 1024 * 1024
+SAMPLE_BLOCKS = 16
+SAMPLE_BLOCK_SIZE = 256 * 1024
+SAMPLE_THRESHOLD_MB = 256
 DEFAULT_DRIVES = ("H", "I", "J")
 ROOT = Path(__file__).resolve().parents[1]
 
+if str(ROOT / "src") not in sys.path:
+    sys.path.insert(0, str(ROOT / "src"))
+
+from discos_analisis.hashindex import (  # noqa: E402
+    HASH_FULL,
+    HASH_SAMPLED,
+    format_mb,
+    spanish_decimal,
+    spanish_int,
+)
+from discos_analisis.hashing import buffer_for, hash_file  # noqa: E402
+from discos_analisis.progress import Progress, previous_totals  # noqa: E402
+from discos_analisis.scheduler import DEFAULT_SSD_READERS, IOScheduler, map_bounded  # noqa: E402
+from discos_analisis.walker import DEFAULT_WALKERS, FileEntry, ParallelWalker  # noqa: E402
+
 
 @dataclass
 class FileRecord:
@@ -28,6 +48,8 @@ class FileRecord:
     extension: str
     length: int
     last_write: datetime
+    hash_kind: str = HASH_FULL
+    file_id: str = ""
 
     @property
     def last_iso(self) -> str:
@@ -61,6 +83,10 @@ class WarningTracker:
 
 LOG_FILE: Optional[Path] = None
 _LOG_HANDLE = None
+_LOG_LOCK = threading.Lock()
+_PROGRESS: Optional[Progress] = None
+# Se fija desde --mmap al arrancar; hash_file solo mapea si se le pide.
+_USE_MMAP = False
 
 
 def setup_logging(path: Path) -> None:
@@ -73,10 +99,13 @@ def setup_logging(path: Path) -> None:
 def log(message: str) -> None:
     stamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     line = f"[{stamp}] {message}"
-    print(line)
-    if _LOG_HANDLE:
-        _LOG_HANDLE.write(line + "\n")
-        _LOG_HANDLE.flush()
+    with _LOG_LOCK:
+        if _PROGRESS is not None:
+            _PROGRESS.clear()
+        print(line)
+        if _LOG_HANDLE:
+            _LOG_HANDLE.write(line + "\n")
+            _LOG_HANDLE.flush()
 
 
 def close_logging() -> None:
@@ -116,6 +145,69 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         action="store_true",
         help="Do not copy results to the repo root (keep only in snapshot)",
     )
+    parser.add_argument(
+        "--ssd-readers",
+        type=int,
+        default=DEFAULT_SSD_READERS,
+        help="Concurrent readers per SSD (spinning disks always get one)",
+    )
+    parser.add_argument(
+        "--walkers",
+        type=int,
+        default=DEFAULT_WALKERS,
+        help="Threads enumerating directories per drive (default: 4)",
+    )
+    parser.add_argument(
+        "--exclude",
+        nargs="*",
+        default=[],
+        help="Glob patterns to prune (names, or full paths when they contain a separator)",
+    )
+    parser.add_argument(
+        "--sampled",
+        action="store_true",
+        help="Fingerprint large files from sampled blocks; fully hash only those that collide",
+    )
+    parser.add_argument(
+        "--sample-threshold",
+        type=int,
+        default=SAMPLE_THRESHOLD_MB,
+        help="Minimum size in MB for sampled fingerprints (default: 256)",
+    )
+    parser.add_argument(
+        "--sample-blocks",
+        type=int,
+        default=SAMPLE_BLOCKS,
+        help="Blocks read per sampled fingerprint (default: 16)",
+    )
+    parser.add_argument(
+        "--carry-hashes",
+        action="store_true",
+        help="Reuse hashes from the previous index for unchanged and moved/renamed files",
+    )
+    parser.add_argument(
+        "--previous-index",
+        type=Path,
+        default=None,
+        help="Index to carry hashes from (defaults to <output-root>/index_by_hash.csv)",
+    )
+    parser.add_argument(
+        "--verify-carried",
+        type=float,
+        default=0.0,
+        help="Fraction (0-1) of carried hashes re-read to verify them (default: 0)",
+    )
+    parser.add_argument(
+        "--mmap",
+        action="store_true",
+        help="Hash large files through mmap (only safe when nothing truncates them during the scan)",
+    )
+    parser.add_argument(
+        "--status-file",
+        type=Path,
+        default=None,
+        help="JSON progress file for other processes to poll (defaults to <snapshot-dir>/reindex_status.json)",
+    )
     return parser.parse_args(argv)
 
 
@@ -143,129 +235,320 @@ def normalise_display_path(path: Path, drive: str) -> str:
     return raw
 
 
-def skip_directory(path: Path) -> bool:
-    name = path.name
-    upper = name.upper()
-    if upper in {"SYSTEM VOLUME INFORMATION", "$RECYCLE.BIN"}:
-        return True
-    if upper == "_QUARANTINE_FROM_HIJ":
-        return True
-    if upper == "_QUARANTINE":
-        return True
-    if upper.startswith("FOUND.") and upper[6:].isdigit():
-        return True
-    return False
+def compute_sha256(path: str, warnings: WarningTracker, buffer_size: int = BUFFER_SIZE) -> Optional[str]:
+    try:
+        return hash_file(to_long_path(path), buffer_size=buffer_size, use_mmap=_USE_MMAP)
+    except (OSError, PermissionError) as exc:
+        warnings.warn(f"No se pudo leer {path}: {exc}")
+        return None
+
+
+def sample_offsets(size: int, blocks: int = SAMPLE_BLOCKS, block_size: int = SAMPLE_BLOCK_SIZE) -> List[int]:
+    """Deterministic block offsets spread evenly from the first to the last block."""
+    if blocks <= 1 or size <= block_size:
+        return [0]
+    last = size - block_size
+    return [last * index // (blocks - 1) for index in range(blocks)]
+
 
+def compute_sampled_sha256(
+    path: str,
+    size: int,
+    warnings: WarningTracker,
+    blocks: int = SAMPLE_BLOCKS,
+    block_size: int = SAMPLE_BLOCK_SIZE,
+) -> Optional[str]:
+    """SHA-256 over the file size and K blocks: a strong "likely same" signal, not a content hash.
 
-def compute_sha256(path: Path, warnings: WarningTracker) -> Optional[str]:
+    The size and sampling parameters are part of the digest, so a sampled
+    value can never be mistaken for a full SHA-256 of some other file.
+    """
     long_path = to_long_path(path)
-    digest = hashlib.sha256()
+    digest = hashlib.sha256(f"sampled:{size}:{blocks}:{block_size}\n".encode("ascii"))
     try:
         with open(long_path, "rb", buffering=0) as handle:
-            while True:
-                chunk = handle.read(BUFFER_SIZE)
-                if not chunk:
-                    break
-                digest.update(chunk)
+            for offset in sample_offsets(size, blocks, block_size):
+                handle.seek(offset)
+                digest.update(handle.read(block_size))
         return digest.hexdigest().upper()
     except (OSError, PermissionError) as exc:
         warnings.warn(f"No se pudo leer {path}: {exc}")
         return None
 
 
-def handle_file(path: Path, drive: str, warnings: WarningTracker) -> Optional[FileRecord]:
-    try:
-        stat = path.stat()
-    except (OSError, PermissionError) as exc:
-        warnings.warn(f"No se pudo inspeccionar {path}: {exc}")
-        return None
+# (hash, kind, old path) of a previous index row.
+Carried = Tuple[str, str, str]
+
+
+class HashCarrier:
+    """Hashes from a previous index, matched by path or by file identity after a move.
+
+    A file whose path, size and mtime are unchanged keeps its hash. A file
+    seen at a new path takes the hash of a previous row with the same file
+    ID/inode, size and mtime, or, when IDs are not available, with the same
+    size, mtime and name whose old path no longer exists. Ambiguous name
+    matches (several old files with different hashes) are hashed again.
+    ``verify_ratio`` re-reads that fraction of carried files and keeps the
+    fresh value if it differs.
+    """
+
+    def __init__(self, verify_ratio: float = 0.0) -> None:
+        self.verify_ratio = max(0.0, min(1.0, verify_ratio))
+        self.by_path: Dict[str, Tuple[int, str, Carried]] = {}
+        self.by_id: Dict[Tuple[str, str, int, str], Carried] = {}
+        self.by_name: Dict[Tuple[int, str, str], List[Carried]] = defaultdict(list)
+        self.stats: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Path, verify_ratio: float = 0.0) -> "HashCarrier":
+        carrier = cls(verify_ratio)
+        with path.open("r", newline="", encoding="utf-8-sig") as handle:
+            for row in csv.DictReader(handle):
+                sha = (row.get("Hash") or "").strip()
+                old_path = (row.get("Path") or "").strip()
+                try:
+                    length = int(row.get("Length") or "")
+                except ValueError:
+                    continue
+                if not sha or not old_path:
+                    continue
+                last_write = (row.get("LastWrite") or "").strip()
+                carried = (sha, (row.get("HashKind") or HASH_FULL).strip() or HASH_FULL, old_path)
+                carrier.by_path[old_path.lower()] = (length, last_write, carried)
+                file_id = (row.get("FileId") or "").strip()
+                if file_id:
+                    drive = (row.get("Drive") or old_path[:1]).upper()
+                    carrier.by_id[(drive, file_id, length, last_write)] = carried
+                name = old_path.rsplit("\\", 1)[-1].lower()
+                carrier.by_name[(length, last_write, name)].append(carried)
+        return carrier
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _moved(self, display_path: str, drive: str, file_id: str, length: int, last_write: str) -> Optional[Carried]:
+        if file_id:
+            found = self.by_id.get((drive, file_id, length, last_write))
+            if found is not None:
+                return found
+        name = display_path.rsplit("\\", 1)[-1].lower()
+        candidates = [
+            item for item in self.by_name.get((length, last_write, name), ())
+            if item[2].lower() != display_path.lower()
+        ]
+        if not candidates or len({item[0] for item in candidates}) > 1:
+            return None
+        # Mismos metadatos con el original aún presente es una copia, no un movimiento.
+        if any(os.path.exists(to_long_path(Path(item[2]))) for item in candidates):
+            return None
+        return candidates[0]
+
+    def lookup(
+        self,
+        display_path: str,
+        drive: str,
+        file_id: str,
+        length: int,
+        last_write: str,
+        accept_sampled: bool,
+    ) -> Optional[Carried]:
+        how = "unchanged"
+        previous = self.by_path.get(display_path.lower())
+        found: Optional[Carried] = None
+        if previous is not None and previous[0] == length and previous[1] == last_write:
+            found = previous[2]
+        else:
+            how = "moved"
+            found = self._moved(display_path, drive, file_id, length, last_write)
+        if found is None or (found[1] == HASH_SAMPLED and not accept_sampled):
+            return None
+        self._count(how)
+        return found
+
+    def should_verify(self) -> bool:
+        return self.verify_ratio > 0 and random.random() < self.verify_ratio
+
+    def record_verification(self, carried: Carried, fresh: str, warnings: WarningTracker) -> None:
+        self._count("verified")
+        if fresh != carried[0]:
+            self._count("mismatch")
+            warnings.warn(f"Hash heredado distinto tras verificar {carried[2]}")
+
+
+def handle_file(
+    path: str,
+    drive: str,
+    warnings: WarningTracker,
+    stat: Optional[os.stat_result] = None,
+    sample_threshold: Optional[int] = None,
+    sample_blocks: int = SAMPLE_BLOCKS,
+    buffer_size: int = BUFFER_SIZE,
+    carrier: Optional[HashCarrier] = None,
+) -> Optional[FileRecord]:
+    if stat is None:
+        try:
+            stat = os.stat(path)
+        except (OSError, PermissionError) as exc:
+            warnings.warn(f"No se pudo inspeccionar {path}: {exc}")
+            return None
 
-    sha256 = compute_sha256(path, warnings)
+    display_path = normalise_display_path(path, drive)
+    last_write = datetime.fromtimestamp(stat.st_mtime)
+    # Windows scandir reports 0 for the file ID; only real IDs are stored.
+    file_id = str(stat.st_ino) if stat.st_ino else ""
+    sampled = sample_threshold is not None and stat.st_size >= sample_threshold
+
+    carried: Optional[Carried] = None
+    if carrier is not None:
+        carried = carrier.lookup(
+            display_path, drive.upper(), file_id, stat.st_size, last_write.strftime("%d/%m/%Y %H:%M:%S"), sampled
+        )
+    if carried is not None and not carrier.should_verify():
+        sha256, hash_kind = carried[0], carried[1]
+    else:
+        if carried is not None and carried[1] == HASH_SAMPLED:
+            hash_kind = HASH_SAMPLED
+            sha256 = compute_sampled_sha256(path, stat.st_size, warnings, sample_blocks)
+        elif sampled and carried is None:
+            hash_kind = HASH_SAMPLED
+            sha256 = compute_sampled_sha256(path, stat.st_size, warnings, sample_blocks)
+        else:
+            hash_kind = HASH_FULL
+            sha256 = compute_sha256(path, warnings, buffer_size)
+        if carried is not None and sha256:
+            carrier.record_verification(carried, sha256, warnings)
     if not sha256:
         return None
 
-    extension = path.suffix.lower() or "(sin)"
-    display_path = normalise_display_path(path, drive)
+    extension = os.path.splitext(path)[1].lower() or "(sin)"
     record = FileRecord(
         sha256=sha256,
         path=display_path,
         drive=drive.upper(),
         extension=extension,
         length=stat.st_size,
-        last_write=datetime.fromtimestamp(stat.st_mtime),
+        last_write=last_write,
+        hash_kind=hash_kind,
+        file_id=file_id,
     )
     return record
 
 
-def walk_drive(root: Path, warnings: WarningTracker) -> Iterable[Path]:
-    stack: List[Path] = [root]
-    while stack:
-        current = stack.pop()
-        try:
-            with os.scandir(current) as iterator:
-                for entry in iterator:
-                    try:
-                        entry_path = Path(entry.path)
-                        if entry.is_dir(follow_symlinks=False):
-                            if skip_directory(entry_path):
-                                continue
-                            stack.append(entry_path)
-                        elif entry.is_file(follow_symlinks=False):
-                            yield entry_path
-                    except (OSError, PermissionError) as exc:
-                        warnings.warn(f"No se pudo acceder a {entry.path}: {exc}")
-        except (OSError, PermissionError) as exc:
-            warnings.warn(f"No se pudo enumerar {current}: {exc}")
-
-
-def scan_drive(drive: str, warnings: WarningTracker) -> List[FileRecord]:
-    drive_letter = drive.rstrip(":").upper()
+def walk_drive(
+    root: Path,
+    warnings: WarningTracker,
+    walkers: int = DEFAULT_WALKERS,
+    exclude: Sequence[str] = (),
+) -> Iterable[FileEntry]:
+    walker = ParallelWalker(
+        workers=walkers,
+        exclude=exclude,
+        on_error=lambda path, exc: warnings.warn(f"No se pudo acceder a {path}: {exc}"),
+    )
+    return walker.walk(str(root))
+
+
+def scan_drive(
+    drive: str,
+    warnings: WarningTracker,
+    readers: int = 1,
+    walkers: int = DEFAULT_WALKERS,
+    exclude: Sequence[str] = (),
+    sample_threshold: Optional[int] = None,
+    sample_blocks: int = SAMPLE_BLOCKS,
+    buffer_size: int = BUFFER_SIZE,
+    carrier: Optional[HashCarrier] = None,
+    progress: Optional[Progress] = None,
+) -> List[FileRecord]:
+    drive_letter = drive.rstrip(":\\").upper()
     root = Path(f"{drive_letter}:\\")
     if not root.exists():
         log(f"[WARN] Unidad {drive_letter}:\\ no encontrada, se omite")
         return []
 
-    log(f"[INFO] Escaneando {drive_letter}:\\ ...")
+    log(f"[INFO] Escaneando {drive_letter}:\\ ({readers} lector(es), bufer {buffer_size // 1024} KB) ...")
     records: List[FileRecord] = []
     processed = 0
-    for path in walk_drive(root, warnings):
-        record = handle_file(path, drive_letter, warnings)
+    entries = walk_drive(root, warnings, walkers, exclude)
+    for record in map_bounded(
+        lambda entry: handle_file(
+            entry[0], drive_letter, warnings, entry[1], sample_threshold, sample_blocks, buffer_size, carrier
+        ),
+        entries,
+        readers,
+    ):
         if record:
             records.append(record)
             processed += 1
-            if processed % 200 == 0:
+            if progress is not None:
+                progress.add(1, record.length, drive_letter)
+            elif processed % 200 == 0:
                 log(f"[{drive_letter}] {processed} archivos procesados")
     log(f"[INFO] {drive_letter}:\\ completado ({len(records)} archivos)")
     return records
 
 
-def spanish_int(value: int) -> str:
-    return f"{value:,}".replace(",", ".")
-
-
-def spanish_decimal(value: float, decimals: int = 2) -> str:
-    formatted = f"{value:,.{decimals}f}"
-    formatted = formatted.replace(",", "@").replace(".", ",").replace("@", ".")
-    return formatted
+def confirm_sampled(
+    records: List[FileRecord],
+    scheduler: IOScheduler,
+    warnings: WarningTracker,
+) -> Counter[str]:
+    """Fully hash sampled records that may duplicate another file.
+
+    A sampled record needs its full hash when its fingerprint collides with
+    another sampled record, or when a full-hashed record (for example one
+    carried over from the previous index) has the same size: a full SHA is
+    never comparable with a sampled fingerprint. The rest keep their sampled
+    value, since no duplicate is possible without one of those matches.
+    Pending records are re-read completely, grouped per drive so each device
+    keeps its own reader budget.
+    """
+    by_fingerprint: Dict[str, List[FileRecord]] = defaultdict(list)
+    full_sizes = set()
+    for record in records:
+        if record.hash_kind == HASH_SAMPLED:
+            by_fingerprint[record.sha256].append(record)
+        else:
+            full_sizes.add(record.length)
+    pending: Dict[str, List[FileRecord]] = defaultdict(list)
+    for members in by_fingerprint.values():
+        if len(members) > 1 or members[0].length in full_sizes:
+            for record in members:
+                pending[f"{record.drive}:\\"].append(record)
+    stats: Counter[str] = Counter()
+    stats["sampled"] = sum(len(members) for members in by_fingerprint.values())
+    if not pending:
+        return stats
+    log(
+        f"[INFO] Verificando {sum(len(items) for items in pending.values())} archivos con huella muestreada "
+        "repetida o del mismo tamaño que un archivo con hash completo"
+    )
 
+    def confirm(root: str, readers: int) -> int:
+        done = 0
+        items = pending[root]
+        buffer_size = buffer_for(scheduler.device_for(root).rotational)
+        for record, sha256 in zip(
+            items, map_bounded(lambda item: compute_sha256(item.path, warnings, buffer_size), items, readers)
+        ):
+            if sha256:
+                record.sha256 = sha256
+                record.hash_kind = HASH_FULL
+                done += 1
+        return done
 
-def format_mb(length: int) -> str:
-    mb_value = length / (1024 * 1024)
-    if mb_value < 1:
-        return "0"
-    formatted = f"{mb_value:.2f}".replace(".", ",")
-    if formatted.endswith(",00"):
-        formatted = formatted[:-3]
-    elif formatted.endswith("0"):
-        formatted = formatted[:-1]
-    return formatted
+    confirmed = scheduler.run(list(pending), confirm)
+    stats["confirmed"] = sum(confirmed.values())
+    return stats
 
 
 def write_index_csv(records: List[FileRecord], target: Path) -> None:
     records_sorted = sorted(records, key=lambda item: (item.sha256, item.path.lower()))
     with target.open("w", newline="", encoding="utf-8") as handle:
         writer = csv.writer(handle)
-        writer.writerow(["Hash", "Path", "Drive", "Extension", "Length", "MB", "LastWrite"])
+        writer.writerow(["Hash", "Path", "Drive", "Extension", "Length", "MB", "LastWrite", "HashKind", "FileId"])
         for record in records_sorted:
             writer.writerow([
                 record.sha256,
@@ -275,6 +558,8 @@ def write_index_csv(records: List[FileRecord], target: Path) -> None:
                 record.length,
                 format_mb(record.length),
                 record.last_es,
+                record.hash_kind,
+                record.file_id,
             ])
 
 
@@ -303,8 +588,9 @@ def write_index_txt(records: List[FileRecord], target: Path) -> None:
         total_bytes = sum(item.length for item in entries_sorted)
         gb_value = total_bytes / (1024 ** 3)
         earliest = min(item.last_iso for item in entries_sorted)
+        label = "HASH" if entries_sorted[0].hash_kind == HASH_FULL else "MUESTRA"
         header_line = (
-            f"=== HASH {sha}  {len(entries_sorted)} archivos  {spanish_decimal(gb_value)} GB  "
+            f"=== {label} {sha}  {len(entries_sorted)} archivos  {spanish_decimal(gb_value)} GB  "
             f"{earliest} .. {latest} ==="
         )
         lines.append(header_line)
@@ -326,7 +612,8 @@ def write_dupes_csv(records: List[FileRecord], target: Path) -> Counter[str]:
         writer = csv.writer(handle)
         writer.writerow(["Hash", "SHA256", "Bytes", "LastWrite", "Path"])
         for sha, entries in sorted(groups.items()):
-            if len(entries) <= 1:
+            # Only full hashes confirm a duplicate; sampled fingerprints never do.
+            if len(entries) <= 1 or entries[0].hash_kind != HASH_FULL:
                 continue
             duplicates["groups"] += 1
             duplicates["files"] += len(entries)
@@ -358,8 +645,47 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
     all_records: List[FileRecord] = []
     per_drive: Dict[str, Counter[str]] = {}
 
-    for drive in drives:
-        records = scan_drive(drive, warnings)
+    scheduler = IOScheduler(ssd_readers=args.ssd_readers)
+    roots = [f"{drive.upper()}:\\" for drive in drives]
+    for device, members in scheduler.plan(roots).items():
+        log(f"[INFO] Dispositivo {device.label}: {', '.join(members)}")
+    sample_threshold = args.sample_threshold * 1024 * 1024 if args.sampled else None
+    carrier: Optional[HashCarrier] = None
+    if args.carry_hashes:
+        previous_index = args.previous_index or (output_root / "index_by_hash.csv")
+        if previous_index.exists():
+            carrier = HashCarrier.load(previous_index, args.verify_carried)
+            log(f"[INFO] Hashes previos cargados de {previous_index} ({spanish_int(len(carrier.by_path))} rutas)")
+        else:
+            log(f"[WARN] No existe {previous_index}; se hashea todo")
+    global _PROGRESS, _USE_MMAP
+    _USE_MMAP = args.mmap
+    status_file = args.status_file or (snapshot_dir / "reindex_status.json")
+    # El total de la ejecución anterior sirve de estimación para el ETA.
+    total_files, total_bytes = previous_totals(status_file)
+    progress = Progress("Reindex", total_files, total_bytes, sys.stdout, status_file, printer=log)
+    _PROGRESS = progress
+    scanned = scheduler.run(
+        roots,
+        lambda root, readers: scan_drive(
+            root,
+            warnings,
+            readers,
+            args.walkers,
+            args.exclude,
+            sample_threshold,
+            args.sample_blocks,
+            buffer_for(scheduler.device_for(root).rotational),
+            carrier,
+            progress,
+        ),
+    )
+    _PROGRESS = None
+    progress.close()
+
+    for root in roots:
+        drive = root[0]
+        records = scanned.get(root) or []
         if records:
             all_records.extend(records)
             counter = Counter()
@@ -373,6 +699,10 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         close_logging()
         return 2
 
+    sampled_stats: Counter[str] = Counter()
+    if args.sampled or any(record.hash_kind == HASH_SAMPLED for record in all_records):
+        sampled_stats = confirm_sampled(all_records, scheduler, warnings)
+
     snapshot_dir.mkdir(parents=True, exist_ok=True)
     log(f"Guardando resultados en {snapshot_dir}")
 
@@ -406,6 +736,18 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
     log(f"  Tamano total: {spanish_decimal(total_bytes / (1024 ** 4))} TB")
     log(f"  Grupos duplicados: {spanish_int(duplicate_groups)}")
     log(f"  Archivos en duplicados: {spanish_int(duplicate_files)}")
+    if args.sampled:
+        log(
+            f"  Huellas muestreadas: {spanish_int(sampled_stats['sampled'])} "
+            f"(verificadas con hash completo: {spanish_int(sampled_stats['confirmed'])})"
+        )
+    carry_stats: Counter[str] = carrier.stats if carrier is not None else Counter()
+    if carrier is not None:
+        log(
+            f"  Hashes heredados: {spanish_int(carry_stats['unchanged'])} sin cambios, "
+            f"{spanish_int(carry_stats['moved'])} movidos/renombrados "
+            f"(verificados: {spanish_int(carry_stats['verified'])}, distintos: {spanish_int(carry_stats['mismatch'])})"
+        )
 
     for drive, stats in sorted(per_drive.items()):
         drive_files = stats.get("files", 0)
@@ -429,6 +771,8 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         f"Hash unicos: {unique_hashes}",
         f"Duplicados (grupos): {duplicate_groups}",
         f"Duplicados (archivos): {duplicate_files}",
+        f"Huellas muestreadas: {sampled_stats['sampled']} (verificadas: {sampled_stats['confirmed']})",
+        f"Hashes heredados: {carry_stats['unchanged']} sin cambios, {carry_stats['moved']} movidos",
         f"Bytes totales: {total_bytes}",
         f"Artefactos: {', '.join(path.name for path in generated)}",
         "",
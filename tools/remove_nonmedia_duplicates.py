@@ -3,7 +3,13 @@
 
 import argparse
 import csv
+import hashlib
+import json
 import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
@@ -15,6 +21,11 @@ NON_MEDIA_EXTS = {
     'mta'
 }
 
+DEFAULT_WORKERS = 4
+DEFAULT_VERIFY_TTL_HOURS = 24.0
+BUFFER_SIZE = 1024 * 1024
+MTIME_TOLERANCE = 2.0  # FAT/exFAT guardan la fecha con resolucion de 2 s
+
 
 def add_long_prefix(path: str) -> str:
     prefix = "\\\\?\\"
@@ -25,12 +36,72 @@ def add_long_prefix(path: str) -> str:
     return path
 
 
-def remove_paths(csv_path: Path, log_path: Path, drives=None) -> int:
-    drives = {d.upper() for d in drives} if drives else None
-    removed = []
-    missing = []
-    errors = []
+class DeletionLog:
+    """Streams deleted/missing/error rows to CSV, flushing after every write.
+
+    Each file is opened lazily on its first row so runs without misses or
+    errors do not leave empty logs behind.
+    """
+
+    def __init__(self, log_path: Path) -> None:
+        self.log_path = log_path
+        self.counts = {'removed': 0, 'missing': 0, 'errors': 0}
+        self._lock = threading.Lock()
+        self._handles = {}
+        self._writers = {}
+
+    def _writer(self, kind: str):
+        writer = self._writers.get(kind)
+        if writer is not None:
+            return writer
+        if kind == 'removed':
+            target = self.log_path
+            header = ['Hash', 'Bytes', 'LastWrite', 'Path', 'DeletedAt']
+        elif kind == 'missing':
+            target = self.log_path.with_name(self.log_path.stem + '_missing.csv')
+            header = ['Path']
+        else:
+            target = self.log_path.with_name(self.log_path.stem + '_errors.csv')
+            header = ['Path', 'Error']
+        target.parent.mkdir(parents=True, exist_ok=True)
+        handle = target.open('w', encoding='utf-8', newline='')
+        writer = csv.writer(handle)
+        writer.writerow(header)
+        self._handles[kind] = handle
+        self._writers[kind] = writer
+        return writer
+
+    def _write(self, kind: str, values) -> None:
+        with self._lock:
+            self._writer(kind).writerow(values)
+            self._handles[kind].flush()
+            self.counts[kind] += 1
+
+    def removed(self, row: dict) -> None:
+        self._write('removed', [
+            row.get('Hash', ''),
+            row.get('Bytes', ''),
+            row.get('LastWrite', ''),
+            row['Path'],
+            datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        ])
+
+    def missing(self, path: str) -> None:
+        self._write('missing', [path])
+
+    def error(self, path: str, message: str) -> None:
+        self._write('errors', [path, message])
+
+    def close(self) -> None:
+        with self._lock:
+            for handle in self._handles.values():
+                handle.close()
+            self._handles.clear()
+            self._writers.clear()
+
 
+def iter_candidates(csv_path: Path, drives=None):
+    """Yield rows of the duplicates CSV whose extension is non-media."""
     with csv_path.open('r', encoding='utf-8-sig', newline='') as handle:
         reader = csv.DictReader(handle)
         for row in reader:
@@ -43,48 +114,214 @@ def remove_paths(csv_path: Path, log_path: Path, drives=None) -> int:
             ext = path.rsplit('.', 1)[-1].lower() if '.' in path else ''
             if ext not in NON_MEDIA_EXTS:
                 continue
+            yield row
 
-            target = path
-            long_path = add_long_prefix(target)
+
+def delete_one(row: dict, log: DeletionLog) -> None:
+    target = row['Path']
+    try:
+        os.remove(add_long_prefix(target))
+    except FileNotFoundError:
+        log.missing(target)
+    except Exception as exc:  # pragma: no cover
+        log.error(target, str(exc))
+    else:
+        log.removed(row)
+
+
+class VerificationCache:
+    """JSON cache of recent verifications keyed by path.
+
+    Entries store the size, mtime and hash observed when the file was last
+    checked so later cleanup runs within the TTL skip re-hashing it.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = {}
+        if path.exists():
             try:
-                if os.path.exists(long_path):
-                    os.remove(long_path)
-                    removed.append({
-                        'Hash': row.get('Hash', ''),
-                        'Bytes': row.get('Bytes', ''),
-                        'LastWrite': row.get('LastWrite', ''),
-                        'Path': target
-                    })
-                else:
-                    missing.append(target)
-            except Exception as exc:  # pragma: no cover
-                errors.append((target, str(exc)))
-
-    if removed:
-        log_path.parent.mkdir(parents=True, exist_ok=True)
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        with log_path.open('w', encoding='utf-8', newline='') as handle:
-            writer = csv.DictWriter(handle, fieldnames=['Hash', 'Bytes', 'LastWrite', 'Path', 'DeletedAt'])
-            writer.writeheader()
-            for row in removed:
-                row['DeletedAt'] = timestamp
-                writer.writerow(row)
-
-    if missing:
-        miss_log = log_path.with_name(log_path.stem + '_missing.csv')
-        with miss_log.open('w', encoding='utf-8', newline='') as handle:
-            writer = csv.writer(handle)
-            writer.writerow(['Path'])
-            writer.writerows([[p] for p in missing])
-
-    if errors:
-        err_log = log_path.with_name(log_path.stem + '_errors.csv')
-        with err_log.open('w', encoding='utf-8', newline='') as handle:
-            writer = csv.writer(handle)
-            writer.writerow(['Path', 'Error'])
-            writer.writerows(errors)
-
-    return len(removed)
+                with path.open('r', encoding='utf-8') as handle:
+                    payload = json.load(handle)
+                if isinstance(payload, dict):
+                    self.entries = payload
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def recent(self, path: str, max_age: float):
+        with self._lock:
+            entry = self.entries.get(path)
+        if entry and time.time() - entry.get('checked_at', 0) <= max_age:
+            return entry
+        return None
+
+    def put(self, path: str, size: int, mtime: float, sha: str) -> None:
+        with self._lock:
+            self.entries[path] = {'size': size, 'mtime': mtime, 'sha': sha, 'checked_at': time.time()}
+
+    def drop(self, path: str) -> None:
+        with self._lock:
+            self.entries.pop(path, None)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with self._lock, tmp.open('w', encoding='utf-8') as handle:
+            json.dump(self.entries, handle)
+        os.replace(tmp, self.path)
+
+
+def _expected_size(row: dict):
+    raw = (row.get('Bytes') or '').strip().replace('"', '')
+    try:
+        return int(float(raw))
+    except ValueError:
+        return None
+
+
+def _expected_mtime(row: dict):
+    raw = (row.get('LastWrite') or '').strip()
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%d/%m/%Y %H:%M:%S'):
+        try:
+            return datetime.strptime(raw, fmt).timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(add_long_prefix(path), 'rb', buffering=0) as handle:
+        while True:
+            chunk = handle.read(BUFFER_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest().upper()
+
+
+def verify_row(row: dict, cache: VerificationCache, max_age: float) -> str:
+    """Return ``ok``, ``missing``, ``mismatch`` or ``error: ...`` for one CSV row.
+
+    The file is always stat'ed. A cache entry younger than ``max_age`` with the
+    same size and mtime is trusted as is; otherwise size and mtime are compared
+    against the CSV and the file is re-hashed only when either of them changed.
+    """
+    path = row['Path']
+    expected = (row.get('Hash') or '').strip().upper()
+    try:
+        stat = os.stat(add_long_prefix(path))
+    except FileNotFoundError:
+        cache.drop(path)
+        return 'missing'
+    except OSError as exc:
+        return f'error: {exc}'
+    cached = cache.recent(path, max_age)
+    if cached is not None and cached.get('size') == stat.st_size and cached.get('mtime') == stat.st_mtime:
+        return 'ok' if cached.get('sha') == expected else 'mismatch'
+    size = _expected_size(row)
+    mtime = _expected_mtime(row)
+    unchanged = (
+        size == stat.st_size
+        and mtime is not None
+        and abs(stat.st_mtime - mtime) <= MTIME_TOLERANCE
+    )
+    if unchanged:
+        sha = expected
+    else:
+        try:
+            sha = sha256_file(path)
+        except FileNotFoundError:
+            return 'missing'
+        except OSError as exc:
+            return f'error: {exc}'
+    cache.put(path, stat.st_size, stat.st_mtime, sha)
+    return 'ok' if sha == expected else 'mismatch'
+
+
+def iter_verified_candidates(csv_path: Path, log: 'DeletionLog', cache: VerificationCache, drives=None,
+                             workers: int = DEFAULT_WORKERS, max_age: float = DEFAULT_VERIFY_TTL_HOURS * 3600):
+    """Yield deletable rows after re-verifying every copy of their hash group.
+
+    All copies of a group are checked (including other drives and media
+    extensions) and at least one verified copy is always left on disk.
+    """
+    groups = defaultdict(list)
+    wanted = set()
+    with csv_path.open('r', encoding='utf-8-sig', newline='') as handle:
+        for row in csv.DictReader(handle):
+            if not row.get('Path'):
+                continue
+            groups[(row.get('Hash') or '').strip().upper()].append(row)
+    for row in iter_candidates(csv_path, drives):
+        wanted.add(row['Path'])
+
+    rows = [row for members in groups.values() if any(m['Path'] in wanted for m in members) for row in members]
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='verify') as executor:
+        statuses = dict(zip((row['Path'] for row in rows), executor.map(lambda r: verify_row(r, cache, max_age), rows)))
+
+    for sha, members in groups.items():
+        candidates = [m for m in members if m['Path'] in wanted]
+        if not candidates:
+            continue
+        for member in candidates:
+            status = statuses[member['Path']]
+            if status == 'missing':
+                log.missing(member['Path'])
+            elif status != 'ok':
+                log.error(member['Path'], 'verificacion fallida (hash distinto)' if status == 'mismatch' else status[7:])
+        verified = sorted((m for m in candidates if statuses[m['Path']] == 'ok'), key=lambda m: m['Path'].lower())
+        survivors = [m for m in members if m['Path'] not in wanted and statuses.get(m['Path']) == 'ok']
+        if not survivors and verified:
+            verified = verified[1:]
+        yield from verified
+
+
+def remove_paths(csv_path: Path, log_path: Path, drives=None, workers: int = DEFAULT_WORKERS,
+                 verify: bool = False, cache_path: Path = None,
+                 verify_ttl_hours: float = DEFAULT_VERIFY_TTL_HOURS) -> int:
+    """Delete the non-media paths from ``csv_path`` using one bounded pool per drive.
+
+    At most ``workers * 2`` removals are queued per drive, so memory stays flat
+    regardless of the CSV size, and every outcome is appended to the audit
+    logs as soon as it happens. With ``verify`` every copy is re-checked first
+    (see ``iter_verified_candidates``).
+    """
+    drives = {d.upper() for d in drives} if drives else None
+    workers = max(1, workers)
+    log = DeletionLog(log_path)
+    executors = {}
+    slots = {}
+    cache = None
+    if verify:
+        cache = VerificationCache(cache_path or log_path.with_name(log_path.stem + '_verify_cache.json'))
+        source = iter_verified_candidates(csv_path, log, cache, drives, workers, verify_ttl_hours * 3600)
+    else:
+        source = iter_candidates(csv_path, drives)
+
+    try:
+        for row in source:
+            drive = row['Path'][0].upper()
+            executor = executors.get(drive)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'rm-{drive}')
+                executors[drive] = executor
+                slots[drive] = threading.BoundedSemaphore(workers * 2)
+            slot = slots[drive]
+            slot.acquire()
+            future = executor.submit(delete_one, row, log)
+            if cache is not None:
+                cache.drop(row['Path'])
+            future.add_done_callback(lambda _, slot=slot: slot.release())
+    finally:
+        for executor in executors.values():
+            executor.shutdown(wait=True)
+        log.close()
+        if cache is not None:
+            cache.save()
+
+    return log.counts['removed']
 
 
 def main():
@@ -92,9 +329,14 @@ def main():
     parser.add_argument('--csv', default='dupes_confirmed.csv', type=Path, help='CSV con duplicados (default: dupes_confirmed.csv)')
     parser.add_argument('--log', default='deleted_nonmedia_duplicates.csv', type=Path, help='CSV de salida con las rutas eliminadas.')
     parser.add_argument('--drives', nargs='*', help='Filtrar por letras de unidad (ej: H J).')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Hilos de borrado por unidad (default: 4).')
+    parser.add_argument('--verify', action='store_true', help='Re-verificar tamano/fecha (y hash si cambiaron) antes de borrar, conservando siempre una copia.')
+    parser.add_argument('--verify-cache', type=Path, default=None, help='Cache JSON de verificaciones (default: <log>_verify_cache.json).')
+    parser.add_argument('--verify-ttl', type=float, default=DEFAULT_VERIFY_TTL_HOURS, help='Horas durante las que una verificacion previa se reutiliza (default: 24).')
     args = parser.parse_args()
 
-    count = remove_paths(args.csv, args.log, drives=args.drives)
+    count = remove_paths(args.csv, args.log, drives=args.drives, workers=args.workers,
+                         verify=args.verify, cache_path=args.verify_cache, verify_ttl_hours=args.verify_ttl)
     print(f'Eliminados {count} archivos no multimedia.')
 
 